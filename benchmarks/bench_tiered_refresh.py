@@ -0,0 +1,70 @@
+"""
+Benchmark: atualização em camadas (ativos a cada ciclo, em espera/parados sob demanda).
+
+Compara, numa fila grande e estável, o ciclo antigo (em espera e parados
+rebuscados a cada atualização) com o ciclo em camadas, medindo bytes
+recebidos, chamadas RPC e tempo por ciclo. A cada --change-every ciclos
+um download entra na fila, forçando uma ressincronização.
+
+Uso:
+    python -m benchmarks.bench_tiered_refresh [--waiting 1000] [--stopped 1000] [--ticks 100]
+"""
+
+import argparse
+import time
+
+from benchmarks.bench_virtual_list import make_controller, percentile
+from benchmarks.fake_aria2 import FakeAria2
+
+
+def run(server, ticks, window, change_every, always_resync):
+    controller = make_controller(server.url)
+    controller.listar_downloads(0, window)  # aquecimento: primeira sincronização completa
+
+    bytes_before = server.bytes_sent
+    calls_before = server.state.calls
+    latencies = []
+    for tick in range(1, ticks + 1):
+        if change_every and tick % change_every == 0:
+            with server.state.lock:
+                server.state.num_waiting += 1
+        if always_resync:
+            controller.invalidate()
+        start = time.perf_counter()
+        controller.listar_downloads(0, window)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "bytes": (server.bytes_sent - bytes_before) / ticks,
+        "calls": (server.state.calls - calls_before) / ticks,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "syncs": controller.refresh_stats["sync"] - 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--active", type=int, default=5)
+    parser.add_argument("--waiting", type=int, default=1000)
+    parser.add_argument("--stopped", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--change-every", type=int, default=25)
+    args = parser.parse_args()
+
+    window = args.active + args.waiting + args.stopped
+    results = {}
+    for label, always_resync in (("completo", True), ("em camadas", False)):
+        with FakeAria2(num_active=args.active, num_waiting=args.waiting, num_stopped=args.stopped) as server:
+            results[label] = run(server, args.ticks, window, args.change_every, always_resync)
+
+    print(f"Fila: {args.active} ativos, {args.waiting} em espera, {args.stopped} parados; {args.ticks} ciclos")
+    print(f"{'':12} {'bytes/ciclo':>12} {'chamadas/ciclo':>15} {'p50 ms':>8} {'p99 ms':>8} {'ressincs':>9}")
+    for label, r in results.items():
+        print(f"{label:12} {r['bytes']:>12.0f} {r['calls']:>15.2f} {r['p50']:>8.2f} {r['p99']:>8.2f} {r['syncs']:>9}")
+    full, tiered = results["completo"], results["em camadas"]
+    print(f"Redução de bytes por ciclo: {100 * (1 - tiered['bytes'] / full['bytes']):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark: chamadas ao Tk por ciclo de atualização da lista de downloads.
+
+Compara a estratégia antiga (apagar tudo e reinserir) com o TreeReconciler
+para 10, 1.000 e 10.000 linhas. Por padrão usa um Treeview simulado que só
+conta chamadas (roda sem display); com --tk usa um ttk.Treeview real.
+
+Uso:
+    python -m benchmarks.bench_treeview [--tk]
+"""
+
+import random
+import sys
+import time
+
+from src.ui.utils.tree_reconciler import TreeReconciler
+
+COLUMNS = ("Nome", "Progresso", "Velocidade", "Tempo", "Ações")
+SIZES = (10, 1_000, 10_000)
+
+
+class CountingTree:
+    """Treeview simulado que conta as chamadas que seriam feitas ao Tk."""
+
+    def __init__(self, real=None):
+        self.real = real
+        self.calls = 0
+        self.children = []
+
+    def __getitem__(self, key):
+        return COLUMNS if key == "columns" else None
+
+    def _forward(self, name, *args, **kwargs):
+        self.calls += 1
+        if self.real is not None:
+            return getattr(self.real, name)(*args, **kwargs)
+
+    def get_children(self):
+        self.calls += 1
+        if self.real is not None:
+            return self.real.get_children()
+        return tuple(self.children)
+
+    def insert(self, parent, index, iid=None, values=()):
+        if self.real is None:
+            self.children.append(iid)
+        return self._forward("insert", parent, index, iid=iid, values=values)
+
+    def delete(self, *items):
+        if self.real is None:
+            gone = set(items)
+            self.children = [iid for iid in self.children if iid not in gone]
+        return self._forward("delete", *items)
+
+    def move(self, iid, parent, index):
+        return self._forward("move", iid, parent, index)
+
+    def set(self, iid, column, value):
+        return self._forward("set", iid, column, value)
+
+    def item(self, iid, **kwargs):
+        return self._forward("item", iid, **kwargs)
+
+
+def make_rows(n):
+    rows = []
+    for i in range(n):
+        status = "active" if i < max(1, n // 20) else "waiting"
+        rows.append([f"gid{i:06d}", f"arquivo_{i}.iso", 0.0, 0, status])
+    return rows
+
+
+def format_rows(rows):
+    out = []
+    for gid, name, progress, speed, status in rows:
+        action = "[⏸ ⏹]" if status == "active" else "[⏵ ⏹]"
+        out.append((gid, (name, f"{progress:.1f}%", f"{speed / 1024:.1f} KB/s", "Calculando...", action)))
+    return out
+
+
+def tick(rows, rng):
+    """Simula um ciclo: ativos avançam, um termina e um novo entra na fila."""
+    for row in rows:
+        if row[4] == "active":
+            row[2] = min(100.0, row[2] + rng.random())
+            row[3] = rng.randint(0, 5_000_000)
+    rows[0][4] = "complete"
+    rows.pop(len(rows) // 2)
+    rows.append([f"new{rng.randint(0, 1 << 30):010d}", "novo.bin", 0.0, 0, "waiting"])
+
+
+def naive(tree, formatted):
+    tree.delete(*tree.get_children())
+    for iid, values in formatted:
+        tree.insert("", "end", iid=iid, values=values)
+
+
+def run(size, real_tree_factory=None, ticks=5):
+    rng = random.Random(size)
+    results = {}
+    for strategy in ("naive", "reconciler"):
+        rows = make_rows(size)
+        tree = CountingTree(real_tree_factory() if real_tree_factory else None)
+        reconciler = TreeReconciler(tree)
+        apply = (lambda f: naive(tree, f)) if strategy == "naive" else reconciler.reconcile
+
+        apply(format_rows(rows))  # carga inicial, fora da medição
+        tree.calls = 0
+        elapsed = 0.0
+        for _ in range(ticks):
+            tick(rows, rng)
+            formatted = format_rows(rows)
+            start = time.perf_counter()
+            apply(formatted)
+            elapsed += time.perf_counter() - start
+        results[strategy] = (tree.calls / ticks, elapsed / ticks * 1000)
+    return results
+
+
+def main():
+    factory = None
+    if "--tk" in sys.argv:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+        root.withdraw()
+
+        def make_tree():
+            return ttk.Treeview(root, columns=COLUMNS, show="headings")
+        factory = make_tree
+
+    print(f"{'linhas':>8} | {'estratégia':<10} | {'chamadas Tk/ciclo':>17} | {'ms/ciclo':>8}")
+    for size in SIZES:
+        for strategy, (calls, ms) in run(size, factory).items():
+            print(f"{size:>8} | {strategy:<10} | {calls:>17.0f} | {ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Servidor local que imita o JSON-RPC do Aria2, para benchmarks reproduzíveis.
+
+Os downloads são gerados sob demanda a partir do índice, então simular
+100 mil itens não ocupa memória proporcional no servidor. Suporta
+system.multicall, lotes JSON-RPC, projeção de campos (keys) e os métodos
+tell*/getGlobalStat/tellStatus/getVersion usados pelo aplicativo, além do
+canal WebSocket de notificações (notify()) no mesmo endereço, que pode
+ser desligado (websocket=False) ou ter as conexões derrubadas
+(drop_ws_clients()) para testar reconexão e fallback. Latência
+(fixa mais variação aleatória) e falhas podem ser injetadas: error_rate é
+a fração de requisições que falham, com HTTP 500 (error_kind="http") ou
+com a conexão derrubada sem resposta (error_kind="drop").
+
+Uso:
+    with FakeAria2(num_waiting=100_000, latency=0.002, error_rate=0.01) as server:
+        rpc = Aria2RPC(url=server.url, token="")
+        server.notify("aria2.onDownloadStart", server.state.gid_for("active", 0))
+"""
+
+import base64
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class FakeAria2State:
+    """Estado simulado: N ativos, em espera e parados, gerados pelo índice."""
+
+    def __init__(self, num_active=5, num_waiting=100, num_stopped=100, files_per_download=1, seed=0):
+        self.num_active = num_active
+        self.num_waiting = num_waiting
+        self.num_stopped = num_stopped
+        self.files_per_download = files_per_download
+        self.seed = seed
+        self.overrides = {}  # gid -> campos alterados por ações (pause, remove...)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    # --- geração dos itens -------------------------------------------------
+
+    @staticmethod
+    def gid_for(kind, index):
+        return f"{'asw'.index(kind[0]) + 1:x}{index:015x}"
+
+    def status(self, kind, index, keys=None):
+        gid = self.gid_for(kind, index)
+        state = {"a": "active", "w": "waiting", "s": "complete"}[kind[0]]
+        total = 1_000_000 + (index * 7919) % 50_000_000
+        completed = total if state == "complete" else (total * ((index + self.seed) % 100)) // 100
+        item = {
+            "gid": gid,
+            "status": state,
+            "totalLength": str(total),
+            "completedLength": str(completed),
+            "downloadSpeed": str(50_000 + index % 2_000_000) if state == "active" else "0",
+            "uploadSpeed": "0",
+            "errorCode": "0" if state == "complete" else "",
+            "infoHash": f"{index:040x}" if self.files_per_download > 1 else "",
+            "dir": "/downloads",
+            "connections": "16" if state == "active" else "0",
+        }
+        if keys is None or "files" in keys:
+            # A árvore de arquivos só é montada se pedida (torrents grandes custam caro aqui)
+            item["files"] = [
+                {
+                    "index": str(n + 1),
+                    "path": f"/downloads/item_{index}/file_{n}.bin",
+                    "length": str(total // self.files_per_download),
+                    "completedLength": str(completed // self.files_per_download),
+                    "selected": "true",
+                    "uris": [{"uri": f"http://mirror{index % 7}.example.com/item_{index}/file_{n}.bin",
+                              "status": "used"}],
+                }
+                for n in range(self.files_per_download)
+            ]
+        if self.files_per_download > 1:
+            item["bittorrent"] = {"info": {"name": f"torrent_{index}"}, "mode": "multi",
+                                  "announceList": [["udp://tracker.example.com:80"]]}
+        item.update(self.overrides.get(gid, {}))
+        return item
+
+    def _range(self, kind, count, offset, num, keys=None):
+        if offset < 0:
+            # Offset negativo: conta a partir do fim, em ordem reversa (como o Aria2)
+            start = count + offset
+            return [self.status(kind, i, keys) for i in range(start, max(start - num, -1), -1) if 0 <= i < count]
+        return [self.status(kind, i, keys) for i in range(offset, min(offset + num, count))]
+
+    def find(self, gid, keys=None):
+        kind = {"1": "a", "2": "s", "3": "w"}.get(gid[:1])
+        if kind is None:
+            return None
+        index = int(gid[1:], 16)
+        count = {"a": self.num_active, "w": self.num_waiting, "s": self.num_stopped}[kind]
+        return self.status(kind, index, keys) if index < count else None
+
+    # --- métodos RPC -------------------------------------------------------
+
+    def call(self, method, params):
+        params = [p for p in params if not (isinstance(p, str) and p.startswith("token:"))]
+        with self.lock:
+            self.calls += 1
+
+        if method == "aria2.tellActive":
+            keys = params[0] if params else None
+            return _project(self._range("a", self.num_active, 0, self.num_active, keys), keys)
+        if method == "aria2.tellWaiting":
+            keys = _keys(params, 2)
+            return _project(self._range("w", self.num_waiting, params[0], params[1], keys), keys)
+        if method == "aria2.tellStopped":
+            keys = _keys(params, 2)
+            return _project(self._range("s", self.num_stopped, params[0], params[1], keys), keys)
+        if method == "aria2.tellStatus":
+            item = self.find(params[0], _keys(params, 1))
+            if item is None:
+                raise RPCError(1, f"GID {params[0]} is not found")
+            return _project([item], _keys(params, 1))[0]
+        if method == "aria2.getGlobalStat":
+            return {
+                "downloadSpeed": str(sum(50_000 + i % 2_000_000 for i in range(self.num_active))),
+                "uploadSpeed": "0",
+                "numActive": str(self.num_active),
+                "numWaiting": str(self.num_waiting),
+                "numStopped": str(self.num_stopped),
+                "numStoppedTotal": str(self.num_stopped),
+            }
+        if method == "aria2.getVersion":
+            return {"version": "1.37.0-fake", "enabledFeatures": []}
+        if method in ("aria2.pause", "aria2.forcePause", "aria2.unpause", "aria2.remove", "aria2.forceRemove"):
+            new_status = {"aria2.unpause": "waiting", "aria2.remove": "removed",
+                          "aria2.forceRemove": "removed"}.get(method, "paused")
+            self.overrides.setdefault(params[0], {})["status"] = new_status
+            return params[0]
+        if method in ("aria2.pauseAll", "aria2.unpauseAll", "aria2.forcePauseAll",
+                      "aria2.purgeDownloadResult", "aria2.changeGlobalOption", "aria2.changeOption",
+                      "aria2.shutdown", "aria2.forceShutdown", "aria2.saveSession",
+                      "aria2.removeDownloadResult"):
+            return "OK"
+        if method == "aria2.changePosition":
+            return params[1]
+        if method in ("aria2.addUri", "aria2.addTorrent", "aria2.addMetalink"):
+            with self.lock:
+                self.num_waiting += 1
+                gid = self.gid_for("w", self.num_waiting - 1)
+            return [gid] if method == "aria2.addMetalink" else gid
+        if method == "aria2.getOption" or method == "aria2.getGlobalOption":
+            return {"max-concurrent-downloads": "5", "split": "16", "max-connection-per-server": "16"}
+        raise RPCError(1, f"No such method: {method}")
+
+
+class RPCError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _keys(params, index):
+    return params[index] if len(params) > index else None
+
+
+def _project(items, keys):
+    if not keys:
+        return items
+    return [{k: v for k, v in item.items() if k in keys} for item in items]
+
+
+def _dispatch(state, body):
+    """Resolve um objeto JSON-RPC (simples, multicall) e retorna a resposta."""
+    method = body.get("method")
+    params = body.get("params", [])
+    response = {"jsonrpc": "2.0", "id": body.get("id")}
+    try:
+        if method == "system.multicall":
+            results = []
+            for call in params[0]:
+                try:
+                    results.append([state.call(call["methodName"], call.get("params", []))])
+                except RPCError as e:
+                    results.append({"code": e.code, "message": e.message})
+            response["result"] = results
+        else:
+            response["result"] = state.call(method, params)
+    except RPCError as e:
+        response["error"] = {"code": e.code, "message": e.message}
+    return response
+
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        delay = server.latency + (server.rng.uniform(0, server.jitter) if server.jitter else 0)
+        if delay:
+            server.sleep(delay)
+        if server.error_rate and server.rng.random() < server.error_rate:
+            server.errors_injected += 1
+            if server.error_kind == "drop":
+                self.rfile.read(int(self.headers["Content-Length"]))
+                self.close_connection = True
+                self.connection.shutdown(2)  # o cliente vê ConnectionError
+                return
+            self.send_error(500, "Falha injetada")
+            return
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if isinstance(body, list):
+            response = [_dispatch(server.state, item) for item in body]
+        else:
+            response = _dispatch(server.state, body)
+        payload = json.dumps(response).encode("utf-8")
+        server.bytes_sent += len(payload)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json-rpc")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        """Handshake do WebSocket; depois só lê quadros do cliente até o fechamento."""
+        key = self.headers.get("Sec-WebSocket-Key")
+        if not self.server.websocket:
+            self.send_error(404)  # endpoint só HTTP (ex.: atrás de um proxy sem WebSocket)
+            return
+        if self.headers.get("Upgrade", "").lower() != "websocket" or not key:
+            self.send_error(400)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode("ascii")).digest()).decode("ascii")
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.wfile.flush()
+
+        client = _WebSocketPeer(self.connection)
+        with self.server.ws_lock:
+            self.server.ws_clients.append(client)
+        try:
+            while True:
+                opcode, payload = _read_frame(self.rfile)
+                if opcode is None or opcode == 0x8:
+                    client.send(0x8, payload[:2] if payload else b"")
+                    break
+                if opcode == 0x9:
+                    client.send(0xA, payload)
+        except OSError:
+            pass
+        finally:
+            with self.server.ws_lock:
+                self.server.ws_clients.remove(client)
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _WebSocketPeer:
+    """Conexão WebSocket aceita; envio serializado por lock (notify vem de outra thread)."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.lock = threading.Lock()
+
+    def send(self, opcode, payload):
+        size = len(payload)
+        if size < 126:
+            header = struct.pack("!BB", 0x80 | opcode, size)
+        elif size < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, size)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, size)
+        with self.lock:
+            self.sock.sendall(header + payload)
+
+
+def _read_frame(rfile):
+    """Lê um quadro (mascarado) do cliente; retorna (opcode, payload) ou (None, b"") no EOF."""
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None, b""
+    opcode, size = head[0] & 0x0F, head[1] & 0x7F
+    if size == 126:
+        (size,) = struct.unpack("!H", rfile.read(2))
+    elif size == 127:
+        (size,) = struct.unpack("!Q", rfile.read(8))
+    mask = rfile.read(4) if head[1] & 0x80 else b""
+    payload = rfile.read(size)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+class FakeAria2:
+    """Sobe o servidor falso em uma porta livre de 127.0.0.1, em thread própria."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_kind="http", seed=0, websocket=True,
+                 **state_kwargs):
+        self.state = FakeAria2State(seed=seed, **state_kwargs)
+        self.websocket = websocket
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_kind = error_kind
+        self.seed = seed
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/jsonrpc"
+
+    @property
+    def bytes_sent(self):
+        return self._server.bytes_sent
+
+    @property
+    def errors_injected(self):
+        return self._server.errors_injected
+
+    @property
+    def ws_clients(self):
+        with self._server.ws_lock:
+            return len(self._server.ws_clients)
+
+    def notify(self, method, gid):
+        """Envia uma notificação aria2.on* a todos os clientes WebSocket; retorna quantos a receberam."""
+        payload = json.dumps({"jsonrpc": "2.0", "method": method, "params": [{"gid": gid}]}).encode("utf-8")
+        with self._server.ws_lock:
+            clients = list(self._server.ws_clients)
+        sent = 0
+        for client in clients:
+            try:
+                client.send(0x1, payload)
+                sent += 1
+            except OSError:
+                pass
+        return sent
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.state = self.state
+        self._server.latency = self.latency
+        self._server.jitter = self.jitter
+        self._server.error_rate = self.error_rate
+        self._server.error_kind = self.error_kind
+        self._server.websocket = self.websocket
+        self._server.errors_injected = 0
+        self._server.rng = random.Random(self.seed)
+        self._server.sleep = time.sleep
+        self._server.bytes_sent = 0
+        self._server.ws_clients = []
+        self._server.ws_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def drop_ws_clients(self):
+        """Fecha as conexões WebSocket abertas (o servidor continua aceitando novas)."""
+        with self._server.ws_lock:
+            clients = list(self._server.ws_clients)
+        for client in clients:
+            try:
+                client.send(0x8, b"")
+            except OSError:
+                pass
+        return len(clients)
+
+    def stop(self):
+        if self._server:
+            self.drop_ws_clients()
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,489 @@
+"""
+Suíte de benchmarks com resultados comparáveis entre commits.
+
+Cada cenário sobe um Aria2 simulado (FakeAria2) com a carga que precisa
+(fila grande, torrents com muitos arquivos, latência e falhas injetadas,
+notificações WebSocket) e exercita o código real do aplicativo:
+Aria2RPC, DownloadController.listar_downloads, HistoryStore e
+MainWindow.update_treeview (sobre uma camada de visão sem display, com o
+TreeReconciler contando as chamadas ao Tk). Para cada cenário são medidos
+vazão, latência p50/p99 e pico de memória (numa segunda passada, com
+tracemalloc, para não distorcer os tempos; o pico inclui o servidor
+simulado, que roda no mesmo processo). Os resultados vão para JSON com o
+commit atual, e --baseline/--compare apontam as regressões acima de
+--threshold (código de saída 1).
+
+Uso:
+    python -m benchmarks.suite [--quick] [--only rpc] [--output resultados.json]
+    python -m benchmarks.suite --baseline anterior.json [--threshold 15]
+    python -m benchmarks.suite --compare anterior.json atual.json
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from benchmarks.bench_treeview import CountingTree
+from benchmarks.bench_virtual_list import make_controller, percentile
+from benchmarks.fake_aria2 import FakeAria2
+
+SCENARIOS = {}
+
+
+def scenario(name, iterations, quick):
+    """Registra um cenário: func(iterações) -> (latências em ms, extras)."""
+    def register(func):
+        SCENARIOS[name] = (func, iterations, quick)
+        return func
+    return register
+
+
+# --- cenários ----------------------------------------------------------------
+
+@scenario("rpc.get_version", 1000, 200)
+def bench_rpc_request(iterations):
+    from src.ui.utils.aria2_rpc import Aria2RPC
+    with FakeAria2() as server:
+        rpc = Aria2RPC(url=server.url, token="")
+        rpc.request("aria2.getVersion")
+        latencies = timed(iterations, lambda: rpc.request("aria2.getVersion"))
+    return latencies, {}
+
+
+@scenario("rpc.latency_errors", 300, 60)
+def bench_rpc_errors(iterations):
+    """Latência de rede de 2 a 4 ms e 5% de HTTP 500 (não repetidos)."""
+    from src.ui.utils.aria2_rpc import Aria2RPC
+    with FakeAria2(latency=0.002, jitter=0.002, error_rate=0.05, seed=20) as server:
+        rpc = Aria2RPC(url=server.url, token="")
+        failures = []
+        latencies = timed(iterations, lambda: failures.append("error" in rpc.request("aria2.getGlobalStat")))
+        injected = server.errors_injected
+    return latencies, {"errors_injected": injected, "failed_calls": sum(failures)}
+
+
+@scenario("rpc.dropped_connections", 200, 40)
+def bench_rpc_retries(iterations):
+    """5% das conexões derrubadas: chamadas idempotentes se recuperam com retentativa."""
+    from src.ui.utils.aria2_rpc import Aria2RPC
+    with FakeAria2(error_rate=0.05, error_kind="drop", seed=20) as server:
+        rpc = Aria2RPC(url=server.url, token="")
+        failures = []
+        latencies = timed(iterations, lambda: failures.append("error" in rpc.request("aria2.getGlobalStat")))
+        injected = server.errors_injected
+    return latencies, {"errors_injected": injected, "failed_calls": sum(failures)}
+
+
+@scenario("controller.refresh_10k", 200, 40)
+def bench_refresh(iterations):
+    """Fila de 20 mil itens, janela de 100 linhas; a fila muda a cada 25 ciclos."""
+    with FakeAria2(num_active=10, num_waiting=10_000, num_stopped=10_000) as server:
+        controller = make_controller(server.url)
+        controller.listar_downloads(0, 100)
+        bytes_before = server.bytes_sent
+        tick = [0]
+
+        def refresh():
+            tick[0] += 1
+            if tick[0] % 25 == 0:
+                with server.state.lock:
+                    server.state.num_waiting += 1
+            controller.listar_downloads(0, 100)
+
+        latencies = timed(iterations, refresh)
+        sent = server.bytes_sent - bytes_before
+    return latencies, {"bytes_per_tick": sent // iterations}
+
+
+@scenario("controller.torrent_trees", 100, 20)
+def bench_torrent_trees(iterations):
+    """50 torrents ativos com 1.000 arquivos cada (a projeção de campos deve ignorar a árvore)."""
+    with FakeAria2(num_active=50, num_waiting=50, num_stopped=0, files_per_download=1000) as server:
+        controller = make_controller(server.url)
+        controller.listar_downloads(0, 100)
+        bytes_before = server.bytes_sent
+        latencies = timed(iterations, lambda: controller.listar_downloads(0, 100))
+        sent = server.bytes_sent - bytes_before
+    return latencies, {"bytes_per_tick": sent // iterations}
+
+
+@scenario("fleet.refresh_3x", 200, 40)
+def bench_fleet(iterations):
+    """Três instâncias, duas com 20 ms de latência: em paralelo, o ciclo custa ~uma latência, não duas."""
+    from src.ui.controllers.fleet_controller import FleetController
+    servers = [FakeAria2(latency=0.02, num_active=5, num_waiting=2_000, num_stopped=1_000).start(),
+               FakeAria2(num_active=5, num_waiting=50, num_stopped=50).start(),
+               FakeAria2(latency=0.02, num_active=5, num_waiting=2_000, num_stopped=1_000).start()]
+    try:
+        fleet = FleetController([{"name": f"aria2-{i}", "url": server.url, "token": ""}
+                                 for i, server in enumerate(servers)], "least_loaded")
+        fleet.listar_downloads(2_950, 100)
+        latencies = timed(iterations, lambda: fleet.listar_downloads(2_950, 100))
+    finally:
+        for server in servers:
+            server.stop()
+    return latencies, {"instances": len(servers)}
+
+
+@scenario("queue.plan_10k", 500, 100)
+def bench_queue_plan(iterations):
+    """
+    QueueManager.plan (srf) sobre 10 mil em espera: a cada ciclo um inicia,
+    outro chega e, a cada 5, uma prioridade muda. A extração dos GIDs da
+    resposta decodificada é medida à parte (gid_extract_ms).
+    """
+    from src.ui.controllers.fleet_controller import FleetController
+    from src.ui.utils.queue_manager import QueueManager
+    from src.ui.utils.queue_store import QueueStore
+    with FakeAria2(num_active=0, num_waiting=10_000 + iterations, num_stopped=0) as server, \
+            tempfile.TemporaryDirectory() as directory:
+        fleet = FleetController([{"name": "", "url": server.url, "token": ""}])
+        manager = QueueManager(fleet, QueueStore(os.path.join(directory, "queue.db")), "srf")
+        queue = manager._queues[""]
+        statuses = fleet.primary.rpc.request("aria2.tellWaiting", [0, 10_000 + iterations,
+                                                                   QueueManager.STATUS_KEYS])["result"]
+        arriving = iter(statuses[10_000:])
+
+        def apply(waiting, calls):
+            """O que o Aria2 faria com os changePosition."""
+            by_gid = {status["gid"]: status for status in waiting}
+            order = [status["gid"] for status in waiting]
+            for _method, (gid, index, _how) in calls:
+                order.remove(gid)
+                order.insert(index, gid)
+            return [by_gid[gid] for gid in order]
+
+        # Ordenação inicial (MAX_MOVES por ciclo), fora da medição
+        waiting = statuses[:10_000]
+        calls = manager.plan(queue, "", [status["gid"] for status in waiting], waiting)
+        while calls:
+            waiting = apply(waiting, calls)
+            calls = manager.plan(queue, "", [status["gid"] for status in waiting], waiting)
+
+        moves = 0
+        extract = 0.0
+        latencies = []
+        for tick in range(1, iterations + 1):
+            waiting = waiting[1:] + [next(arriving)]
+            if tick % 5 == 0:
+                gid = waiting[len(waiting) // 2]["gid"]
+                manager.set_priority([gid], tick % 3 - 1)
+                manager.rekey(queue, "", {gid})
+            started = time.perf_counter()
+            gids = [status["gid"] for status in waiting]
+            extracted = time.perf_counter()
+            calls = manager.plan(queue, "", gids, waiting)
+            latencies.append((time.perf_counter() - extracted) * 1000)
+            extract += extracted - started
+            moves += len(calls)
+            waiting = apply(waiting, calls)
+    return latencies, {"moves_per_tick": round(moves / iterations, 2),
+                       "gid_extract_ms": round(extract / iterations * 1000, 3)}
+
+
+@scenario("integrity.hash", 20, 5)
+def bench_integrity_hash(iterations):
+    """
+    Arquivo de 64 MiB em cache: GB/s por núcleo de cada algoritmo (hash_file
+    no próprio processo; latências = SHA-256) e do pool com um arquivo por processo.
+    """
+    from src.ui.utils.integrity_checker import IntegrityChecker, hash_file
+    size = 64 * 1024 ** 2
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "payload.bin")
+        with open(path, "wb") as f:
+            for _ in range(size >> 20):
+                f.write(os.urandom(1 << 20))
+        hash_file(path)  # páginas já em cache: mede o hash, não o disco
+
+        extras = {"file_mb": size >> 20}
+        for algorithm in ("sha-1", "md5"):
+            seconds = percentile(timed(max(iterations // 4, 1), lambda: hash_file(path, (algorithm,))), 50) / 1000
+            extras[f"{algorithm}_gb_s_per_core"] = round(size / seconds / 1e9, 3)
+        latencies = timed(iterations, lambda: hash_file(path, ("sha-256",)))
+        extras["sha-256_gb_s_per_core"] = round(size / (percentile(latencies, 50) / 1000) / 1e9, 3)
+
+        checker = IntegrityChecker(None, workers=os.cpu_count())
+        try:
+            jobs = [(path, ("sha-256",))] * checker.workers
+            checker.hash_many(jobs)  # processos do pool já iniciados
+            started = time.perf_counter()
+            checker.hash_many(jobs)
+            elapsed = time.perf_counter() - started
+        finally:
+            checker.close()
+        extras["pool_workers"] = checker.workers
+        extras["pool_gb_s"] = round(size * checker.workers / elapsed / 1e9, 3)
+        extras["pool_gb_s_per_core"] = round(size / elapsed / 1e9, 3)
+    return latencies, extras
+
+
+@scenario("history.append", 5000, 1000)
+def bench_history_append(iterations):
+    """Conclusões gravadas no histórico (em lotes de FLUSH_SIZE)."""
+    from src.ui.utils.history_store import HistoryStore
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, "history.db"))
+        counter = iter(range(iterations))
+
+        def append():
+            i = next(counter)
+            store.append(history_entry(i), fingerprints=(f"gid:{i:016x}",))
+
+        latencies = timed(iterations, append)
+        started = time.perf_counter()
+        store.flush()
+        flush_ms = (time.perf_counter() - started) * 1000
+        store.close()
+    return latencies, {"final_flush_ms": round(flush_ms, 3)}
+
+
+@scenario("history.load", 50, 10)
+def bench_history_load(iterations):
+    """Leitura do histórico com 20 mil entradas: tudo (load_all) e uma página filtrada."""
+    from src.ui.utils.history_store import HistoryStore
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, "history.db"))
+        for i in range(20_000):
+            store.append(history_entry(i))
+        store.flush()
+        load_all = timed(max(iterations // 10, 1), store.load_all)
+        latencies = timed(iterations, lambda: store.query("arquivo_1", limit=100))
+        store.close()
+    return latencies, {"load_all_p50_ms": round(percentile(load_all, 50), 3)}
+
+
+@scenario("ui.update_treeview", 200, 40)
+def bench_update_treeview(iterations):
+    """MainWindow.update_treeview sobre 1.000 linhas visíveis, sem display."""
+    with FakeAria2(num_active=50, num_waiting=950, num_stopped=0) as server:
+        controller = make_controller(server.url)
+        window = HeadlessWindow(controller)
+        window.update_treeview(controller.listar_downloads(0, 1000))
+        latencies = []
+        tk_calls = 0
+        for tick in range(iterations):
+            server.state.seed = tick + 1  # os ativos avançam a cada ciclo
+            page = controller.listar_downloads(0, 1000)
+            started = time.perf_counter()
+            window.update_treeview(page)
+            latencies.append((time.perf_counter() - started) * 1000)
+            tk_calls += window.download_list.reconciler.last_stats["tk_calls"]
+    return latencies, {"tk_calls_per_tick": round(tk_calls / iterations, 1)}
+
+
+@scenario("ws.notifications", 500, 100)
+def bench_ws_notifications(iterations):
+    """Da notificação enviada pelo servidor ao callback on_event do cliente."""
+    from src.ui.utils.aria2_rpc import Aria2RPC
+    with FakeAria2() as server:
+        received = threading.Event()
+        client = Aria2RPC(url=server.url, token="").subscribe(lambda method, gid: received.set())
+        deadline = time.monotonic() + 5
+        while not server.ws_clients:
+            if time.monotonic() > deadline:
+                client.stop()
+                raise RuntimeError("cliente WebSocket não conectou")
+            time.sleep(0.01)
+
+        def roundtrip():
+            received.clear()
+            server.notify("aria2.onDownloadStart", "2000000000000001")
+            if not received.wait(2):
+                raise RuntimeError("notificação não recebida")
+
+        latencies = timed(iterations, roundtrip)
+        client.stop()
+    return latencies, {}
+
+
+# --- apoio ------------------------------------------------------------------
+
+def timed(iterations, func):
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def history_entry(i):
+    return {
+        "filename": f"arquivo_{i}.iso",
+        "url": f"http://mirror{i % 7}.example.com/arquivo_{i}.iso",
+        "path": f"/downloads/arquivo_{i}.iso",
+        "status": "complete",
+        "finished_at": f"2024-01-01 00:{i // 60 % 60:02d}:{i % 60:02d}",
+    }
+
+
+class HeadlessView:
+    """Substitui a VirtualTreeview: entrega as linhas ao TreeReconciler de um Treeview simulado."""
+
+    def __init__(self):
+        from src.ui.utils.tree_reconciler import TreeReconciler
+        self.reconciler = TreeReconciler(CountingTree())
+
+    def set_rows(self, offset, total, rows):
+        self.reconciler.reconcile(rows)
+
+
+class _NoopTracker:
+    def submit(self, item):
+        pass
+
+
+class HeadlessWindow:
+    """Camada de visão da MainWindow sem Tk: mesmas update_treeview e format_row."""
+
+    def __init__(self, controller):
+        from src.ui.main_window import MainWindow
+        self.controller = controller
+        self.completion_tracker = _NoopTracker()
+        # Recursos opcionais da MainWindow, desligados (update_treeview os testa com "is not None")
+        self.autotuner = None
+        self.queue_store = None
+        self.integrity = None
+        self.download_list = HeadlessView()
+        self._records = {}
+        self.update_treeview = MainWindow.update_treeview.__get__(self)
+        self.format_row = MainWindow.format_row.__get__(self)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scenario(name, quick):
+    func, iterations, quick_iterations = SCENARIOS[name]
+    iterations = quick_iterations if quick else iterations
+
+    started = time.perf_counter()
+    latencies, extras = func(iterations)
+    elapsed = time.perf_counter() - started
+
+    # Segunda passada, menor, só para o pico de memória
+    tracemalloc.start()
+    func(max(quick_iterations // 4, 5))
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": len(latencies),
+        "throughput_ops": round(len(latencies) / sum(latencies) * 1000, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(max(latencies), 3),
+        "peak_kib": round(peak / 1024, 1),
+        "wall_s": round(elapsed, 2),
+        **extras,
+    }
+
+
+def run_suite(patterns, quick):
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "scenarios": {},
+    }
+    for name in SCENARIOS:
+        if patterns and not any(fnmatch.fnmatch(name, p) or name.startswith(p) for p in patterns):
+            continue
+        print(f"{name} ...", end=" ", flush=True)
+        result = run_scenario(name, quick)
+        results["scenarios"][name] = result
+        print(f"{result['throughput_ops']:.0f} op/s, p50 {result['p50_ms']:.2f} ms, "
+              f"p99 {result['p99_ms']:.2f} ms, pico {result['peak_kib']:.0f} KiB")
+    return results
+
+
+# --- comparação --------------------------------------------------------------
+
+# Métrica -> True se maior é melhor
+COMPARED = {"throughput_ops": True, "p50_ms": False, "p99_ms": False, "peak_kib": False}
+
+
+def compare(baseline, current, threshold):
+    """Imprime as variações por cenário; retorna a lista de regressões acima de threshold (%)."""
+    regressions = []
+    base_meta, cur_meta = baseline.get("meta", {}), current.get("meta", {})
+    print(f"\nBase: {base_meta.get('commit')} ({base_meta.get('timestamp')})  "
+          f"Atual: {cur_meta.get('commit')} ({cur_meta.get('timestamp')})")
+    print(f"{'cenário':28} {'métrica':15} {'base':>12} {'atual':>12} {'variação':>9}")
+    for name, result in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"{name:28} (novo)")
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > threshold:
+                flag = "  REGRESSÃO"
+                regressions.append((name, metric, change))
+            print(f"{name:28} {metric:15} {old:>12.2f} {new:>12.2f} {change:>+8.1f}%{flag}")
+    return regressions
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", default=(), help="cenários (prefixo ou padrão glob)")
+    parser.add_argument("--quick", action="store_true", help="menos iterações, para uma verificação rápida")
+    parser.add_argument("--output", help="grava os resultados em JSON")
+    parser.add_argument("--baseline", help="compara com resultados anteriores (JSON)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "ATUAL"), help="só compara dois arquivos")
+    parser.add_argument("--threshold", type=float, default=15.0, help="piora (%%) considerada regressão")
+    parser.add_argument("--list", action="store_true", help="lista os cenários")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (func, iterations, _quick) in SCENARIOS.items():
+            print(f"{name:28} {iterations:>6}  {(func.__doc__ or '').strip()}")
+        return 0
+
+    if args.compare:
+        regressions = compare(load(args.compare[0]), load(args.compare[1]), args.threshold)
+        return 1 if regressions else 0
+
+    results = run_suite(args.only, args.quick)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Resultados gravados em {args.output}")
+    if args.baseline:
+        regressions = compare(load(args.baseline), results, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressão(ões) acima de {args.threshold:.0f}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
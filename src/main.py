@@ -6,6 +6,7 @@ from src.ui.settings_window import SettingsWindow
 from src.ui.network_window import NetworkWindow
 from src.ui.aria2_installer_window import Aria2InstallerWindow
 from src.ui.utils.log_utils import Logger
+from src.ui.utils.profiler import Profiler
 
 
 def main():
@@ -13,6 +14,11 @@ def main():
     Logger.log_info("Aplicativo iniciado.")
     print("[DEBUG] Argumentos recebidos:", sys.argv)
 
+    # Perfilamento opcional: --profile[=ciclos] [--profile-skip=N] ou ARIA2CONTROL_PROFILE=ciclos
+    profile = Profiler.parse_args(sys.argv[1:])
+    if profile is not None:
+        Profiler.enable(*profile)
+
     app = MainWindow()
 
     # Se iniciado com o argumento --install-aria2, abrir a janela do instalador
@@ -57,6 +63,9 @@ def main():
     config_menu.add_command(label="⚙️ Configurações de Download", command=open_settings_window)
     config_menu.add_command(label="🌐 Configurações de Rede", command=open_network_window)
     config_menu.add_command(label="⬇️ Instalar Aria2", command=open_aria2_installer_window)
+    config_menu.add_separator()
+    config_menu.add_command(label="📈 Exportar Métricas (CSV)", command=app.export_metrics_csv)
+    config_menu.add_command(label="🎯 Ajuste Automático por Host", command=app.open_autotune_window)
     menu_bar.add_cascade(label="Configurações", menu=config_menu)
     app.config(menu=menu_bar)
 
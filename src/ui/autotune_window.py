@@ -0,0 +1,67 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from src.ui.utils.rate_tracker import RateTracker
+
+class AutotuneWindow(tk.Toplevel):
+
+    def __init__(self, master, autotuner):
+        super().__init__(master)
+        self.title("Ajuste Automático por Host")
+        self.geometry("760x360")
+        self.autotuner = autotuner
+
+        self.create_widgets()
+        self.load_report()
+
+    def create_widgets(self):
+        columns = ("host", "connections", "split", "min_split", "throughput", "stdev", "samples", "tried", "gain")
+        column_titles = {
+            "host": "Host",
+            "connections": "Conexões",
+            "split": "Segmentos",
+            "min_split": "Tam. mín.",
+            "throughput": "Vazão média",
+            "stdev": "Desvio",
+            "samples": "Amostras",
+            "tried": "Testadas",
+            "gain": "Ganho vs 16/16",
+        }
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        for col in columns:
+            self.tree.heading(col, text=column_titles[col])
+            self.tree.column(col, anchor="w" if col == "host" else "e", width=180 if col == "host" else 70)
+        self.tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        frame_buttons = ttk.Frame(self)
+        frame_buttons.pack(fill="x", padx=10, pady=(0, 10))
+        self.lbl_summary = tk.Label(frame_buttons, text="")
+        self.lbl_summary.pack(side="left")
+        ttk.Button(frame_buttons, text="Limpar Dados", command=self.clear_data).pack(side="right")
+        ttk.Button(frame_buttons, text="Atualizar", command=self.load_report).pack(side="right", padx=5)
+
+    def load_report(self):
+        """Melhor configuração aprendida para cada host"""
+        rows = self.autotuner.report()
+        self.tree.delete(*self.tree.get_children())
+        for row in rows:
+            connections, split, min_split = row["arm"]
+            gain = f"{row['gain'] * 100:+.0f}%" if row["gain"] is not None else "-"
+            self.tree.insert("", "end", values=(
+                row["host"],
+                connections,
+                split,
+                min_split,
+                RateTracker.format_speed(row["throughput"]),
+                RateTracker.format_speed(row["stdev"]),
+                row["samples"],
+                f"{row['arms_tried']}/{len(self.autotuner.ARMS)}",
+                gain,
+            ))
+        total = sum(row["samples"] for row in rows)
+        self.lbl_summary.config(text=f"{len(rows)} hosts, {total} downloads medidos")
+
+    def clear_data(self):
+        if messagebox.askyesno("Limpar dados", "Descartar tudo o que foi aprendido sobre os hosts?", parent=self):
+            self.autotuner.clear()
+            self.load_report()
@@ -1,22 +1,396 @@
 # src/ui/controllers/download_controller.py
 
+import threading
+import time
+from collections import OrderedDict
+
 from src.ui.utils.aria2_rpc import Aria2RPC
+from src.ui.utils.aria2_async_rpc import AsyncAria2RPC
+from src.ui.models.download_record import DownloadRecord, DownloadPage
+from src.ui.utils.rate_tracker import RateTracker
 
 class DownloadController:
-    def __init__(self):
-        self.rpc = Aria2RPC()
+
+    META_CACHE_SIZE = 1000
+    RESYNC_INTERVAL = 30.0  # ressincronização de segurança de em espera/parados, sem WebSocket
+    RESYNC_INTERVAL_PUSH = 300.0  # idem, com notificações (reordenações não geram evento)
+
+    def __init__(self, url=None, token=None, name=""):
+        """
+        Args:
+            url, token: Endpoint JSON-RPC (padrão: configurações salvas)
+            name: Nome da instância, gravado nos registros (vazio com um único Aria2)
+        """
+        self.name = name
+        self.rpc = Aria2RPC(url, token)
+        self.async_rpc = AsyncAria2RPC(self.rpc.url, self.rpc.token)
+        self.global_stat = {}
+        self.online = False
+        self._counts = None  # (ativos, em espera, parados) do último getGlobalStat
+        self._meta = OrderedDict()  # gid -> (nome, caminho, url), LRU consultado uma vez por GID
+        self._last_active = set()
+        self._pending_checks = set()
+        self._reported = set()  # GIDs já devolvidos como terminados nesta sessão
+        self._runs = {}  # gid -> (segundos ativo, bytes) dos que saíram dos ativos, até a conferência
+        self._checks_lock = threading.Lock()  # eventos chegam pela thread do WebSocket
+        self._listeners = []
+        self._notifier = None
+        # Camada lenta em cache: em espera e parados da última janela sincronizada
+        self._waiting = []
+        self._stopped = []
+        self._synced_counts = None
+        self._synced_window = None
+        self._synced_at = 0.0
+        self._dirty = True
+        self._window_size = 0
+        self.refresh_stats = {"fast": 0, "sync": 0}
+        self.rates = RateTracker()  # velocidades suavizadas e ETA
+
+    def start_notifications(self):
+        """Assina as notificações WebSocket do Aria2 (sem efeito se já assinadas)."""
+        if self._notifier is None:
+            self._notifier = self.rpc.subscribe(self._on_notification)
+        return self._notifier
+
+    def stop_notifications(self):
+        if self._notifier is not None:
+            self._notifier.stop()
+            self._notifier = None
+
+    @property
+    def notifications_connected(self):
+        """True enquanto o canal WebSocket estiver ativo; False indica polling HTTP puro."""
+        return self._notifier is not None and self._notifier.connected
+
+    def add_listener(self, callback):
+        """Registra callback(método, gid) para os eventos aria2.onDownload* (chamado fora da thread da UI)."""
+        self._listeners.append(callback)
+
+    def _on_notification(self, method, gid):
+        if method in ("aria2.onDownloadComplete", "aria2.onBtDownloadComplete",
+                      "aria2.onDownloadError", "aria2.onDownloadStop"):
+            # Confere o estado final no próximo ciclo, mesmo que nunca tenha sido visto ativo
+            with self._checks_lock:
+                self._pending_checks.add(gid)
+        self.invalidate()
+        for callback in list(self._listeners):
+            callback(method, gid)
 
     def adicionar_download(self, url):
         if not url:
             raise ValueError("O link está vazio.")
-        return self.rpc.add_uri([url])
-
-    def listar_downloads(self):
-        active = self.rpc.tell_active().get("result", [])
-        waiting = self.rpc.tell_waiting(0, 1000).get("result", [])
-        stopped = self.rpc.tell_stopped(0, 1000).get("result", [])
-        return active + waiting + stopped
-    
+        response = self.rpc.add_uri([url])
+        self.invalidate()
+        return response
+
+    async def adicionar_download_async(self, url, options=None):
+        """Versão assíncrona de adicionar_download; retorna a resposta do addUri."""
+        response = await self.async_rpc.add_uri([url], options)
+        self.invalidate()
+        return response
+
+    @property
+    def active_gids(self):
+        """GIDs ativos no último ciclo."""
+        return self._last_active
+
+    def rates_for(self, record):
+        """RateTracker com a velocidade e o ETA do registro."""
+        return self.rates
+
+    async def close(self):
+        await self.async_rpc.close()
+
+    def listar_downloads(self, offset=0, limit=None):
+        """
+        Lista uma janela de downloads (ativos, em espera e parados, nessa ordem).
+
+        Ativos e estatísticas globais vêm a cada ciclo; em espera e parados
+        (faixa [offset, offset + limit), via tellWaiting/tellStopped
+        paginados) só são ressincronizados quando necessário (ver
+        _refresh_plan). limit=None lista tudo.
+
+        Returns:
+            DownloadPage com os registros da janela e o total geral
+        """
+        plan = self._refresh_plan(offset, limit)
+        calls = next(plan)
+        while True:
+            try:
+                calls = plan.send(self.rpc.multicall(calls))
+            except StopIteration as done:
+                return done.value
+
+    async def listar_downloads_async(self, offset=0, limit=None):
+        """Versão assíncrona de listar_downloads, para o loop do AsyncAria2RPC."""
+        plan = self._refresh_plan(offset, limit)
+        calls = next(plan)
+        while True:
+            results = await self.async_rpc.multicall(calls)
+            try:
+                calls = plan.send(results)
+            except StopIteration as done:
+                return done.value
+
+    def invalidate(self):
+        """Força a ressincronização de em espera/parados no próximo ciclo (após ações e eventos)."""
+        with self._checks_lock:
+            self._dirty = True
+
+    def _refresh_plan(self, offset, limit):
+        """
+        Ciclo de atualização em camadas, como gerador: recebe os resultados de
+        cada system.multicall que produz e retorna a DownloadPage.
+
+        Camada rápida (todo ciclo): tellActive + getGlobalStat, os únicos com
+        contadores que andam. Camada lenta: tellWaiting/tellStopped da janela,
+        mantidos em cache e refeitos só quando numActive/numWaiting/numStopped
+        mudam, chega uma notificação, a janela muda, uma ação local invalida o
+        cache ou passam RESYNC_INTERVAL segundos. Quando a necessidade já é
+        conhecida antes do ciclo, as duas camadas vão no mesmo round trip.
+        """
+        with self._checks_lock:
+            dirty, self._dirty = self._dirty, False
+        interval = self.RESYNC_INTERVAL_PUSH if self.notifications_connected else self.RESYNC_INTERVAL
+        resync = (dirty or self._synced_window != (offset, limit)
+                  or time.monotonic() - self._synced_at > interval)
+
+        calls = [("aria2.tellActive", [DownloadRecord.STATUS_KEYS]), ("aria2.getGlobalStat", [])]
+        planned_counts = self._counts
+        if resync and planned_counts is not None and limit is not None:
+            calls += self._window_calls(offset, limit)
+
+        results = yield calls
+        active = self._parse_fast(results)
+        if limit is None:
+            limit = sum(self._counts)
+        self.refresh_stats["fast"] += 1
+
+        if not self.online:
+            self.invalidate()
+        elif len(results) > 2 and self._counts == planned_counts:
+            self._store_window(results[2:], offset, limit)
+        elif resync or self._counts != self._synced_counts:
+            self._store_window((yield self._window_calls(offset, limit)), offset, limit)
+
+        statuses = (active[offset:offset + limit] + self._waiting + self._stopped)[:limit]
+        self._window_size = len(statuses)
+
+        missing = self._missing_meta(statuses)
+        with self._checks_lock:
+            checks = sorted(self._pending_checks)
+        if missing or checks:
+            results = yield self._meta_calls(missing) + self._check_calls(checks)
+            self._store_meta(missing, results[:len(missing)])
+            finished = self._parse_checks(checks, results[len(missing):])
+        else:
+            finished = []
+
+        return DownloadPage(offset, sum(self._counts), self._build_records(statuses), finished)
+
+    def _window_calls(self, offset, limit):
+        """tellWaiting/tellStopped da parte da janela [offset, offset + limit) após os ativos."""
+        keys = DownloadRecord.STATUS_KEYS
+        num_active, num_waiting, _num_stopped = self._counts
+        end = offset + limit
+
+        waiting_start = max(offset - num_active, 0)
+        waiting_end = max(end - num_active, 0)
+        stopped_start = max(offset - num_active - num_waiting, 0)
+        stopped_end = max(end - num_active - num_waiting, 0)
+        return [
+            ("aria2.tellWaiting", [waiting_start, max(min(waiting_end, num_waiting) - waiting_start, 0), keys]),
+            ("aria2.tellStopped", [stopped_start, max(stopped_end - stopped_start, 0), keys]),
+        ]
+
+    def _parse_stat(self, response):
+        """Atualiza estatísticas globais e contadores (ativos, em espera, parados)."""
+        self.online = "error" not in response
+        self.global_stat = response.get("result") or {}
+        self._counts = (
+            int(self.global_stat.get("numActive", 0)),
+            int(self.global_stat.get("numWaiting", 0)),
+            int(self.global_stat.get("numStopped", 0)),
+        )
+
+    def _parse_fast(self, results):
+        """Extrai os ativos e os contadores da camada rápida, conferindo ativos que sumiram."""
+        active = results[0].get("result") or []
+        self._parse_stat(results[1])
+
+        # Downloads que estavam ativos e sumiram da lista precisam ter o estado final conferido
+        if self.online:
+            active_gids = {status["gid"] for status in active}
+            vanished = self._last_active - active_gids
+            with self._checks_lock:
+                self._pending_checks |= vanished
+            self._last_active = active_gids
+            self._track_rates(active, vanished)
+        return active
+
+    def _track_rates(self, active, vanished):
+        """Alimenta o RateTracker com as amostras do ciclo (O(1) por download ativo)."""
+        now = time.monotonic()
+        for status in active:
+            self.rates.update(status["gid"], int(status.get("downloadSpeed", 0)),
+                              int(status.get("completedLength", 0)), int(status.get("totalLength", 0)), now)
+        for gid in vanished:
+            rate = self.rates.forget(gid)
+            if rate is not None:
+                self._runs[gid] = rate.run
+        self.rates.update_global(int(self.global_stat.get("downloadSpeed", 0)),
+                                 int(self.global_stat.get("uploadSpeed", 0)), now)
+
+    def _store_window(self, results, offset, limit):
+        """Guarda em cache a camada lenta (em espera e parados da janela)."""
+        self._waiting, self._stopped = (result.get("result") or [] for result in results)
+        # Parados que não foram vistos ativos (terminaram entre dois ciclos ou com o
+        # aplicativo fechado) também são conferidos; o CompletionTracker descarta os já processados
+        ended = {status["gid"] for status in self._stopped if status.get("status") in ("complete", "error")}
+        with self._checks_lock:
+            self._pending_checks |= ended - self._reported
+        self._synced_counts = self._counts
+        self._synced_window = (offset, limit)
+        self._synced_at = time.monotonic()
+        self.refresh_stats["sync"] += 1
+
+    def _build_records(self, statuses):
+        """Combina status e metadados em cache em registros DownloadRecord."""
+        empty = ("", "", "")
+        records = []
+        for status in statuses:
+            gid = status["gid"]
+            meta = self._meta.get(gid)
+            if meta is not None:
+                self._meta.move_to_end(gid)
+            records.append(DownloadRecord.from_status(status, meta or empty, self.name))
+        return records
+
+    def _missing_meta(self, statuses):
+        """
+        GIDs cujos metadados precisam ser (re)consultados: novos, magnets ainda
+        sem nome, ou downloads que começaram/terminaram sem caminho em cache.
+        """
+        missing = []
+        for status in statuses:
+            name, path, _url = self._meta.get(status["gid"], ("", "", ""))
+            if not name or (not path and status.get("status") in ("active", "complete")):
+                missing.append(status["gid"])
+        return missing
+
+    def _meta_calls(self, gids):
+        """Chamadas para buscar nome/caminho/url dos GIDs informados."""
+        return [("aria2.tellStatus", [gid, DownloadRecord.META_KEYS]) for gid in gids]
+
+    def _store_meta(self, gids, results):
+        """Guarda em cache (LRU limitado) os metadados retornados por _meta_calls."""
+        for gid, result in zip(gids, results):
+            status = result.get("result")
+            if status:
+                self._meta[gid] = DownloadRecord.extract_meta(status)
+                self._meta.move_to_end(gid)
+        # Nunca menor que a janela atual, senão a própria janela se expulsa do cache
+        while len(self._meta) > max(self.META_CACHE_SIZE, self._window_size):
+            self._meta.popitem(last=False)
+
+    def _check_calls(self, gids):
+        """Chamadas para conferir o estado final de downloads que deixaram de estar ativos."""
+        keys = DownloadRecord.STATUS_KEYS + DownloadRecord.META_KEYS[1:]
+        return [("aria2.tellStatus", [gid, keys]) for gid in gids]
+
+    def _parse_checks(self, gids, results):
+        """Retorna os registros dos downloads que terminaram (concluídos, com erro ou removidos)."""
+        finished = []
+        for gid, result in zip(gids, results):
+            if "error" in result and not self.online:
+                continue  # falha de rede: confere de novo no próximo ciclo
+            with self._checks_lock:
+                self._pending_checks.discard(gid)
+            run = self._runs.pop(gid, None)
+            status = result.get("result")
+            if status and status.get("status") in ("complete", "error", "removed"):
+                record = DownloadRecord.from_status(status, instance=self.name)
+                if run is not None:
+                    record.active_seconds, record.active_bytes = run
+                self._reported.add(gid)
+                finished.append(record)
+        return finished
+
+    # --- operações em lote ---------------------------------------------------
+
+    BATCH_METHODS = {
+        "pause": "aria2.pause",
+        "force_pause": "aria2.forcePause",
+        "resume": "aria2.unpause",
+        "remove": "aria2.remove",
+    }
+
+    # Deslocamento do changePosition por destino; "top" e "down" percorrem os
+    # GIDs de trás para frente para manter a ordem relativa da seleção
+    POSITIONS = {
+        "top": (0, "POS_SET", True),
+        "bottom": (0, "POS_END", False),
+        "up": (-1, "POS_CUR", False),
+        "down": (1, "POS_CUR", True),
+    }
+
+    GLOBAL_METHODS = ("aria2.pauseAll", "aria2.forcePauseAll", "aria2.unpauseAll", "aria2.purgeDownloadResult")
+
+    def _batch_calls(self, action, items):
+        """Chamadas de uma ação para vários downloads; items são pares (gid, status)."""
+        method = self.BATCH_METHODS[action]
+        calls = []
+        for gid, status in items:
+            if action == "remove" and status in ("complete", "error", "removed"):
+                # Parados não podem ser removidos da fila, só do resultado
+                calls.append(("aria2.removeDownloadResult", [gid]))
+            else:
+                calls.append((method, [gid]))
+        return calls
+
+    def _position_calls(self, gids, where):
+        offset, how, reverse = self.POSITIONS[where]
+        ordered = list(reversed(gids)) if reverse else list(gids)
+        return [("aria2.changePosition", [gid, offset, how]) for gid in ordered]
+
+    async def executar_lote(self, action, items):
+        """
+        Aplica pause/force_pause/resume/remove a N downloads em um único system.multicall.
+
+        Returns:
+            Lista de resultados na ordem de items ({"result"} ou {"error"})
+        """
+        results = await self.async_rpc.multicall(self._batch_calls(action, items))
+        self.invalidate()
+        return results
+
+    async def mover_lote(self, gids, where):
+        """Reordena N downloads em espera (top, bottom, up, down) em um único multicall."""
+        calls = self._position_calls(gids, where)
+        results = await self.async_rpc.multicall(calls)
+        self.invalidate()
+        by_gid = {params[0]: result for (_method, params), result in zip(calls, results)}
+        return [by_gid[gid] for gid in gids]
+
+    async def forcar_lote(self, gids):
+        """Leva os downloads ao topo da fila e os retoma, tudo no mesmo multicall."""
+        calls = self._position_calls(gids, "top") + [("aria2.unpause", [gid]) for gid in gids]
+        results = await self.async_rpc.multicall(calls)
+        self.invalidate()
+        # Ativos recusam changePosition e unpause; só é erro se as duas falharem
+        moved = len(gids)
+        positions = {params[0]: result for (_method, params), result in zip(calls[:moved], results[:moved])}
+        return [positions[gid] if "error" not in positions[gid] else result
+                for gid, result in zip(gids, results[moved:])]
+
+    async def acao_global(self, method):
+        """pauseAll, forcePauseAll, unpauseAll ou purgeDownloadResult."""
+        if method not in self.GLOBAL_METHODS:
+            raise ValueError(f"Ação global desconhecida: {method}")
+        response = await self.async_rpc.request(method)
+        self.invalidate()
+        return response
+
     def pause_download(self, gid):
         """Pausa um download específico."""
         return self.rpc.request("aria2.pause", [gid])
@@ -0,0 +1,373 @@
+# src/ui/controllers/fleet_controller.py
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from src.ui.controllers.download_controller import DownloadController
+from src.ui.models.download_record import DownloadRecord, DownloadPage
+from src.ui.utils.file_utils import FileUtils
+from src.ui.utils.log_utils import Logger
+from src.ui.utils.metrics import Metrics
+from src.ui.utils.placement_policy import PlacementPolicy
+from src.ui.utils.rate_tracker import RateTracker, RingBuffer
+
+
+class FleetRates:
+    """Visão somada dos RateTracker das instâncias, com a mesma interface usada pelo painel."""
+
+    def __init__(self, members, history=RateTracker.HISTORY):
+        self.members = members
+        self.download_history = RingBuffer(history)
+
+    @property
+    def download_speed(self):
+        return sum(member.rates.download_speed for member in self.members)
+
+    @property
+    def upload_speed(self):
+        return sum(member.rates.upload_speed for member in self.members)
+
+    @property
+    def progress(self):
+        total = sum(member.rates.total_sum for member in self.members)
+        return sum(member.rates.completed_sum for member in self.members) / total * 100 if total > 0 else 0.0
+
+    @property
+    def global_eta(self):
+        speed = self.download_speed
+        remaining = sum(member.rates.total_sum - member.rates.completed_sum for member in self.members)
+        if speed < 1 or remaining <= 0:
+            return None
+        return remaining / speed
+
+    def sample(self):
+        """Uma amostra por ciclo da frota para o gráfico."""
+        self.download_history.append(self.download_speed)
+
+
+class FleetController:
+    """
+    Controla várias instâncias do Aria2 como uma só lista de downloads.
+
+    Cada instância tem seu DownloadController (com o ciclo em camadas e os
+    caches próprios); a frota consulta todas em paralelo e junta as páginas
+    em uma lista única, instância por instância, com os registros marcados
+    pelo nome de origem (DownloadRecord.key = gid@instância). A janela
+    visível é repartida entre as instâncias pelos totais do ciclo anterior;
+    se um total mudar a ponto de alterar a partição, a busca é refeita uma
+    vez. Ações por GID são roteadas à instância dona, e novos downloads vão
+    para a instância escolhida pela PlacementPolicy. Com uma única
+    instância (nome vazio) o comportamento é o do DownloadController.
+    """
+
+    def __init__(self, instances=None, policy=None):
+        """
+        Args:
+            instances: Lista de {"name", "url", "token"} (padrão: FileUtils.get_fleet_settings())
+            policy: Nome da política de distribuição ou PlacementPolicy
+        """
+        settings = FileUtils.get_fleet_settings()
+        instances = instances if instances is not None else settings["instances"]
+        if not instances:
+            raise ValueError("Nenhuma instância do Aria2 configurada.")
+        names = [entry.get("name", "") for entry in instances]
+        if len(set(names)) != len(names) or (len(names) > 1 and "" in names):
+            raise ValueError("Cada instância do Aria2 precisa de um nome único.")
+
+        self.members = [DownloadController(entry["url"], entry.get("token"), entry.get("name", ""))
+                        for entry in instances]
+        self._by_name = {member.name: member for member in self.members}
+        policy = policy or settings["policy"]
+        self.placement = policy if isinstance(policy, PlacementPolicy) else PlacementPolicy(policy)
+        self.rates = FleetRates(self.members)
+        self._executor = None
+
+    @property
+    def primary(self):
+        """Primeira instância (a local, acompanhada pelo supervisor e pelo serviço de status)."""
+        return self.members[0]
+
+    @property
+    def async_rpc(self):
+        # O loop assíncrono é compartilhado: qualquer instância serve para submit()
+        return self.primary.async_rpc
+
+    @property
+    def multi(self):
+        return len(self.members) > 1
+
+    @property
+    def online(self):
+        return any(member.online for member in self.members)
+
+    @property
+    def notifications_connected(self):
+        # Só dá para confiar nos eventos se todas as instâncias estiverem enviando
+        return all(member.notifications_connected for member in self.members)
+
+    @property
+    def global_stat(self):
+        """getGlobalStat somado das instâncias online (valores como strings, igual ao Aria2)."""
+        totals = {}
+        for member in self.members:
+            if not member.online:
+                continue
+            for key, value in member.global_stat.items():
+                try:
+                    totals[key] = totals.get(key, 0) + int(value)
+                except (TypeError, ValueError):
+                    pass
+        return {key: str(value) for key, value in totals.items()}
+
+    @property
+    def refresh_stats(self):
+        return {key: sum(member.refresh_stats[key] for member in self.members) for key in ("fast", "sync")}
+
+    def instances(self):
+        """Resumo por instância para o painel: nome, url, online, contadores e velocidades."""
+        summary = []
+        for member in self.members:
+            stat = member.global_stat
+            summary.append({
+                "name": member.name or "local",
+                "url": member.rpc.url,
+                "online": member.online,
+                "active": int(stat.get("numActive", 0)),
+                "waiting": int(stat.get("numWaiting", 0)),
+                "stopped": int(stat.get("numStopped", 0)),
+                "download_speed": member.rates.download_speed,
+                "upload_speed": member.rates.upload_speed,
+            })
+        return summary
+
+    @staticmethod
+    def key(gid, instance):
+        """Chave de registro (ver DownloadRecord.key)."""
+        return f"{gid}@{instance}" if instance else gid
+
+    def member(self, key):
+        """(DownloadController, gid) dono de uma chave de registro."""
+        gid, instance = DownloadRecord.split_key(key)
+        member = self._by_name.get(instance)
+        if member is None:
+            raise KeyError(f"Instância desconhecida: {instance}")
+        return member, gid
+
+    def rates_for(self, record):
+        member = self._by_name.get(record.instance)
+        return member.rates if member is not None else self.primary.rates
+
+    # --- notificações ----------------------------------------------------------
+
+    def start_notifications(self):
+        for member in self.members:
+            member.start_notifications()
+
+    def stop_notifications(self):
+        for member in self.members:
+            member.stop_notifications()
+
+    def add_listener(self, callback):
+        """callback(método, chave) para os eventos de todas as instâncias."""
+        for member in self.members:
+            name = member.name
+            member.add_listener(lambda method, gid, name=name: callback(method, self.key(gid, name)))
+
+    def invalidate(self):
+        for member in self.members:
+            member.invalidate()
+
+    # --- listagem ----------------------------------------------------------------
+
+    def _partition(self, offset, limit, totals):
+        """
+        Janela (offset, limit) de cada instância na lista concatenada.
+
+        totals[i] None (ainda desconhecido) faz a instância absorver o resto
+        da janela; a última sempre recebe o restante, então com uma única
+        instância a janela é a pedida.
+        """
+        if limit is None:
+            return [(0, None)] * len(self.members)  # tudo de todas; o offset é aplicado na junção
+        windows = []
+        cursor = 0
+        remaining = limit
+        for index, total in enumerate(totals):
+            start = max(offset - cursor, 0)
+            last = index == len(totals) - 1
+            if last or total is None:
+                size = remaining
+            else:
+                size = min(max(total - start, 0), remaining)
+            windows.append((start, size))
+            remaining -= size
+            if total is None:
+                # Sem total conhecido, as seguintes só atualizam a camada rápida neste ciclo
+                windows.extend((0, 0) for _ in totals[index + 1:])
+                break
+            cursor += total
+        return windows
+
+    def _totals(self):
+        # _counts fica (0, 0, 0) com a instância fora do ar e None antes do primeiro ciclo
+        return [None if member._counts is None else sum(member._counts) for member in self.members]
+
+    def _merge(self, offset, limit, pages):
+        records = []
+        finished = []
+        total = 0
+        for member, page in zip(self.members, pages):
+            if isinstance(page, BaseException):
+                Logger.log_warning(f"Falha ao listar a instância {member.name or 'local'}: {page}")
+                continue
+            records.extend(page.records)
+            finished.extend(page.finished)
+            total += page.total
+        if limit is None:
+            records = records[offset:]
+        self._sample()
+        for member in self.members:
+            self.placement.observed(member.name)
+        return DownloadPage(offset, total, records, finished)
+
+    def listar_downloads(self, offset=0, limit=None):
+        """Lista uma janela da frota (instâncias consultadas em paralelo, em threads)."""
+        if not self.multi:
+            return self._single(self.primary.listar_downloads(offset, limit))
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(self.members), thread_name_prefix="aria2-fleet")
+        for _attempt in range(2):
+            windows = self._partition(offset, limit, self._totals())
+            futures = [self._executor.submit(member.listar_downloads, *window)
+                       for member, window in zip(self.members, windows)]
+            pages = []
+            for future in futures:
+                try:
+                    pages.append(future.result())
+                except Exception as e:
+                    pages.append(e)
+            if self._partition(offset, limit, self._totals()) == windows:
+                break
+        return self._merge(offset, limit, pages)
+
+    async def listar_downloads_async(self, offset=0, limit=None):
+        """Versão assíncrona: as instâncias são consultadas em paralelo no loop compartilhado."""
+        if not self.multi:
+            return self._single(await self.primary.listar_downloads_async(offset, limit))
+        for _attempt in range(2):
+            windows = self._partition(offset, limit, self._totals())
+            pages = await asyncio.gather(*(member.listar_downloads_async(*window)
+                                           for member, window in zip(self.members, windows)),
+                                         return_exceptions=True)
+            for page in pages:
+                if isinstance(page, asyncio.CancelledError):
+                    raise page
+            if self._partition(offset, limit, self._totals()) == windows:
+                break
+        return self._merge(offset, limit, pages)
+
+    def _single(self, page):
+        self._sample()
+        return page
+
+    def _sample(self):
+        # Métricas uma vez por ciclo, com os totais da frota (não os da última instância consultada)
+        self.rates.sample()
+        Metrics.sample_global(self.global_stat)
+
+    # --- adição ------------------------------------------------------------------
+
+    def choose(self, url=""):
+        """Instância (DownloadController) que deve receber um novo download."""
+        candidates = [(member.name, member.global_stat) for member in self.members if member.online]
+        name = self.placement.choose(url, candidates)
+        if name is None:
+            # Nenhuma respondeu ainda (ex.: início): a principal, que o supervisor sobe
+            return self.primary
+        return self._by_name[name]
+
+    def adicionar_download(self, url):
+        if not url:
+            raise ValueError("O link está vazio.")
+        member = self.choose(url)
+        return self._tag(member, member.adicionar_download(url))
+
+    async def adicionar_download_async(self, url, options=None):
+        """Adiciona na instância escolhida pela política; o resultado traz "instance"."""
+        member = self.choose(url)
+        return self._tag(member, await member.adicionar_download_async(url, options))
+
+    @staticmethod
+    def _tag(member, response):
+        response = dict(response or {"error": "Sem resposta do Aria2"})
+        response["instance"] = member.name
+        if member.name:
+            Logger.log_info(f"Download enviado para a instância {member.name}")
+        return response
+
+    # --- operações em lote ---------------------------------------------------------
+
+    def _group(self, keys):
+        """Agrupa chaves por instância: {membro: [(posição, gid)]}."""
+        groups = {}
+        for index, key in enumerate(keys):
+            member, gid = self.member(key)
+            groups.setdefault(member, []).append((index, gid))
+        return groups
+
+    async def _routed(self, keys, run):
+        """Executa run(membro, gids) por instância, em paralelo, e devolve os resultados na ordem de keys."""
+        results = [None] * len(keys)
+        groups = self._group(keys)
+        members = list(groups)
+        outcomes = await asyncio.gather(*(run(member, [gid for _i, gid in groups[member]]) for member in members),
+                                        return_exceptions=True)
+        for member, outcome in zip(members, outcomes):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            for position, (index, _gid) in enumerate(groups[member]):
+                results[index] = {"error": str(outcome)} if isinstance(outcome, BaseException) else outcome[position]
+        return results
+
+    async def executar_lote(self, action, items):
+        """items são pares (chave, status); ver DownloadController.executar_lote."""
+        statuses = dict(items)
+        return await self._routed([key for key, _status in items], lambda member, gids: member.executar_lote(
+            action, [(gid, statuses[self.key(gid, member.name)]) for gid in gids]))
+
+    async def mover_lote(self, keys, where):
+        # A posição é relativa à fila de cada instância
+        return await self._routed(keys, lambda member, gids: member.mover_lote(gids, where))
+
+    async def forcar_lote(self, keys):
+        return await self._routed(keys, lambda member, gids: member.forcar_lote(gids))
+
+    async def acao_global(self, method):
+        """Ação global em todas as instâncias online; erro se alguma falhar."""
+        targets = [member for member in self.members if member.online] or [self.primary]
+        responses = await asyncio.gather(*(member.acao_global(method) for member in targets), return_exceptions=True)
+        errors = []
+        for member, response in zip(targets, responses):
+            if isinstance(response, asyncio.CancelledError):
+                raise response
+            error = str(response) if isinstance(response, BaseException) else (response or {}).get("error")
+            if error:
+                errors.append(f"{member.name}: {error}" if member.name else str(error))
+        return {"error": "; ".join(errors)} if errors else {"result": "OK"}
+
+    def pause_download(self, key):
+        member, gid = self.member(key)
+        return member.pause_download(gid)
+
+    def resume_download(self, key):
+        member, gid = self.member(key)
+        return member.resume_download(gid)
+
+    def stop_download(self, key):
+        member, gid = self.member(key)
+        return member.stop_download(gid)
+
+    async def close(self):
+        await asyncio.gather(*(member.close() for member in self.members), return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -1,57 +1,185 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from src.ui.utils.file_utils import FileUtils
+from src.ui.utils.history_store import HistoryStore
 
 class HistoryWindow(tk.Toplevel):
+
+    PAGE_SIZE = 100
+
     def __init__(self, master=None):
         super().__init__(master)
         self.title("Histórico de Downloads")
-        self.geometry("700x400")
+        self.geometry("800x440")
         self.resizable(False, False)
 
+        # Estado da consulta: só a página atual é carregada
+        self.page = 0
+        self.total = 0
+        self.sort_column = "finished_at"
+        self.sort_descending = True
+        self._search_job = None
+        self._entries = {}  # item da árvore -> entrada da página atual
+
         self.create_widgets()
         self.load_history()
 
     def create_widgets(self):
-        columns = ("filename", "status", "finished_at", "path", "url")
+        frame_search = ttk.Frame(self)
+        frame_search.pack(fill="x", padx=10, pady=(10, 0))
+
+        tk.Label(frame_search, text="Buscar:").pack(side="left")
+        self.search_var = tk.StringVar()
+        self.entry_search = ttk.Entry(frame_search, textvariable=self.search_var, width=30)
+        self.entry_search.pack(side="left", padx=5)
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
+
+        self.combo_field = ttk.Combobox(frame_search, state="readonly", width=10,
+                                        values=["Filename", "URL", "Host"])
+        self.combo_field.set("Filename")
+        self.combo_field.pack(side="left", padx=5)
+        self.combo_field.bind("<<ComboboxSelected>>", lambda event: self.search())
+
+        self.combo_mode = ttk.Combobox(frame_search, state="readonly", width=12,
+                                       values=["Starts with", "Contains"])
+        self.combo_mode.set("Starts with")
+        self.combo_mode.pack(side="left", padx=5)
+        self.combo_mode.bind("<<ComboboxSelected>>", lambda event: self.search())
+
+        columns = ("filename", "status", "integrity", "finished_at", "path", "url")
 
         self.tree = ttk.Treeview(self, columns=columns, show="headings")
 
         column_titles = {
             "filename": "Filename",
             "status": "Status",
+            "integrity": "Integrity",
             "finished_at": "Completed At",
             "path": "Path",
             "url": "URL"
         }
 
         for col in columns:
-            self.tree.heading(col, text=column_titles[col])
-            self.tree.column(col, anchor="w", width=150 if col != "url" else 300)
+            # Ordenar pela URL usa o índice de host
+            sort_key = "url_host" if col == "url" else col
+            if sort_key in HistoryStore.SORTABLE:
+                self.tree.heading(col, text=column_titles[col], command=lambda key=sort_key: self.sort_by(key))
+            else:
+                self.tree.heading(col, text=column_titles[col])
+            self.tree.column(col, anchor="w", width={"url": 300, "integrity": 100}.get(col, 150))
 
         self.tree.pack(fill="both", expand=True, padx=10, pady=10)
 
-        self.btn_clear = ttk.Button(self, text="Clear History", command=self.clear_history)
-        self.btn_clear.pack(pady=5)
+        frame_pages = ttk.Frame(self)
+        frame_pages.pack(fill="x", padx=10)
+
+        self.btn_prev = ttk.Button(frame_pages, text="◀ Previous", command=lambda: self.go_to_page(self.page - 1))
+        self.btn_prev.pack(side="left")
+        self.lbl_page = tk.Label(frame_pages, text="")
+        self.lbl_page.pack(side="left", expand=True)
+        self.btn_next = ttk.Button(frame_pages, text="Next ▶", command=lambda: self.go_to_page(self.page + 1))
+        self.btn_next.pack(side="right")
+
+        frame_buttons = ttk.Frame(self)
+        frame_buttons.pack(pady=5)
+        self.btn_requeue = ttk.Button(frame_buttons, text="Download Again", command=self.requeue_selected)
+        self.btn_requeue.pack(side="left", padx=5)
+        self.btn_clear = ttk.Button(frame_buttons, text="Clear History", command=self.clear_history)
+        self.btn_clear.pack(side="left", padx=5)
 
 
 
     def load_history(self):
-        """Carrega e exibe o histórico salvo no arquivo JSON"""
+        """Carrega e exibe apenas a página atual do histórico (consulta indexada)"""
+        field = {"Filename": "filename", "URL": "url", "Host": "url_host"}[self.combo_field.get()]
+        mode = "prefix" if self.combo_mode.get() == "Starts with" else "contains"
+
+        result = FileUtils.query_download_history(
+            search=self.search_var.get(),
+            field=field,
+            mode=mode,
+            sort=self.sort_column,
+            descending=self.sort_descending,
+            offset=self.page * self.PAGE_SIZE,
+            limit=self.PAGE_SIZE
+        )
+        self.total = result['total']
+
         self.tree.delete(*self.tree.get_children())
-        history = FileUtils.load_download_history()
-        for entry in history:
-            self.tree.insert("", "end", values=(
+        self._entries = {}
+        for entry in result['items']:
+            item = self.tree.insert("", "end", values=(
             entry.get("filename", ""),
             entry.get("status", ""),
+            self.format_integrity(entry),
             entry.get("finished_at", ""),
             entry.get("path", ""),
             entry.get("url", "")
         ))
+            self._entries[item] = entry
+
+        pages = max(1, -(-self.total // self.PAGE_SIZE))
+        self.lbl_page.config(text=f"Page {self.page + 1} of {pages} ({self.total} entries)")
+        self.btn_prev["state"] = "normal" if self.page > 0 else "disabled"
+        self.btn_next["state"] = "normal" if self.page + 1 < pages else "disabled"
+
+
+    def go_to_page(self, page):
+        pages = max(1, -(-self.total // self.PAGE_SIZE))
+        self.page = max(0, min(page, pages - 1))
+        self.load_history()
+
+
+    def schedule_search(self):
+        """Aguarda uma pausa na digitação antes de consultar"""
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(250, self.search)
+
+
+    def search(self):
+        self._search_job = None
+        self.page = 0
+        self.load_history()
+
+
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = column == "finished_at"
+        self.page = 0
+        self.load_history()
+
+
+    @staticmethod
+    def format_integrity(entry):
+        """Resultado da verificação pós-download (vazio se não verificado)"""
+        integrity = entry.get("integrity")
+        if not integrity:
+            return ""
+        files = entry.get("files") or []
+        checksum = entry.get("expected") or entry.get("checksum") or \
+            next((file["checksum"] for file in files if file.get("checksum")), "")
+        details = [part for part in (checksum.partition("=")[0], f"{len(files)} files" if files else "") if part]
+        return f"{integrity} ({', '.join(details)})" if details else integrity
+
+
+    def requeue_selected(self):
+        """Adiciona de novo ao Aria2 os downloads selecionados (ex.: os que falharam na verificação)"""
+        entries = [self._entries[item] for item in self.tree.selection() if item in self._entries]
+        entries = [entry for entry in entries if entry.get("url")]
+        if not entries:
+            messagebox.showinfo("Download Again", "Select entries with a URL to download again.", parent=self)
+            return
+        for entry in entries:
+            self.master.requeue_download(entry)
 
 
     def clear_history(self):
         """Confirma e limpa o histórico de downloads"""
         if messagebox.askyesno("Confirmação", "Deseja realmente limpar todo o histórico?"):
-            FileUtils.save_download_history([])  # Salva lista vazia
+            FileUtils.clear_download_history()
+            self.page = 0
             self.load_history()
@@ -1,11 +1,28 @@
+import copy
+import queue
+import sqlite3
+import time
 import tkinter as tk
-import threading  
 
 from tkinter import ttk
 from tkinter.scrolledtext import ScrolledText
 from src.ui.utils.aria2_status_checker import Aria2StatusChecker
-from src.ui.controllers.download_controller import DownloadController
+from src.ui.utils.aria2_status_service import Aria2StatusService
+from src.ui.utils.aria2_supervisor import Aria2Supervisor
+from src.ui.controllers.fleet_controller import FleetController
 from src.ui.utils.log_utils import Logger
+from src.ui.utils.virtual_list import VirtualTreeview
+from src.ui.utils.completion_tracker import CompletionTracker
+from src.ui.utils.refresh_scheduler import RefreshScheduler
+from src.ui.utils.rate_tracker import RateTracker
+from src.ui.utils.metrics import Metrics, MetricsServer
+from src.ui.utils.timeseries_store import TimeSeriesStore
+from src.ui.utils.file_utils import FileUtils
+from src.ui.utils.autotuner import AutoTuner
+from src.ui.utils.queue_store import QueueStore
+from src.ui.utils.bandwidth_scheduler import BandwidthScheduler
+from src.ui.utils.queue_manager import QueueManager
+from src.ui.utils.integrity_checker import IntegrityChecker
 
 from src.ui.history_window import HistoryWindow
 
@@ -13,18 +30,65 @@ from src.ui.history_window import HistoryWindow
 
 class MainWindow(tk.Tk):
 
+    SPARKLINE_WIDTH = 160
+    SPARKLINE_HEIGHT = 24
+    BANDWIDTH_INTERVAL = 30000  # ms; troca de faixa mesmo com as atualizações espaçadas
+    LOG_FLUSH_INTERVAL = 200  # ms; linhas de log vindas de outras threads chegam à tela neste ritmo
+    QUEUE_PRIORITIES = (("Urgente", 20), ("Alta", 10), ("Normal", None), ("Baixa", -10))
+
     def __init__(self):
         super().__init__()
         self.title("WebUI-Aria2 - Gerenciador de Downloads")
         self.geometry("800x640")
 
-        self.controller = DownloadController()  #Adicione aqui
+        # Uma ou várias instâncias do Aria2 (aria2_instances na configuração)
+        self.controller = FleetController()
+        # Chamadas RPC rodam no loop assíncrono compartilhado; resultados voltam via after()
+        self.async_rpc = self.controller.async_rpc
+        self.async_rpc.tk_root = self
+        self.completion_tracker = CompletionTracker(self.on_download_completed)
+        self._records = {}  # chave (gid ou gid@instância) -> DownloadRecord das linhas carregadas
+        self.autotuner = self.open_autotuner()
+        self.queue_store = self.open_queue_store()
+        self.bandwidth = self.open_bandwidth_scheduler()
+        self.queue_manager = self.open_queue_manager()
+        integrity = FileUtils.get_integrity_settings()
+        self.verify_integrity = integrity["enabled"]  # lido também na thread do CompletionTracker
+        self.integrity = IntegrityChecker(self.controller, self.queue_store, integrity["workers"],
+                                          integrity["chunk_size"])
+
+        # Eventos do Aria2 chegam pela thread do WebSocket e são repassados ao loop do Tk
+        self.controller.add_listener(lambda method, gid: self.after(0, self.on_aria2_event, method, gid))
+        self.controller.start_notifications()
+
+        # Status do Aria2 sondado em segundo plano; mudanças chegam por aqui
+        self.status_service = Aria2StatusService.instance()
+        self.status_service.add_listener(lambda status: self.after(0, self.update_aria2_status, status))
+        # aria2c iniciado pelo aplicativo, quando necessário
+        self.supervisor = Aria2Supervisor.instance()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Ritmo das atualizações conforme atividade e visibilidade da janela
+        self.scheduler = RefreshScheduler(
+            self, self.fetch_downloads,
+            is_active=lambda: int(self.controller.global_stat.get("numActive", 0)) > 0,
+            push_connected=lambda: self.controller.notifications_connected
+        )
 
         self.create_widgets()
         self.update_aria2_status()
-        self.update_periodically()
-
+        self.bind("<Unmap>", lambda event: event.widget is self and self.scheduler.set_visible(False))
+        self.bind("<Map>", lambda event: event.widget is self and self.scheduler.set_visible(True))
+        self.scheduler.start()
+        self.start_metrics()
+        if self.bandwidth is not None:
+            self.after(self.BANDWIDTH_INTERVAL, self.bandwidth_tick)
+
+        # O log é escrito de várias threads (WebSocket, supervisor, conclusões, loop
+        # assíncrono...); as linhas passam por uma fila e só a thread do Tk toca no widget
+        self._log_queue = queue.SimpleQueue()
         Logger.setup_logger(self.append_log_to_ui)
+        self.flush_logs()
         Logger.log_info("Aplicativo iniciado.")
         self.tree.bind("<Button-1>", self.on_treeview_click)
 
@@ -36,119 +100,366 @@ class MainWindow(tk.Tk):
         if column == "#5" and item_id:  # Coluna Ações
             values = self.tree.item(item_id, "values")
             action_text = values[4]
-            gid = item_id  # usamos o GID como iid
+            gid = item_id  # usamos a chave do registro (GID) como iid
 
             if "⏵" in action_text:
-                self.controller.resume_download(gid)
-                Logger.log_info(f"Download retomado: {gid}")
+                self.run_batch("resume", [gid])
             elif "⏸" in action_text:
-                self.controller.pause_download(gid)
-                Logger.log_info(f"Download pausado: {gid}")
+                self.run_batch("pause", [gid])
             elif "⏹" in action_text:
-                confirm = tk.messagebox.askyesno(
-                    "Confirmar remoção",
-                    "Tem certeza que deseja parar e remover este download da fila?"
-                )
-                if confirm:
-                    self.controller.stop_download(gid)
-                    Logger.log_info(f"Download removido: {gid}")
+                self.remove_selected([gid])
 
 
-            # Atualiza a tabela após a ação
-            self.load_downloads()
+    # --- operações em lote (seleção múltipla) --------------------------------
 
+    # Status exibido de imediato, antes da confirmação do Aria2
+    OPTIMISTIC_STATUS = {"pause": "paused", "force_pause": "paused", "resume": "waiting", "remove": "removed"}
 
-    def ensure_aria2_ready(self):
-        from src.ui.utils.aria2_status import Aria2StatusChecker
-        import subprocess
-        import time
+    def selected_gids(self):
+        return list(self.tree.selection())
 
-        status = Aria2StatusChecker.get_status()
 
-        if "não instalado" in status.lower():
-            tk.messagebox.showerror("Erro", "O Aria2 não está instalado.")
-            return False
+    def run_batch(self, action, gids=None):
+        """Aplica a ação a todos os GIDs (padrão: seleção) em um único multicall."""
+        gids = gids if gids is not None else self.selected_gids()
+        if not gids:
+            return
+        items = [(gid, self._records[gid].status if gid in self._records else "") for gid in gids]
+        previous = self.apply_optimistic(gids, self.OPTIMISTIC_STATUS[action])
+        self.async_rpc.submit(self.controller.executar_lote(action, items),
+                              lambda results: self.on_batch_done(action, gids, previous, results))
 
-        if "não está rodando" in status.lower():
-            Logger.log_info("Aria2 não está rodando. Tentando iniciar...")
-            try:
-                subprocess.Popen(["aria2c", "--enable-rpc"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                time.sleep(5)  # Aguarda para dar tempo de iniciar
-            except Exception as e:
-                tk.messagebox.showerror("Erro", f"Falha ao iniciar o Aria2: {e}")
-                Logger.log_error(f"Erro ao iniciar o Aria2: {e}")
-                return False
 
-            # Verifica novamente se subiu
-            time.sleep(1)
-            status = Aria2StatusChecker.get_status()
-            if "rodando" not in status.lower():
-                tk.messagebox.showerror("Erro", "O Aria2 não pôde ser iniciado.")
-                return False
+    def remove_selected(self, gids=None):
+        gids = gids if gids is not None else self.selected_gids()
+        if not gids:
+            return
+        texto = "este download" if len(gids) == 1 else f"estes {len(gids)} downloads"
+        if tk.messagebox.askyesno("Confirmar remoção", f"Tem certeza que deseja parar e remover {texto} da fila?"):
+            self.run_batch("remove", gids)
+
+
+    def move_selected(self, where):
+        gids = self.selected_gids()
+        if gids:
+            # A ordem muda: a janela visível é reconciliada pela próxima busca
+            self.async_rpc.submit(self.controller.mover_lote(gids, where),
+                                  lambda results: self.on_batch_done("move", gids, {}, results))
+
+
+    def force_selected(self):
+        gids = self.selected_gids()
+        if gids:
+            previous = self.apply_optimistic(gids, "waiting")
+            self.async_rpc.submit(self.controller.forcar_lote(gids),
+                                  lambda results: self.on_batch_done("force", gids, previous, results))
+
+
+    def run_global(self, method):
+        """Ações sobre a fila inteira (pauseAll, unpauseAll, purgeDownloadResult)."""
+        status = {"aria2.pauseAll": "paused", "aria2.forcePauseAll": "paused", "aria2.unpauseAll": "waiting"}.get(method)
+        if status:
+            targets = [gid for gid, record in self._records.items()
+                       if record.status in (("active", "waiting") if status == "paused" else ("paused",))]
+            self.apply_optimistic(targets, status)
+        self.async_rpc.submit(self.controller.acao_global(method), lambda response: self.on_global_done(method, response))
+
+
+    def apply_optimistic(self, gids, status):
+        """Atualiza as linhas no lugar com o status esperado; retorna os registros anteriores."""
+        previous = {}
+        for gid in gids:
+            record = self._records.get(gid)
+            if record is None:
+                continue
+            previous[gid] = record
+            patched = copy.copy(record)
+            patched.status = status
+            if status != "active":
+                patched.download_speed = 0
+            self._records[gid] = patched
+            self.download_list.patch_row(gid, self.format_row(patched))
+        return previous
+
+
+    def on_batch_done(self, action, gids, previous, results):
+        results = results or [{"error": "Sem resposta do Aria2"} for _ in gids]
+        failed = 0
+        for gid, result in zip(gids, results):
+            if "error" not in result:
+                continue
+            failed += 1
+            error = result["error"]
+            Logger.log_warning(f"Falha em {action} ({gid}): {error.get('message', error) if isinstance(error, dict) else error}")
+            # Desfaz a atualização otimista da linha
+            if gid in previous:
+                self._records[gid] = previous[gid]
+                self.download_list.patch_row(gid, self.format_row(previous[gid]))
+        Logger.log_info(f"Ação {action}: {len(gids) - failed} de {len(gids)} downloads.")
+        if action in ("move", "force"):
+            self.load_downloads()
 
-        return True
 
+    def on_global_done(self, method, response):
+        response = response or {"error": "Sem resposta do Aria2"}
+        if "error" in response:
+            Logger.log_error(f"Falha em {method}: {response['error']}")
+        else:
+            Logger.log_info(f"Ação global executada: {method.split('.')[-1]}")
+        # Purge remove linhas, e uma falha precisa desfazer o estado otimista
+        if method == "aria2.purgeDownloadResult" or "error" in response:
+            self.load_downloads()
 
-    def load_downloads(self):
-        def trabalho():
-            downloads = self.controller.listar_downloads()
-            self.after(0, lambda: self.update_treeview(downloads))
-        threading.Thread(target=trabalho, daemon=True).start()
 
+    def show_context_menu(self, event):
+        row = self.tree.identify_row(event.y)
+        if row and row not in self.tree.selection():
+            self.tree.selection_set(row)
+        self.context_menu.tk_popup(event.x_root, event.y_root)
 
-    def update_periodically(self, intervalo_ms=5000):
-        self.load_downloads()  # Agora roda em thread segura
-        self.update_aria2_status()
-        self.after(intervalo_ms, self.update_periodically, intervalo_ms)
 
+    def ensure_aria2_ready(self, callback):
+        """
+        Garante um Aria2 respondendo (iniciando o aria2c gerenciado se preciso)
+        sem bloquear a interface; callback(resultado) roda no loop do Tk.
+        """
+        status = self.status_service.get_status()
+        if status == Aria2StatusService.NOT_INSTALLED:
+            tk.messagebox.showerror("Erro", "O Aria2 não está instalado.")
+            return
+        if status != Aria2StatusService.RUNNING:
+            Logger.log_info("Aria2 não está rodando. Tentando iniciar...")
 
-    def update_treeview(self, downloads):
-        self.tree.delete(*self.tree.get_children())
+        self.async_rpc.submit_blocking(self.supervisor.wait_ready, callback=callback)
 
-        for item in downloads:
-            # Verifica se o download está completo
-            if item.get("status") == "complete":
-                self.on_download_completed(item)
 
-            # Nome do arquivo
-            nome = item.get("bittorrent", {}).get("info", {}).get("name") or \
-                item.get("files", [{}])[0].get("path", "Desconhecido").split("/")[-1]
+    def load_downloads(self, reason="manual", supersede=False):
+        """Pede uma atualização; pedidos próximos viram uma única busca."""
+        self.scheduler.request(reason, supersede=supersede)
 
-            # Cálculo do progresso
-            progresso = f"{float(item.get('completedLength', 0)) / max(float(item.get('totalLength', 1)), 1) * 100:.1f}%"
-            velocidade = f"{int(item.get('downloadSpeed', 0)) / 1024:.1f} KB/s"
-            tempo = "Calculando..."
 
-            # ✅ Simula botões na coluna Ações
-            status = item.get("status", "")
-            action_text = "[⏸ ⏹]" if status == "active" else "[⏵ ⏹]"
+    def fetch_downloads(self, done):
+        """Busca a janela visível (chamado pelo RefreshScheduler)."""
+        offset, limit = self.download_list.requested_range()
 
-            # Insere na Treeview com GID como identificador
-            self.tree.insert("", "end", iid=item["gid"], values=(nome, progresso, velocidade, tempo, action_text))
-    
+        def loaded(page):
+            try:
+                self.on_downloads_loaded(page)
+            finally:
+                done()  # mesmo com erro no ciclo, o agendador precisa seguir com as atualizações
+        return self.async_rpc.submit(self.controller.listar_downloads_async(offset, limit), loaded)
+
+
+    def on_downloads_loaded(self, page):
+        if page is not None:
+            self.update_treeview(page)
+            self.apply_bandwidth()
+            self.sync_queue()
+            self.update_monitor()
+        # O próprio lote do ciclo já indica se o RPC respondeu, dispensando a sonda
+        if self.controller.online:
+            self.status_service.report_rpc_ok()
+        else:
+            self.status_service.refresh()
+        self.update_aria2_status()
 
 
-    def add_download(self):
-        if not self.ensure_aria2_ready():
-            return  # Se Aria2 não estiver pronto, não continua
+    def on_aria2_event(self, method, gid):
+        Logger.log_info(f"Evento do Aria2: {method.split('.')[-1]} ({gid})")
+        # Agrupa rajadas de eventos em uma única atualização
+        self.scheduler.request("event", 150)
+
+
+    def update_monitor(self):
+        """Atualiza o painel de monitoramento com as taxas suavizadas do ciclo."""
+        rates = self.controller.rates
+        self.lbl_total_speed.config(text=f"Velocidade Total: {RateTracker.format_speed(rates.download_speed)}")
+        self.lbl_total_upload.config(text=f"Upload Total: {RateTracker.format_speed(rates.upload_speed)}")
+        eta = rates.global_eta
+        self.lbl_total_eta.config(text=f"Tempo Restante: {RateTracker.format_eta(eta) if eta is not None else '-'}")
+        self.progress_total["value"] = rates.progress
+        if self.bandwidth is not None:
+            status = self.bandwidth.status()
+            active = ", ".join(f"{count} {cls}" for cls, count in status["classes"].items() if count)
+            text = (f"Banda: {status['window']} · ↓ {BandwidthScheduler.format_limit(status['download'])}"
+                    f" ↑ {BandwidthScheduler.format_limit(status['upload'])}")
+            self.lbl_bandwidth.config(text=f"{text} · {active}" if active else text)
+        if self.controller.multi:
+            self.lbl_fleet.config(text="  ·  ".join(
+                f"{info['name']}: {RateTracker.format_speed(info['download_speed'])}, "
+                f"{info['active']} ativos, {info['waiting']} em espera" if info["online"] else f"{info['name']}: offline"
+                for info in self.controller.instances()
+            ))
+
+        history = list(rates.download_history)
+        if len(history) < 2:
+            return
+        peak = max(max(history), 1.0)
+        step = self.SPARKLINE_WIDTH / (rates.download_history.size - 1)
+        x0 = self.SPARKLINE_WIDTH - step * (len(history) - 1)
+        points = []
+        for index, value in enumerate(history):
+            points.extend((x0 + index * step, self.SPARKLINE_HEIGHT - 1 - value / peak * (self.SPARKLINE_HEIGHT - 2)))
+        self.sparkline.coords(self.sparkline_line, *points)
+
+
+    def update_treeview(self, page):
+        started = time.perf_counter()
+        # Downloads que terminaram desde o último ciclo
+        checksums = self.queue_store.checksums() if self.queue_store is not None else {}
+        for item in page.finished:
+            if item.status == "complete":
+                if item.key in checksums:
+                    self.integrity.expect(item.key, checksums[item.key])
+                self.completion_tracker.submit(item)  # processado uma única vez, fora do Tk
+            if self.autotuner is not None:
+                self.autotuner.record_finished(item)
+        if page.finished and self.queue_store is not None:
+            self.queue_store.forget([item.key for item in page.finished])
+
+        self._records = {item.key: item for item in page.records}
+        rows = [(item.key, self.format_row(item)) for item in page.records]
+
+        # Só toca no Tk para linhas novas, removidas ou com células alteradas
+        self.download_list.set_rows(page.offset, page.total, rows)
+        Metrics.observe_tick(time.perf_counter() - started)
+
+
+    def format_row(self, item):
+        """Valores exibidos na Treeview para um download."""
+        # Nome do arquivo
+        nome = item.name or "Desconhecido"
+        if item.instance:
+            nome = f"[{item.instance}] {nome}"
+
+        # Cálculo do progresso
+        progresso = f"{item.progress:.1f}%"
+        rates = self.controller.rates_for(item)
+        if item.status == "active":
+            # Velocidade suavizada (EWMA) e ETA pelos bytes restantes
+            velocidade = RateTracker.format_speed(rates.speed(item.gid))
+            tempo = RateTracker.format_eta(rates.eta(item.gid))
+        else:
+            velocidade = RateTracker.format_speed(0)
+            tempo = "Concluído" if item.status == "complete" else "-"
+
+        # ✅ Simula botões na coluna Ações
+        if item.status in ("active", "waiting"):
+            action_text = "[⏸ ⏹]"
+        elif item.status == "paused":
+            action_text = "[⏵ ⏹]"
+        else:
+            action_text = "[⏹]"
+
+        return (nome, progresso, velocidade, tempo, action_text)
 
+
+
+    def add_download(self):
         url = self.entry_link.get().strip()
         if not url:
             tk.messagebox.showerror("Erro", "O link está vazio.")
             return
+        checksum = self.entry_checksum.get().strip()
+        if checksum:
+            try:
+                checksum = IntegrityChecker.format_checksum(*IntegrityChecker.parse_checksum(checksum))
+            except ValueError as e:
+                tk.messagebox.showerror("Erro", f"Checksum inválido:\n{e}")
+                return
+
+        def on_ready(result):
+            if not result['success']:
+                tk.messagebox.showerror("Erro", f"O Aria2 não pôde ser iniciado:\n{result['error']}")
+                return
+
+            # Conexões/segmentos pelo que já funcionou melhor com o host
+            host, arm = self.autotuner.choose(url) if self.autotuner is not None else (None, None)
+            options = AutoTuner.options(arm) if arm else None
+            # A instância que recebe o download é escolhida pela política da frota
+            self.async_rpc.submit(self.controller.adicionar_download_async(url, options),
+                                  lambda response: self.on_download_added(url, response, host, arm, checksum))
+
+        self.ensure_aria2_ready(on_ready)
+
+
+    def on_download_added(self, url, response, host=None, arm=None, checksum=None):
+        response = response or {"error": "Sem resposta do Aria2"}
+        if "error" in response:
+            Logger.log_error(f"Erro ao adicionar download: {response['error']}")
+            tk.messagebox.showerror("Erro", f"Não foi possível adicionar o download:\n{response['error']}")
+            return
+        instance = f" na instância {response['instance']}" if response.get("instance") else ""
+        Logger.log_info(f"Download adicionado com GID: {response.get('result')}{instance}")
+        if arm:
+            self.autotuner.assign(FleetController.key(response.get("result"), response.get("instance")), host, arm)
+        if checksum:
+            self.expect_checksum([FleetController.key(response.get("result"), response.get("instance"))], checksum)
+        self.controller.invalidate()
+        self.entry_link.delete(0, "end")
+        self.entry_checksum.delete(0, "end")
+        self.load_downloads()
+
+
+
+    def import_downloads(self):
+        """Importa uma lista de links (texto, CSV, entrada do aria2) ou um .torrent/.metalink."""
+        from tkinter import filedialog
+        from src.ui.utils.bulk_import import BulkImporter
+
+        path = filedialog.askopenfilename(
+            title="Importar downloads",
+            filetypes=[("Listas e torrents", "*.txt *.csv *.lst *.torrent *.metalink *.meta4"),
+                       ("Todos os arquivos", "*.*")]
+        )
+        if not path:
+            return
+        if path.lower().endswith(IntegrityChecker.METALINK_EXTENSIONS):
+            # O Aria2 não expõe os hashes do Metalink: guardados para a verificação pós-download
+            count = self.integrity.register_metalink(path)
+            if count:
+                Logger.log_info(f"Checksums de {count} arquivo(s) lidos do Metalink")
+
+        def on_ready(result):
+            if not result['success']:
+                tk.messagebox.showerror("Erro", f"O Aria2 não pôde ser iniciado:\n{result['error']}")
+                return
+            self.btn_import["state"] = "disabled"
+            self.import_progress["value"] = 0
+            self.import_progress.grid(row=2, column=0, columnspan=3, padx=5, pady=5, sticky="we")
+            self.lbl_import.grid(row=2, column=3, padx=5, pady=5, sticky="w")
+            importer = BulkImporter(self.controller.choose().async_rpc)
+            self.async_rpc.submit(
+                importer.run(path, progress=lambda stats: self.after(0, self.on_import_progress, stats)),
+                self.on_import_finished
+            )
 
-        try:
-            gid = self.controller.add_download(url)
-            print(f"Download adicionado com GID: {gid}")
-            self.load_downloads()
-        except Exception as e:
-            print(f"Erro ao adicionar download: {e}")
-            tk.messagebox.showerror("Erro", f"Não foi possível adicionar o download:\n{e}")
+        self.ensure_aria2_ready(on_ready)
 
 
+    def on_import_progress(self, stats):
+        self.import_progress["value"] = stats["bytes_read"] * 100 / max(stats["total_bytes"], 1)
+        self.lbl_import.config(text=f"{stats['added']} adicionados, {stats['duplicates']} duplicados")
 
-    def update_aria2_status(self):
-        status_text = Aria2StatusChecker.get_status()
+
+    def on_import_finished(self, stats):
+        self.btn_import["state"] = "normal"
+        self.import_progress.grid_remove()
+        self.lbl_import.grid_remove()
+        if stats is None:
+            return
+        message = (f"Adicionados: {stats['added']}\nDuplicados: {stats['duplicates']}\n"
+                   f"Inválidos: {stats['invalid']}\nCom erro: {stats['failed']}")
+        if stats["errors"]:
+            message += "\n\n" + "\n".join(stats["errors"][:5])
+        tk.messagebox.showinfo("Importação concluída", message)
+        self.controller.invalidate()
+        self.load_downloads()
+
+
+    def update_aria2_status(self, status_text=None):
+        if status_text is None:
+            status_text = Aria2StatusChecker.get_status()  # valor em cache, não bloqueia
 
         color = "black"
         if "não instalado" in status_text.lower():
@@ -162,13 +473,28 @@ class MainWindow(tk.Tk):
 
         # Desativa ou ativa o botão com base no status
         if hasattr(self, 'btn_add_download'):
-            estado = "normal" if "rodando" in status_text.lower() else "disabled"
+            # Parado não bloqueia: o supervisor inicia o aria2c ao adicionar
+            estado = "disabled" if "não instalado" in status_text.lower() else "normal"
             self.btn_add_download["state"] = estado
 
 
     def append_log_to_ui(self, msg: str):
-        self.text_logs.insert("end", msg + "\n")
-        self.text_logs.yview("end")  # rola automaticamente para o final
+        """Chamado de qualquer thread; a linha é escrita no próximo flush_logs."""
+        self._log_queue.put(msg)
+
+
+    def flush_logs(self):
+        """Escreve na tela as linhas de log enfileiradas (thread do Tk)."""
+        lines = []
+        try:
+            while True:
+                lines.append(self._log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if lines:
+            self.text_logs.insert("end", "\n".join(lines) + "\n")
+            self.text_logs.yview("end")  # rola automaticamente para o final
+        self.after(self.LOG_FLUSH_INTERVAL, self.flush_logs)
 
 
     def create_widgets(self):
@@ -185,39 +511,92 @@ class MainWindow(tk.Tk):
         self.btn_add_download = ttk.Button(frame_add, text="Adicionar Download", command=self.add_download)
         self.btn_add_download.grid(row=0, column=2, padx=5, pady=5)
 
+        self.btn_import = ttk.Button(frame_add, text="Importar Lista...", command=self.import_downloads)
+        self.btn_import.grid(row=0, column=3, padx=5, pady=5)
+
         self.chk_pause_after_add = ttk.Checkbutton(frame_add, text="Pausar após adicionar")
         self.chk_pause_after_add.grid(row=1, column=0, padx=5, pady=5, sticky="w")
 
-        self.chk_check_integrity = ttk.Checkbutton(frame_add, text="Verificar integridade após download")
+        self.check_integrity_var = tk.BooleanVar(value=self.verify_integrity)
+        self.chk_check_integrity = ttk.Checkbutton(frame_add, text="Verificar integridade após download",
+                                                   variable=self.check_integrity_var,
+                                                   command=self.toggle_integrity_check)
         self.chk_check_integrity.grid(row=1, column=1, padx=5, pady=5, sticky="w")
 
+        self.lbl_checksum = tk.Label(frame_add, text="Checksum:")
+        self.lbl_checksum.grid(row=1, column=2, padx=5, pady=5, sticky="e")
+        self.entry_checksum = tk.Entry(frame_add, width=20)
+        self.entry_checksum.grid(row=1, column=3, padx=5, pady=5, sticky="we")
+
+        # Progresso da importação em lote (exibido só durante a importação)
+        self.import_progress = ttk.Progressbar(frame_add, maximum=100)
+        self.lbl_import = tk.Label(frame_add, text="")
+
         # Seção Controle de Downloads
         frame_control = ttk.LabelFrame(self, text="Gerenciar Downloads")
         frame_control.pack(fill="both", expand=True, padx=10, pady=5)
 
-        self.tree = ttk.Treeview(frame_control, columns=("Nome", "Progresso", "Velocidade", "Tempo", "Ações"), show="headings")
+        # Lista virtualizada: só as linhas visíveis existem no Treeview
+        self.download_list = VirtualTreeview(frame_control, columns=("Nome", "Progresso", "Velocidade", "Tempo", "Ações"),
+                                             on_range_change=lambda offset, limit: self.load_downloads("scroll", supersede=True))
+        self.tree = self.download_list.tree
         self.tree.heading("Nome", text="Nome")
         self.tree.heading("Progresso", text="Progresso")
         self.tree.heading("Velocidade", text="Velocidade")
         self.tree.heading("Tempo", text="Tempo Restante")
         self.tree.heading("Ações", text="Ações")
-        self.tree.pack(fill="both", expand=True)
+        self.download_list.pack(fill="both", expand=True)
 
         frame_buttons = tk.Frame(frame_control)
         frame_buttons.pack(pady=5)
 
-        self.btn_start = ttk.Button(frame_buttons, text="Iniciar")
+        self.btn_start = ttk.Button(frame_buttons, text="Iniciar", command=lambda: self.run_batch("resume"))
         self.btn_start.grid(row=0, column=0, padx=5)
 
-        self.btn_pause = ttk.Button(frame_buttons, text="Pausar")
+        self.btn_pause = ttk.Button(frame_buttons, text="Pausar", command=lambda: self.run_batch("pause"))
         self.btn_pause.grid(row=0, column=1, padx=5)
 
-        self.btn_remove = ttk.Button(frame_buttons, text="Remover")
+        self.btn_remove = ttk.Button(frame_buttons, text="Remover", command=self.remove_selected)
         self.btn_remove.grid(row=0, column=2, padx=5)
 
-        self.btn_force_download = ttk.Button(frame_buttons, text="Forçar Download")
+        self.btn_force_download = ttk.Button(frame_buttons, text="Forçar Download", command=self.force_selected)
         self.btn_force_download.grid(row=0, column=3, padx=5)
 
+        # Menu de contexto: ações sobre a seleção e sobre a fila inteira
+        self.context_menu = tk.Menu(self, tearoff=0)
+        self.context_menu.add_command(label="Retomar", command=lambda: self.run_batch("resume"))
+        self.context_menu.add_command(label="Pausar", command=lambda: self.run_batch("pause"))
+        self.context_menu.add_command(label="Forçar pausa", command=lambda: self.run_batch("force_pause"))
+        self.context_menu.add_command(label="Remover", command=self.remove_selected)
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Mover para o topo", command=lambda: self.move_selected("top"))
+        self.context_menu.add_command(label="Subir", command=lambda: self.move_selected("up"))
+        self.context_menu.add_command(label="Descer", command=lambda: self.move_selected("down"))
+        self.context_menu.add_command(label="Mover para o fim", command=lambda: self.move_selected("bottom"))
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Pausar todos", command=lambda: self.run_global("aria2.pauseAll"))
+        self.context_menu.add_command(label="Retomar todos", command=lambda: self.run_global("aria2.unpauseAll"))
+        self.context_menu.add_command(label="Limpar finalizados",
+                                      command=lambda: self.run_global("aria2.purgeDownloadResult"))
+        self.context_menu.add_separator()
+        self.context_menu.add_command(label="Checksum esperado...", command=self.set_expected_checksum)
+        if self.queue_manager is not None:
+            menu_priority = tk.Menu(self.context_menu, tearoff=0)
+            for label, priority in self.QUEUE_PRIORITIES:
+                menu_priority.add_command(label=label, command=lambda priority=priority: self.set_queue_priority(priority))
+            self.context_menu.add_separator()
+            self.context_menu.add_cascade(label="Prioridade na fila", menu=menu_priority)
+            self.context_menu.add_command(label="Etiqueta...", command=self.set_queue_tag)
+        if self.bandwidth is not None:
+            menu_class = tk.Menu(self.context_menu, tearoff=0)
+            for cls in self.bandwidth.classes:
+                menu_class.add_command(label=cls.capitalize(), command=lambda cls=cls: self.set_bandwidth_class(cls))
+            self.context_menu.add_separator()
+            self.context_menu.add_cascade(label="Prioridade de banda", menu=menu_class)
+        self.tree.bind("<Button-3>", self.show_context_menu)
+        self.tree.bind("<Delete>", lambda event: self.remove_selected())
+        self.tree.bind("<Control-a>", lambda event: self.tree.selection_set(self.tree.get_children()))
+
         ttk.Button(self, text="Ver Histórico", command=self.open_history_window).pack(pady=5)
 
 
@@ -225,7 +604,18 @@ class MainWindow(tk.Tk):
         frame_monitor = ttk.LabelFrame(self, text="Monitoramento")
         frame_monitor.pack(fill="x", padx=10, pady=5)
 
-        ttk.Progressbar(frame_monitor).pack(fill="x", padx=5, pady=5)
+        self.progress_total = ttk.Progressbar(frame_monitor, maximum=100)
+        self.progress_total.pack(fill="x", padx=5, pady=5)
+
+        # Resumo por instância, só com mais de um Aria2
+        self.lbl_fleet = tk.Label(frame_monitor, anchor="w", justify="left")
+        if self.controller.multi:
+            self.lbl_fleet.pack(fill="x", padx=5)
+
+        # Faixa de banda em vigor, só com o agendador ativo
+        self.lbl_bandwidth = tk.Label(frame_monitor, anchor="w")
+        if self.bandwidth is not None:
+            self.lbl_bandwidth.pack(fill="x", padx=5)
 
         self.lbl_total_speed = tk.Label(frame_monitor, text="Velocidade Total: 0 KB/s")
         self.lbl_total_speed.pack(side="left", padx=5)
@@ -233,6 +623,15 @@ class MainWindow(tk.Tk):
         self.lbl_total_upload = tk.Label(frame_monitor, text="Upload Total: 0 KB/s")
         self.lbl_total_upload.pack(side="left", padx=5)
 
+        self.lbl_total_eta = tk.Label(frame_monitor, text="Tempo Restante: -")
+        self.lbl_total_eta.pack(side="left", padx=5)
+
+        # Gráfico (sparkline) da velocidade total recente
+        self.sparkline = tk.Canvas(frame_monitor, width=self.SPARKLINE_WIDTH, height=self.SPARKLINE_HEIGHT,
+                                   highlightthickness=0)
+        self.sparkline.pack(side="right", padx=5, pady=2)
+        self.sparkline_line = self.sparkline.create_line(0, 0, 0, 0, fill="green")
+
         # Seção Logs
         frame_logs = ttk.LabelFrame(self, text="Logs")
         frame_logs.pack(fill="both", expand=True, padx=10, pady=5)
@@ -248,34 +647,278 @@ class MainWindow(tk.Tk):
         self.lbl_aria2_status.pack()
 
 
+    def start_metrics(self):
+        """Série temporal em disco e endpoint /metrics local, conforme as configurações."""
+        self.metrics_server = None
+        settings = FileUtils.get_metrics_settings()
+        if not settings["enabled"]:
+            return
+        try:
+            Metrics.setup(TimeSeriesStore(settings["path"]))
+        except OSError as e:
+            Logger.log_warning(f"Série temporal de métricas indisponível: {e}")
+        self.metrics_server = MetricsServer(port=settings["port"])
+        self.metrics_server.start()
+
+
+    def export_metrics_csv(self):
+        from tkinter import filedialog
+        if Metrics.store is None:
+            tk.messagebox.showinfo("Métricas", "As métricas estão desativadas (ative em Configurações).")
+            return
+        path = filedialog.asksaveasfilename(title="Exportar métricas", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv")])
+        if path:
+            rows = Metrics.store.dump_csv(path)
+            Logger.log_info(f"Métricas exportadas: {rows} amostras em {path}")
+
+
+    def on_close(self):
+        self.scheduler.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        self.controller.stop_notifications()
+        self.supervisor.shutdown()
+        self.integrity.close()
+        self.async_rpc.submit(self.controller.close())
+        self.destroy()
+
+
     def open_history_window(self):
         HistoryWindow(self)
 
 
-    def on_download_completed(self, download_data):
-        from src.ui.utils.file_utils import FileUtils
+    def open_autotuner(self):
+        settings = FileUtils.get_autotune_settings()
+        if not settings["enabled"]:
+            return None
+        try:
+            return AutoTuner.open(settings["path"], settings["epsilon"])
+        except (OSError, sqlite3.Error) as e:
+            Logger.log_warning(f"Ajuste automático por host indisponível: {e}")
+            return None
+
+
+    def open_queue_store(self):
+        try:
+            return QueueStore.open(FileUtils.get_queue_settings()["path"])
+        except (OSError, sqlite3.Error) as e:
+            Logger.log_warning(f"Atributos locais dos downloads indisponíveis: {e}")
+            return None
+
+
+    def open_bandwidth_scheduler(self):
+        settings = FileUtils.get_bandwidth_settings()
+        if not settings["enabled"]:
+            return None
+        return BandwidthScheduler.from_settings(self.controller, settings, self.queue_store)
+
+
+    def apply_bandwidth(self):
+        """Envia ao Aria2 os limites que mudaram (faixa, ativos ou classes)."""
+        if self.bandwidth is None:
+            return
+        changes = self.bandwidth.evaluate()
+        if changes:
+            self.async_rpc.submit(self.bandwidth.apply(changes),
+                                  lambda outcomes: self.bandwidth.on_applied(changes, outcomes))
+
+
+    def bandwidth_tick(self):
+        self.apply_bandwidth()
+        self.update_monitor()
+        self.after(self.BANDWIDTH_INTERVAL, self.bandwidth_tick)
+
+
+    def set_bandwidth_class(self, cls):
+        keys = self.selected_gids()
+        if not keys or self.queue_store is None:
+            return
+        self.queue_store.set_class(keys, cls)
+        Logger.log_info(f"Prioridade de banda \"{cls}\" para {len(keys)} download(s)")
+        self.apply_bandwidth()
+        self.update_monitor()
+
+
+    def open_queue_manager(self):
+        settings = FileUtils.get_queue_settings()
+        if not settings["enabled"]:
+            return None
+        try:
+            return QueueManager(self.controller, self.queue_store, settings["policy"],
+                                settings["large_size"], settings["extra_slots"])
+        except ValueError as e:
+            Logger.log_warning(f"Gerenciador de fila desativado: {e}")
+            return None
+
+
+    def sync_queue(self):
+        """Reordena a fila de espera quando ela ou as prioridades mudaram."""
+        if self.queue_manager is None:
+            return
+        run = self.queue_manager.sync()
+        if run is not None:
+            self.async_rpc.submit(run, self.on_queue_synced)
+
+
+    def on_queue_synced(self, moves):
+        if moves:
+            stats = self.queue_manager.last_stats
+            Logger.log_info(f"Fila reordenada: {moves} download(s) movido(s) "
+                            f"({stats['waiting']} em espera, plano em {stats['plan_ms']:.2f} ms)")
+            self.load_downloads("queue")
+
+
+    def set_queue_priority(self, priority):
+        keys = self.selected_gids()
+        if not keys:
+            return
+        self.queue_manager.set_priority(keys, priority)
+        Logger.log_info(f"Prioridade na fila {priority or 0:+d} para {len(keys)} download(s)")
+        self.sync_queue()
+
+
+    def set_queue_tag(self):
+        from tkinter import simpledialog
+        keys = self.selected_gids()
+        if not keys:
+            return
+        tag = simpledialog.askstring("Etiqueta", "Etiqueta para a divisão justa da fila (vazio remove):", parent=self)
+        if tag is None:
+            return
+        self.queue_manager.set_tag(keys, tag.strip())
+        self.sync_queue()
+
+
+    def toggle_integrity_check(self):
+        self.verify_integrity = self.check_integrity_var.get()
+        FileUtils.set_integrity_check(self.verify_integrity)
+
+
+    def expect_checksum(self, keys, checksum):
+        """Checksum informado para os downloads; verificados ao terminar, mesmo com a opção desligada."""
+        if self.queue_store is not None:
+            self.queue_store.set_checksum(keys, checksum)
+        else:
+            for key in keys:
+                self.integrity.expect(key, checksum)
+
+
+    def set_expected_checksum(self):
+        from tkinter import simpledialog
+        keys = self.selected_gids()
+        if not keys:
+            return
+        text = simpledialog.askstring("Checksum esperado", "Checksum (sha-256=..., sha-1=..., md5=... ou só o resumo):",
+                                      parent=self)
+        if not text or not text.strip():
+            return
+        try:
+            checksum = IntegrityChecker.format_checksum(*IntegrityChecker.parse_checksum(text))
+        except ValueError as e:
+            tk.messagebox.showerror("Erro", f"Checksum inválido:\n{e}")
+            return
+        self.expect_checksum(keys, checksum)
+        Logger.log_info(f"Checksum esperado definido para {len(keys)} download(s)")
+
+
+    def requeue_download(self, entry):
+        """Baixa de novo o arquivo de uma entrada do histórico (ex.: falha na verificação), sobrescrevendo-o."""
+        url = entry.get("url")
+        if not url:
+            return
+        options = IntegrityChecker.requeue_options(entry)
+        # Mesmo URL e caminho: a conclusão anterior não pode fazer a nova ser ignorada
+        self.completion_tracker.forget_url(url)
+
+        def on_ready(result):
+            if not result['success']:
+                tk.messagebox.showerror("Erro", f"O Aria2 não pôde ser iniciado:\n{result['error']}")
+                return
+            self.async_rpc.submit(self.controller.adicionar_download_async(url, options),
+                                  lambda response: self.on_download_requeued(entry, response))
+
+        self.ensure_aria2_ready(on_ready)
+
+
+    def on_download_requeued(self, entry, response):
+        response = response or {"error": "Sem resposta do Aria2"}
+        if "error" in response:
+            Logger.log_error(f"Erro ao baixar novamente {entry.get('filename')}: {response['error']}")
+            tk.messagebox.showerror("Erro", f"Não foi possível baixar novamente:\n{response['error']}")
+            return
+        Logger.log_info(f"{entry.get('filename')} adicionado novamente com GID: {response.get('result')}")
+        # O checksum esperado acompanha o novo download
+        if entry.get("expected"):
+            self.expect_checksum([FleetController.key(response.get("result"), response.get("instance"))],
+                                 entry["expected"])
+        self.controller.invalidate()
+        self.load_downloads()
+
+
+    def open_autotune_window(self):
+        from src.ui.autotune_window import AutotuneWindow
+        if self.autotuner is None:
+            tk.messagebox.showinfo("Ajuste automático", "O ajuste automático por host está desativado (ative em Configurações).")
+            return
+        AutotuneWindow(self, self.autotuner)
+
+
+    def on_download_completed(self, download_data, fingerprints=()):
+        """Efeitos de uma conclusão; roda na thread do CompletionTracker."""
         from datetime import datetime
-        from plyer import notification
-        from playsound import playsound
         import os
 
         try:
             # Extrai caminho do arquivo e outras informações
-            file_path = download_data.get("files", [{}])[0].get("path", "")
-            file_name = os.path.basename(file_path)
+            file_path = download_data.path
+            file_name = os.path.basename(file_path) or download_data.name
 
             entry = {
                 "filename": file_name,
-                "url": download_data.get("files", [{}])[0].get("uris", [{}])[0].get("uri", ""),
+                "url": download_data.url,
                 "path": os.path.dirname(file_path),
                 "status": "Concluído",
                 "finished_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
 
-            # Salva no histórico
-            FileUtils.save_download_history(entry)
+            # Verificação no pool de processos, sem prender esta thread: o histórico
+            # e a notificação saem quando os resumos ficarem prontos
+            if file_path and (self.verify_integrity or self.integrity.wants(download_data.key)):
+                self.integrity.verify(download_data, lambda result: self.completion_tracker.defer(
+                    self.finish_completion, {**entry, **result}, fingerprints))
+                return
+            self.finish_completion(entry, fingerprints)
+
+        except Exception as e:
+            from src.ui.utils.log_utils import Logger
+            Logger.log_error(f"Erro ao processar download concluído: {e}")
+
+
+    def finish_completion(self, entry, fingerprints=()):
+        """Histórico, notificação e som de uma conclusão (já verificada); roda na thread do CompletionTracker."""
+        import os
+
+        try:
+            file_name = entry["filename"]
+            if entry.get("integrity") == "falhou":
+                entry["status"] = "Falha na integridade"
+
+            # Salva no histórico, marcando a conclusão como processada na mesma gravação
+            FileUtils.save_download_history(entry, fingerprints)
+
+            # Notificação e som são opcionais: o histórico já foi gravado acima
+            from plyer import notification
+            from playsound import playsound
 
             # Mostra notificação
+            if entry.get("integrity") == "falhou":
+                notification.notify(
+                    title="Falha na verificação de integridade",
+                    message=f"{file_name} não confere com o checksum esperado. Baixe novamente pelo histórico.",
+                    timeout=5
+                )
+                return
             notification.notify(
                 title="Download concluído",
                 message=f"{file_name} foi baixado com sucesso!",
@@ -0,0 +1,120 @@
+import os
+
+
+class DownloadRecord:
+    """
+    Registro enxuto de um download, com apenas os campos usados pelas telas.
+
+    Os contadores vêm de um tell* com projeção de campos (STATUS_KEYS);
+    nome, caminho e URL mudam raramente e vêm de uma consulta separada
+    (META_KEYS), feita uma única vez por GID e mantida em cache. Com
+    várias instâncias do Aria2, instance identifica a de origem.
+    """
+
+    __slots__ = (
+        "gid", "status", "completed_length", "total_length",
+        "download_speed", "upload_speed", "error_code", "info_hash",
+        "name", "path", "url", "instance", "active_seconds", "active_bytes",
+    )
+
+    # Campos pedidos a cada atualização (sem as árvores files/bittorrent)
+    STATUS_KEYS = [
+        "gid", "status", "completedLength", "totalLength",
+        "downloadSpeed", "uploadSpeed", "errorCode", "infoHash",
+    ]
+
+    # Campos pedidos apenas para GIDs ainda sem nome/caminho em cache
+    META_KEYS = ["gid", "files", "bittorrent"]
+
+    def __init__(self, gid, status="", completed_length=0, total_length=0, download_speed=0,
+                 upload_speed=0, error_code="", info_hash="", name="", path="", url="", instance=""):
+        self.gid = gid
+        self.status = status
+        self.completed_length = completed_length
+        self.total_length = total_length
+        self.download_speed = download_speed
+        self.upload_speed = upload_speed
+        self.error_code = error_code
+        self.info_hash = info_hash
+        self.name = name
+        self.path = path
+        self.url = url
+        self.instance = instance
+        # Período ativo observado (preenchido nos downloads que terminaram)
+        self.active_seconds = 0.0
+        self.active_bytes = 0
+
+    @classmethod
+    def from_status(cls, status, meta=None, instance=""):
+        """Cria o registro a partir de um status (projetado) e dos metadados em cache."""
+        name, path, url = meta or cls.extract_meta(status)
+        return cls(
+            status["gid"],
+            status.get("status", ""),
+            int(status.get("completedLength", 0)),
+            int(status.get("totalLength", 0)),
+            int(status.get("downloadSpeed", 0)),
+            int(status.get("uploadSpeed", 0)),
+            status.get("errorCode", ""),
+            status.get("infoHash", ""),
+            name,
+            path,
+            url,
+            instance,
+        )
+
+    @staticmethod
+    def extract_meta(status):
+        """Extrai (nome, caminho, url) das árvores files/bittorrent de um status completo."""
+        files = status.get("files") or [{}]
+        first = files[0]
+        path = first.get("path", "")
+        uris = first.get("uris") or [{}]
+        url = uris[0].get("uri", "")
+        # Downloads HTTP ainda não iniciados não têm caminho: usa o final da URL
+        name = (status.get("bittorrent") or {}).get("info", {}).get("name") or \
+            os.path.basename(path) or url.split("?")[0].rstrip("/").split("/")[-1]
+        return name, path, url
+
+    @property
+    def key(self):
+        """Identificador único na lista: o GID, qualificado pela instância quando houver."""
+        return f"{self.gid}@{self.instance}" if self.instance else self.gid
+
+    @staticmethod
+    def split_key(key):
+        """Inverso de key: (gid, instância)."""
+        gid, _sep, instance = key.partition("@")
+        return gid, instance
+
+    @property
+    def progress(self):
+        """Percentual concluído (0 a 100)."""
+        return self.completed_length / max(self.total_length, 1) * 100
+
+    def __repr__(self):
+        return f"DownloadRecord(gid={self.gid!r}, status={self.status!r}, name={self.name!r}, instance={self.instance!r})"
+
+
+class DownloadPage:
+    """
+    Janela da lista de downloads (ativos, em espera e parados, nessa ordem).
+
+    offset/total se referem à lista completa; records contém apenas as
+    linhas da janela pedida; finished traz os downloads que saíram da
+    lista de ativos neste ciclo (concluídos, com erro ou removidos).
+    """
+
+    __slots__ = ("offset", "total", "records", "finished")
+
+    def __init__(self, offset, total, records, finished=()):
+        self.offset = offset
+        self.total = total
+        self.records = records
+        self.finished = list(finished)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
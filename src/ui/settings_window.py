@@ -1,3 +1,4 @@
+import os
 import tkinter as tk
 from tkinter import ttk, filedialog
 from src.ui.utils.tooltip import ToolTip
@@ -11,7 +12,7 @@ class SettingsWindow(tk.Toplevel):
     def __init__(self, master):
         super().__init__(master)
         self.title("⚙️ Configurações de Download")
-        self.geometry("424x340")
+        self.geometry("424x440")
         self.rpc_client = Aria2RPC()  # Conexão com Aria2
         self.create_widgets()
         self.load_saved_settings()
@@ -46,6 +47,23 @@ class SettingsWindow(tk.Toplevel):
         btn_browse.grid(row=3, column=2, padx=5, pady=5)
         ToolTip(btn_browse, "Escolher diretório para salvar os downloads.")
 
+        # Recursos opcionais do aplicativo (não enviados ao Aria2; valem ao reiniciar)
+        frame_features = ttk.LabelFrame(self, text="Recursos Opcionais (ao reiniciar)")
+        frame_features.pack(fill="x", padx=10)
+
+        self.metrics_var = tk.BooleanVar(value=False)
+        chk_metrics = ttk.Checkbutton(frame_features, text="Métricas locais (/metrics e série em disco)",
+                                      variable=self.metrics_var)
+        chk_metrics.grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(chk_metrics, "Abre o endpoint Prometheus em 127.0.0.1 e grava o histórico de velocidades.")
+
+        self.autotune_var = tk.BooleanVar(value=False)
+        chk_autotune = ttk.Checkbutton(frame_features, text="Ajuste automático de conexões por host",
+                                       variable=self.autotune_var)
+        chk_autotune.grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        ToolTip(chk_autotune, "Escolhe conexões e segmentos de cada download pelo histórico do host,\n"
+                              "no lugar dos valores acima.")
+
         frame_buttons = ttk.Frame(self)
         frame_buttons.pack(fill="x", padx=10, pady=10)
         btn_recommended = ttk.Button(frame_buttons, text="✅ Usar Recomendados", command=self.reset_defaults)
@@ -71,7 +89,7 @@ class SettingsWindow(tk.Toplevel):
         options = {}
 
         # Pegando e validando conexões
-        conn_value = self.combo_conn.get().split()[0]
+        conn_value = self.combo_server_conn.get().split()[0]
         if conn_value.isdigit():
             options["max-connection-per-server"] = conn_value
 
@@ -79,7 +97,7 @@ class SettingsWindow(tk.Toplevel):
         if seg_value.isdigit():
             options["split"] = seg_value
 
-        upload_value = self.combo_upload.get().split()[0]
+        upload_value = self.combo_upload_limit.get().split()[0]
         if upload_value.isdigit():
             options["max-upload-limit"] = upload_value + "K" if upload_value != "0" else "0"
 
@@ -91,10 +109,14 @@ class SettingsWindow(tk.Toplevel):
                 return
             options["dir"] = dest_dir
 
-        # Salva as configurações no JSON
-        FileUtils.save_config(options)
+        # Salva as configurações no JSON, preservando as demais chaves (rede, frota, banda...)
+        config = FileUtils.load_config()
+        config.update(options)
+        config["metrics_enabled"] = self.metrics_var.get()
+        config["autotune_enabled"] = self.autotune_var.get()
+        FileUtils.save_config(config)
 
-        result = self.rpc.set_options(options)
+        result = self.rpc_client.set_options(options)
         if 'error' in result:
             tk.messagebox.showerror("Erro", "Falha ao aplicar configurações.")
         else:
@@ -107,16 +129,18 @@ class SettingsWindow(tk.Toplevel):
 
 
         if "max-connection-per-server" in config:
-            self.combo_conn.set(f'{config["max-connection-per-server"]} (Saved)')
+            self.combo_server_conn.set(f'{config["max-connection-per-server"]} (Saved)')
         if "split" in config:
             self.combo_segments.set(f'{config["split"]} (Saved)')
         if "max-upload-limit" in config:
             val = config["max-upload-limit"]
             val_num = val.replace("K", "") if "K" in val else val
             texto = f"{val_num} (Saved)" if val_num != "0" else "0 (No limit)"
-            self.combo_upload.set(texto)
+            self.combo_upload_limit.set(texto)
         if "dir" in config:
             self.entry_dest.delete(0, tk.END)
             self.entry_dest.insert(0, config["dir"])
+        self.metrics_var.set(FileUtils.get_metrics_settings()["enabled"])
+        self.autotune_var.set(FileUtils.get_autotune_settings()["enabled"])
 
 
@@ -0,0 +1,255 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.ui.utils.aria2_rpc import Aria2RPC
+from src.ui.utils.log_utils import Logger
+from src.ui.utils.metrics import Metrics
+from src.ui.utils.profiler import Profiler
+
+try:
+    import aiohttp
+except ImportError:  # opcional: sem aiohttp, o transporte síncrono roda num pool limitado
+    aiohttp = None
+
+
+class AsyncAria2RPC:
+    """
+    Cliente JSON-RPC assíncrono do Aria2, com a mesma interface do Aria2RPC.
+
+    Todas as instâncias compartilham um único event loop, numa thread
+    própria e de vida longa; a interface agenda corrotinas com submit() e
+    recebe o resultado no loop do Tk via after(). O número de requisições
+    simultâneas é limitado por max_concurrency, e um submit() com a mesma
+    chave cancela a chamada anterior ainda pendente (atualizações obsoletas).
+    """
+
+    DEFAULT_MAX_CONCURRENCY = 4
+
+    _loop = None
+    _loop_lock = threading.Lock()
+
+    def __init__(self, url=None, token=None, max_concurrency=DEFAULT_MAX_CONCURRENCY, tk_root=None):
+        # Reaproveita a resolução de URL/token e os timeouts do cliente síncrono
+        self.sync = Aria2RPC(url, token)
+        self.url = self.sync.url
+        self.token = self.sync.token
+        self.tk_root = tk_root
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._semaphore = None
+        self._session = None
+        self._executor = None
+        self._pending = {}  # chave -> future da última chamada com essa chave
+        self._pending_lock = threading.Lock()
+
+    @classmethod
+    def event_loop(cls):
+        """Event loop compartilhado, iniciado na primeira chamada."""
+        with cls._loop_lock:
+            if cls._loop is None:
+                cls._loop = asyncio.new_event_loop()
+                threading.Thread(target=cls._loop.run_forever, name="aria2-async", daemon=True).start()
+            return cls._loop
+
+    # --- ponte com o Tk -----------------------------------------------------
+
+    def submit(self, coro, callback=None, key=None, widget=None):
+        """
+        Agenda uma corrotina no loop compartilhado.
+
+        Args:
+            coro: Corrotina a executar (ex.: rpc.tell_active())
+            callback: Chamado com o resultado (None em caso de exceção)
+            key: Se informado, cancela a chamada anterior com a mesma chave
+            widget: Widget Tk cujo after() entrega o callback (padrão: tk_root)
+
+        Returns:
+            concurrent.futures.Future da chamada
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.event_loop())
+        if key is not None:
+            with self._pending_lock:
+                previous = self._pending.get(key)
+                self._pending[key] = future
+            if previous is not None and not previous.done():
+                previous.cancel()
+
+        widget = widget or self.tk_root
+
+        def done(fut):
+            if key is not None:
+                with self._pending_lock:
+                    if self._pending.get(key) is fut:
+                        del self._pending[key]
+            if fut.cancelled():
+                return  # substituída por uma chamada mais nova
+            try:
+                result = fut.result()
+            except Exception as e:
+                Logger.log_error(f"Erro em chamada assíncrona ao Aria2: {e}")
+                result = None
+            if callback is None:
+                return
+            if widget is not None:
+                widget.after(0, callback, result)
+            else:
+                callback(result)
+
+        future.add_done_callback(done)
+        return future
+
+    def submit_blocking(self, func, *args, callback=None, widget=None):
+        """Executa uma função bloqueante no pool do loop e entrega o resultado como submit()."""
+        async def run():
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        return self.submit(run(), callback, widget=widget)
+
+    # --- transporte ---------------------------------------------------------
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="aria2-rpc")
+        return self._executor
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            transport = self.sync.transport
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(sock_connect=transport.connect_timeout,
+                                              sock_read=transport.read_timeout)
+            )
+        return self._session
+
+    async def _post(self, payload, methods):
+        """Envia o payload com as mesmas regras de retentativa do Aria2Transport."""
+        async with self._get_semaphore():
+            transport = self.sync.transport
+            if aiohttp is None:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(), transport.post, self.url, payload, methods
+                )
+
+            session = await self._get_session()
+            attempts = 1 + (transport.retries if transport.is_idempotent(methods) else 0)
+            started = time.perf_counter()
+            error = True
+            try:
+                for attempt in range(attempts):
+                    try:
+                        async with session.post(self.url, json=payload) as response:
+                            response.raise_for_status()
+                            result = Profiler.decode(await response.read())
+                            error = False
+                            return result
+                    except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                        if attempt + 1 >= attempts:
+                            raise
+                        await asyncio.sleep(transport.backoff * (2 ** attempt))
+            finally:
+                Metrics.observe_rpc(transport.metric_label(payload), time.perf_counter() - started, error)
+
+    async def request(self, method, params=None):
+        payload = {
+            "jsonrpc": "2.0",
+            "id": "qwer",
+            "method": method,
+            "params": self.sync._with_token(params)
+        }
+        try:
+            return await self._post(payload, (method,))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def multicall(self, calls):
+        """Versão assíncrona de Aria2RPC.multicall (mesmo formato de retorno)."""
+        if not calls:
+            return []
+        payload = {
+            "jsonrpc": "2.0",
+            "id": "qwer",
+            "method": "system.multicall",
+            "params": [[{"methodName": method, "params": self.sync._with_token(params)} for method, params in calls]]
+        }
+        try:
+            response = await self._post(payload, [method for method, _ in calls])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return [{"error": str(e)} for _ in calls]
+        if "error" in response:
+            return [{"error": response["error"]} for _ in calls]
+        return [{"result": item[0] if item else None} if isinstance(item, list) else {"error": item}
+                for item in response.get("result", [])]
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # --- mesma interface do Aria2RPC ---------------------------------------
+
+    async def set_options(self, options):
+        """Envia opções de configuração para o Aria2."""
+        return await self.request("aria2.changeGlobalOption", [options])
+
+    async def get_global_stat(self):
+        """Obtém estatísticas globais (velocidade total, etc)."""
+        return await self.request("aria2.getGlobalStat")
+
+    async def add_uri(self, uris, options=None):
+        """Adiciona um novo download via link."""
+        params = [uris]
+        if options:
+            params.append(options)
+        return await self.request("aria2.addUri", params)
+
+    async def get_version(self):
+        """Verifica a versão do Aria2."""
+        return await self.request("aria2.getVersion")
+
+    async def tell_active(self, keys=None):
+        """Retorna downloads ativos (keys limita os campos retornados)."""
+        return await self.request("aria2.tellActive", [keys] if keys else None)
+
+    async def tell_waiting(self, offset, num, keys=None):
+        """Retorna downloads em espera (keys limita os campos retornados)."""
+        params = [offset, num]
+        if keys:
+            params.append(keys)
+        return await self.request("aria2.tellWaiting", params)
+
+    async def tell_stopped(self, offset, num, keys=None):
+        """Retorna downloads finalizados/parados (keys limita os campos retornados)."""
+        params = [offset, num]
+        if keys:
+            params.append(keys)
+        return await self.request("aria2.tellStopped", params)
+
+    async def tell_status(self, gid, keys=None):
+        """Retorna o status de um download (keys limita os campos retornados)."""
+        params = [gid]
+        if keys:
+            params.append(keys)
+        return await self.request("aria2.tellStatus", params)
+
+    async def pause(self, gid):
+        """Pausa um download."""
+        return await self.request("aria2.pause", [gid])
+
+    async def unpause(self, gid):
+        """Retoma um download pausado."""
+        return await self.request("aria2.unpause", [gid])
+
+    async def remove(self, gid):
+        """Remove um download da fila."""
+        return await self.request("aria2.remove", [gid])
@@ -1,17 +1,21 @@
 import requests
 from src.ui.utils.file_utils import FileUtils
+from src.ui.utils.aria2_transport import Aria2Transport
+from src.ui.utils.aria2_websocket import Aria2WebSocketClient
 
 class Aria2RPC:
 
 
-    def __init__(self):
+    def __init__(self, url=None, token=None, transport=None):
         # Carrega config salva
         settings = FileUtils.get_rpc_settings()
-        self.url = settings["url"]
-        self.token = settings["token"]
+        self.url = url or settings["url"]
+        self.token = settings["token"] if token is None else token
+        # Pool keep-alive compartilhado por todas as instâncias do mesmo servidor
+        self.transport = transport or Aria2Transport.from_settings({**settings, "url": self.url})
 
 
-    def request(self, method, params=None):
+    def request(self, method, params=None, timeout=None, retries=None):
         payload = {
             "jsonrpc": "2.0",
             "id": "qwer",
@@ -23,12 +27,104 @@ class Aria2RPC:
         if params:
             payload['params'].extend(params)
         try:
-            response = requests.post(self.url, json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return self.transport.post(self.url, payload, methods=(method,), timeout=timeout, retries=retries)
+        except (requests.RequestException, ValueError) as e:
             return {"error": str(e)}
 
+    def _with_token(self, params):
+        """Monta a lista de parâmetros de uma chamada, incluindo o token."""
+        full = [f"token:{self.token}"] if self.token else []
+        if params:
+            full.extend(params)
+        return full
+
+    def multicall(self, calls):
+        """
+        Executa várias chamadas em um único round trip via system.multicall.
+
+        Args:
+            calls: Lista de tuplas (método, parâmetros)
+
+        Returns:
+            Lista, na mesma ordem de calls, com {"result": ...} ou {"error": ...} por chamada
+        """
+        if not calls:
+            return []
+        payload = {
+            "jsonrpc": "2.0",
+            "id": "qwer",
+            "method": "system.multicall",
+            "params": [[{"methodName": method, "params": self._with_token(params)} for method, params in calls]]
+        }
+        try:
+            # Só há retentativa se todas as chamadas do lote forem idempotentes
+            response = self.transport.post(self.url, payload, methods=[method for method, _ in calls])
+        except (requests.RequestException, ValueError) as e:
+            return [{"error": str(e)} for _ in calls]
+        if "error" in response:
+            return [{"error": response["error"]} for _ in calls]
+
+        results = []
+        for item in response.get("result", []):
+            # Sucesso vem embrulhado em lista; falha vem como struct {code, message}
+            if isinstance(item, list):
+                results.append({"result": item[0] if item else None})
+            else:
+                results.append({"error": item})
+        return results
+
+    def batch_request(self, calls):
+        """
+        Executa várias chamadas em um único round trip via lote JSON-RPC (array).
+
+        Args:
+            calls: Lista de tuplas (método, parâmetros)
+
+        Returns:
+            Lista, na mesma ordem de calls, com {"result": ...} ou {"error": ...} por chamada
+        """
+        if not calls:
+            return []
+        payload = [
+            {"jsonrpc": "2.0", "id": str(index), "method": method, "params": self._with_token(params)}
+            for index, (method, params) in enumerate(calls)
+        ]
+        try:
+            response = self.transport.post(self.url, payload, methods=[method for method, _ in calls])
+        except (requests.RequestException, ValueError) as e:
+            return [{"error": str(e)} for _ in calls]
+
+        if not isinstance(response, list):
+            error = response.get("error", "Resposta inválida para lote JSON-RPC")
+            return [{"error": error} for _ in calls]
+
+        # As respostas de um lote podem vir fora de ordem: casamos pelo id
+        by_id = {str(item.get("id")): item for item in response}
+        results = []
+        for index in range(len(calls)):
+            item = by_id.get(str(index))
+            if item is None:
+                results.append({"error": "Sem resposta para a chamada no lote"})
+            elif "error" in item:
+                results.append({"error": item["error"]})
+            else:
+                results.append({"result": item.get("result")})
+        return results
+
+    def subscribe(self, on_event, on_state=None):
+        """
+        Abre o canal WebSocket de notificações (aria2.onDownload*) do mesmo servidor.
+
+        Retorna o Aria2WebSocketClient já iniciado; on_event(método, gid) é
+        chamado na thread do cliente.
+        """
+        client = Aria2WebSocketClient(Aria2WebSocketClient.ws_url(self.url), on_event, on_state)
+        return client.start()
+
+    def batch(self, mode="multicall"):
+        """Cria um lote de chamadas para envio em uma única requisição."""
+        return Aria2Batch(self, mode)
+
     def set_options(self, options):
         """Envia opções de configuração para o Aria2."""
         return self.request("aria2.changeGlobalOption", [options])
@@ -48,15 +144,76 @@ class Aria2RPC:
         """Verifica a versão do Aria2."""
         return self.request("aria2.getVersion")
 
-    def tell_active(self):
-        """Retorna downloads ativos."""
-        return self.request("aria2.tellActive")
+    def tell_active(self, keys=None):
+        """Retorna downloads ativos (keys limita os campos retornados)."""
+        return self.request("aria2.tellActive", [keys] if keys else None)
+
+    def tell_waiting(self, offset, num, keys=None):
+        """Retorna downloads em espera (keys limita os campos retornados)."""
+        params = [offset, num]
+        if keys:
+            params.append(keys)
+        return self.request("aria2.tellWaiting", params)
+
+    def tell_stopped(self, offset, num, keys=None):
+        """Retorna downloads finalizados/parados (keys limita os campos retornados)."""
+        params = [offset, num]
+        if keys:
+            params.append(keys)
+        return self.request("aria2.tellStopped", params)
+
+    def tell_status(self, gid, keys=None):
+        """Retorna o status de um download (keys limita os campos retornados)."""
+        params = [gid]
+        if keys:
+            params.append(keys)
+        return self.request("aria2.tellStatus", params)
+
+    def pause(self, gid):
+        """Pausa um download."""
+        return self.request("aria2.pause", [gid])
+
+    def unpause(self, gid):
+        """Retoma um download pausado."""
+        return self.request("aria2.unpause", [gid])
+
+    def remove(self, gid):
+        """Remove um download da fila."""
+        return self.request("aria2.remove", [gid])
+
+class Aria2Batch:
+    """
+    Acumula chamadas RPC e as envia juntas em uma única requisição HTTP.
+
+    Cada chamada pode ter um callback, que recebe apenas a sua própria
+    resposta ({"result": ...} ou {"error": ...}).
+    """
+
+    def __init__(self, rpc, mode="multicall"):
+        if mode not in ("multicall", "batch"):
+            raise ValueError(f"Modo de lote desconhecido: {mode}")
+        self.rpc = rpc
+        self.mode = mode
+        self.calls = []
+        self.callbacks = []
+
+    def add(self, method, params=None, callback=None):
+        """Enfileira uma chamada e retorna seu índice no resultado."""
+        self.calls.append((method, list(params or [])))
+        self.callbacks.append(callback)
+        return len(self.calls) - 1
 
-    def tell_waiting(self, offset, num):
-        """Retorna downloads em espera."""
-        return self.request("aria2.tellWaiting", [offset, num])
+    def __len__(self):
+        return len(self.calls)
 
-    def tell_stopped(self, offset, num):
-        """Retorna downloads finalizados/parados."""
-        return self.request("aria2.tellStopped", [offset, num])
+    def execute(self):
+        """Envia o lote e distribui as respostas para os callbacks."""
+        if self.mode == "multicall":
+            results = self.rpc.multicall(self.calls)
+        else:
+            results = self.rpc.batch_request(self.calls)
 
+        for callback, result in zip(self.callbacks, results):
+            if callback:
+                callback(result)
+        return results
@@ -1,19 +1,15 @@
-import subprocess
 from src.ui.utils.aria2_rpc import Aria2RPC
+from src.ui.utils.aria2_status_service import Aria2StatusService
 
 class Aria2StatusChecker:
     def __init__(self, host='http://localhost', port=6800, token=None):
-        self.rpc_client = Aria2RPC(host, port, token)
+        self.rpc_client = Aria2RPC(f"{host}:{port}/jsonrpc", token)
 
     def is_installed(self):
-        """Verifica se o aria2c está instalado no sistema."""
-        try:
-            result = subprocess.run(["aria2c", "--version"], capture_output=True, text=True)
-            return result.returncode == 0
-        except FileNotFoundError:
-            return False
+        """Verifica se o aria2c está instalado no sistema (caminho em cache)."""
+        return Aria2StatusService.instance().binary_path() is not None
 
     def is_running(self):
         """Verifica se o Aria2 está rodando via RPC."""
-        response = self.rpc_client.get_version()
+        response = self.rpc_client.request("aria2.getVersion", timeout=Aria2StatusService.PROBE_TIMEOUT, retries=0)
         return 'result' in response
@@ -0,0 +1,171 @@
+import os
+import shutil
+import threading
+import time
+
+from src.ui.utils.log_utils import Logger
+
+
+class Aria2StatusService:
+    """
+    Status do Aria2 mantido em segundo plano, sem bloquear a interface.
+
+    Uma thread própria sonda o Aria2 a cada TTL segundos (ou quando pedido
+    via refresh()) e publica o resultado em status; get_status() só lê o
+    valor em cache. A sonda usa o PID conhecido (os.kill(pid, 0) no
+    Linux/macOS, OpenProcess no Windows) e um aria2.getVersion com timeout
+    curto, em vez de listar processos; o caminho do aria2c fica em cache.
+    """
+
+    NOT_INSTALLED = "Aria2 não instalado"
+    STOPPED = "Aria2 instalado, mas não está rodando"
+    RUNNING = "Aria2 rodando"
+    CHECKING = "Verificando..."
+
+    TTL = 5.0
+    BINARY_RECHECK = 30.0  # reprocura o aria2c no PATH quando não encontrado
+    PROBE_TIMEOUT = (0.3, 1.0)
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, rpc=None, ttl=TTL):
+        self._rpc = rpc
+        self.ttl = ttl
+        self.status = self.CHECKING
+        self.pid = None
+        self.checked_at = 0.0
+        self._binary = None
+        self._binary_checked_at = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def instance(cls):
+        """Serviço compartilhado pelo aplicativo (iniciado na primeira chamada)."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            cls._instance.start()
+            return cls._instance
+
+    @property
+    def rpc(self):
+        if self._rpc is None:
+            from src.ui.utils.aria2_rpc import Aria2RPC
+            self._rpc = Aria2RPC()
+        return self._rpc
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="aria2-status", daemon=True)
+            self._thread.start()
+
+    def add_listener(self, callback):
+        """Registra callback(status) chamado (na thread do serviço) quando o status muda."""
+        self._listeners.append(callback)
+
+    # --- leitura (não bloqueante) -------------------------------------------
+
+    def get_status(self):
+        """Último status conhecido; nunca faz I/O."""
+        return self.status
+
+    def is_running(self):
+        return self.status == self.RUNNING
+
+    def binary_path(self):
+        """Caminho do aria2c, em cache (reprocura periodicamente se ausente)."""
+        now = time.monotonic()
+        if self._binary is None and (self._binary_checked_at is None or
+                                     now - self._binary_checked_at > self.BINARY_RECHECK):
+            self._binary = shutil.which("aria2c")
+            self._binary_checked_at = now
+        return self._binary
+
+    # --- atualização --------------------------------------------------------
+
+    def refresh(self):
+        """Pede uma nova sonda imediata (assíncrona), reprocurando o aria2c se ainda ausente."""
+        if self._binary is None:
+            self._binary_checked_at = None
+        self._wake.set()
+
+    def set_pid(self, pid):
+        """Informa o PID do aria2c iniciado pelo aplicativo."""
+        self.pid = pid
+        self.refresh()
+
+    def report_rpc_ok(self):
+        """Uma chamada RPC bem-sucedida comprova que o Aria2 está rodando."""
+        self.checked_at = time.monotonic()
+        self._publish(self.RUNNING)
+
+    def probe(self):
+        """Executa a sonda agora (bloqueante) e retorna o status."""
+        if self.pid is not None and not self.pid_alive(self.pid):
+            Logger.log_warning(f"Processo do aria2c (PID {self.pid}) não está mais ativo.")
+            self.pid = None
+
+        response = self.rpc.request("aria2.getVersion", timeout=self.PROBE_TIMEOUT, retries=0)
+        if "result" in response:
+            status = self.RUNNING
+        elif self.binary_path() is None:
+            status = self.NOT_INSTALLED
+        else:
+            status = self.STOPPED
+
+        self.checked_at = time.monotonic()
+        self._publish(status)
+        return status
+
+    def _publish(self, status):
+        with self._lock:
+            changed = status != self.status
+            self.status = status
+        if changed:
+            for callback in list(self._listeners):
+                try:
+                    callback(status)
+                except Exception as e:
+                    Logger.log_error(f"Erro ao publicar status do Aria2: {e}")
+
+    def _run(self):
+        while True:
+            # Uma resposta RPC recente (report_rpc_ok) dispensa a sonda
+            if self._wake.is_set() or time.monotonic() - self.checked_at >= self.ttl:
+                self._wake.clear()
+                try:
+                    self.probe()
+                except Exception as e:
+                    Logger.log_error(f"Erro ao verificar status do Aria2: {e}")
+            self._wake.wait(max(self.ttl - (time.monotonic() - self.checked_at), 0.05))
+
+    @staticmethod
+    def pid_alive(pid):
+        """Verifica se um processo existe, sem criar subprocessos."""
+        if os.name == "nt":
+            import ctypes
+            PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+            STILL_ACTIVE = 259
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+            if not handle:
+                return False
+            try:
+                code = ctypes.c_ulong()
+                if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                    return False
+                return code.value == STILL_ACTIVE
+            finally:
+                kernel32.CloseHandle(handle)
+        try:
+            # Sinal 0 só verifica a existência (no Windows os.kill encerraria o processo)
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
@@ -0,0 +1,241 @@
+import atexit
+import os
+import subprocess
+import threading
+import time
+from urllib.parse import urlparse
+
+from src.ui.utils.aria2_rpc import Aria2RPC
+from src.ui.utils.aria2_status_service import Aria2StatusService
+from src.ui.utils.file_utils import FileUtils
+from src.ui.utils.log_utils import Logger
+
+
+class Aria2Supervisor:
+    """
+    Processo filho aria2c gerenciado pelo aplicativo.
+
+    Inicia o aria2c com a configuração salva e detecta quando está pronto
+    sondando a porta RPC (aria2.getVersion com timeout de dezenas de ms),
+    em vez de esperar um tempo fixo. Se o processo cair, é reiniciado com
+    backoff exponencial; o stderr vai para o log; ao sair, o aria2c é
+    encerrado via aria2.shutdown (terminate/kill como último recurso).
+    """
+
+    READY_TIMEOUT = 10.0
+    READY_POLL = 0.02
+    READY_PROBE_TIMEOUT = (0.05, 0.25)
+    MIN_BACKOFF = 1.0
+    MAX_BACKOFF = 30.0
+    STABLE_AFTER = 60.0  # tempo rodando após o qual o backoff é zerado
+    SHUTDOWN_TIMEOUT = 3.0
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, rpc=None, status_service=None):
+        self.rpc = rpc or Aria2RPC()
+        self.status_service = status_service or Aria2StatusService.instance()
+        self.process = None
+        self.ready = threading.Event()
+        self.error = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._thread = None
+        atexit.register(self.shutdown)
+
+    @classmethod
+    def instance(cls):
+        """Supervisor compartilhado pelo aplicativo."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # --- API pública --------------------------------------------------------
+
+    def ensure_running(self):
+        """
+        Garante que há um Aria2 respondendo, iniciando o aria2c se preciso.
+
+        Não bloqueia: a inicialização e a espera pela porta RPC rodam na
+        thread do supervisor. Use wait_ready() para aguardar o resultado.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self.ready
+            self.ready.clear()
+            self.error = None
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="aria2-supervisor", daemon=True)
+            self._thread.start()
+            return self.ready
+
+    def wait_ready(self, timeout=None):
+        """
+        Inicia (se preciso) e aguarda o Aria2 ficar pronto.
+
+        Returns:
+            Dicionário {'success': bool, 'error': str ou None}
+        """
+        ready = self.ensure_running()
+        if ready.wait(self.READY_TIMEOUT if timeout is None else timeout):
+            return {'success': True, 'error': None}
+        return {'success': False, 'error': self.error or "O Aria2 não respondeu a tempo."}
+
+    @property
+    def managed(self):
+        """Indica se o Aria2 em uso é um processo iniciado por este supervisor."""
+        return self.process is not None and self.process.poll() is None
+
+    def shutdown(self):
+        """Encerra o aria2c gerenciado (se houver) de forma limpa."""
+        with self._lock:
+            self._stopping = True
+            process = self.process
+        self.ready.clear()
+        if process is None or process.poll() is not None:
+            return
+
+        # aria2.shutdown salva a sessão e fecha os downloads corretamente
+        self.rpc.request("aria2.shutdown", timeout=self.READY_PROBE_TIMEOUT, retries=0)
+        try:
+            process.wait(self.SHUTDOWN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            Logger.log_warning("aria2c não encerrou a tempo; finalizando o processo.")
+            self._terminate(process)
+        Logger.log_info("aria2c encerrado.")
+
+    def _terminate(self, process):
+        """Finaliza o processo (terminate e, se não bastar, kill) e aguarda o fim."""
+        process.terminate()
+        try:
+            process.wait(self.SHUTDOWN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    # --- supervisão ---------------------------------------------------------
+
+    def _run(self):
+        backoff = self.MIN_BACKOFF
+        while not self._stopping:
+            # Um Aria2 já rodando (serviço do sistema, outra instância) é usado como está
+            if self._probe(self.READY_PROBE_TIMEOUT):
+                self._set_ready()
+                return
+
+            if not self._is_local():
+                self.error = "O Aria2 remoto configurado não está respondendo."
+                Logger.log_error(self.error)
+                return
+
+            started_at = time.monotonic()
+            process = self._spawn()
+            if process is None:
+                return
+
+            if self._wait_for_port(process):
+                self._set_ready()
+                process.wait()
+            elif process.poll() is None and not self._stopping:
+                # Vivo mas sem responder no prazo: finaliza antes de tentar outro,
+                # senão os dois disputam a porta RPC e o arquivo de sessão
+                Logger.log_warning(f"aria2c não respondeu em {self.READY_TIMEOUT:.0f}s; finalizando o processo.")
+                self._terminate(process)
+            self.ready.clear()
+
+            if self._stopping:
+                return
+
+            if time.monotonic() - started_at >= self.STABLE_AFTER:
+                backoff = self.MIN_BACKOFF
+            Logger.log_error(f"aria2c terminou inesperadamente (código {process.returncode}); "
+                             f"reiniciando em {backoff:.0f}s.")
+            self.status_service.refresh()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.MAX_BACKOFF)
+
+    def _spawn(self):
+        binary = self.status_service.binary_path()
+        if binary is None:
+            self.error = "O Aria2 não está instalado."
+            Logger.log_error(self.error)
+            return None
+
+        command = self.build_command(binary)
+        creationflags = subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
+        try:
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.PIPE, creationflags=creationflags)
+        except OSError as e:
+            self.error = f"Falha ao iniciar o Aria2: {e}"
+            Logger.log_error(self.error)
+            return None
+
+        with self._lock:
+            self.process = process
+        Logger.log_info(f"aria2c iniciado (PID {process.pid}).")
+        self.status_service.set_pid(process.pid)
+        threading.Thread(target=self._pump_stderr, args=(process,), name="aria2-stderr", daemon=True).start()
+        return process
+
+    def build_command(self, binary):
+        """Linha de comando do aria2c a partir das configurações salvas."""
+        url = urlparse(self.rpc.url)
+        command = [binary, "--enable-rpc", f"--rpc-listen-port={url.port or 6800}",
+                   f"--stop-with-process={os.getpid()}"]  # não sobrevive ao aplicativo
+        conf_path = self.conf_path(binary)
+        if conf_path:
+            command.append(f"--conf-path={conf_path}")
+        if self.rpc.token:
+            command.append(f"--rpc-secret={self.rpc.token}")
+        return command
+
+    @staticmethod
+    def conf_path(binary):
+        """aria2.conf salvo nas configurações ou criado pelo instalador, se existir."""
+        config = FileUtils.load_config()
+        candidates = [
+            config.get("aria2_conf_path"),
+            os.path.join(os.path.dirname(binary), "config", "aria2.conf"),
+        ]
+        for path in candidates:
+            if path and os.path.isfile(path):
+                return path
+        return None
+
+    def _wait_for_port(self, process):
+        """Sonda a porta RPC até responder, o processo morrer ou estourar o tempo."""
+        deadline = time.monotonic() + self.READY_TIMEOUT
+        while time.monotonic() < deadline and not self._stopping:
+            if process.poll() is not None:
+                self.error = f"aria2c terminou ao iniciar (código {process.returncode})."
+                return False
+            if self._probe(self.READY_PROBE_TIMEOUT):
+                return True
+            time.sleep(self.READY_POLL)
+        if not self._stopping:
+            self.error = "O Aria2 não abriu a porta RPC a tempo."
+            Logger.log_error(self.error)
+        return False
+
+    def _probe(self, timeout):
+        return "result" in self.rpc.request("aria2.getVersion", timeout=timeout, retries=0)
+
+    def _set_ready(self):
+        self.error = None
+        self.ready.set()
+        self.status_service.report_rpc_ok()
+        Logger.log_info("Aria2 pronto.")
+
+    def _is_local(self):
+        return urlparse(self.rpc.url).hostname in ("localhost", "127.0.0.1", "::1")
+
+    @staticmethod
+    def _pump_stderr(process):
+        for line in iter(process.stderr.readline, b""):
+            text = line.decode("utf-8", errors="replace").rstrip()
+            if text:
+                Logger.log_warning(f"aria2c: {text}")
+        process.stderr.close()
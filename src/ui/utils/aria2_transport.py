@@ -0,0 +1,130 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.ui.utils.metrics import Metrics
+from src.ui.utils.profiler import Profiler
+
+
+class Aria2Transport:
+    """
+    Camada de transporte HTTP para o JSON-RPC do Aria2.
+
+    Mantém uma única requests.Session com pool de conexões keep-alive,
+    compartilhada entre threads, com timeouts de conexão/leitura e
+    retentativas com backoff apenas para métodos idempotentes.
+    """
+
+    # Métodos que podem ser repetidos sem efeitos colaterais
+    IDEMPOTENT_METHODS = frozenset({
+        "aria2.tellActive",
+        "aria2.tellWaiting",
+        "aria2.tellStopped",
+        "aria2.tellStatus",
+        "aria2.getGlobalStat",
+        "aria2.getVersion",
+        "aria2.getOption",
+        "aria2.getGlobalOption",
+        "aria2.getFiles",
+        "aria2.getUris",
+        "aria2.getPeers",
+        "aria2.getServers",
+        "system.listMethods",
+        "system.listNotifications",
+    })
+
+    DEFAULT_CONNECT_TIMEOUT = 3.05
+    DEFAULT_READ_TIMEOUT = 10.0
+    DEFAULT_RETRIES = 2
+    DEFAULT_BACKOFF = 0.25
+    DEFAULT_POOL_SIZE = 4
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, pool_size=DEFAULT_POOL_SIZE):
+        self.connect_timeout = float(connect_timeout)
+        self.read_timeout = float(read_timeout)
+        self.retries = max(0, int(retries))
+        self.backoff = float(backoff)
+        self.pool_size = max(1, int(pool_size))
+
+        self.session = requests.Session()
+        # As retentativas são feitas aqui mesmo, por método RPC, e não pelo urllib3
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0, pool_block=False)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+
+    @classmethod
+    def shared(cls, url, **kwargs):
+        """Retorna o transporte compartilhado para a URL (um pool por servidor)."""
+        key = (url, tuple(sorted(kwargs.items())))
+        with cls._shared_lock:
+            transport = cls._shared.get(key)
+            if transport is None:
+                transport = cls(**kwargs)
+                cls._shared[key] = transport
+            return transport
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Cria (ou reutiliza) o transporte a partir de FileUtils.get_rpc_settings()."""
+        return cls.shared(
+            settings["url"],
+            connect_timeout=settings.get("connect_timeout", cls.DEFAULT_CONNECT_TIMEOUT),
+            read_timeout=settings.get("read_timeout", cls.DEFAULT_READ_TIMEOUT),
+            retries=settings.get("retries", cls.DEFAULT_RETRIES),
+            pool_size=settings.get("pool_size", cls.DEFAULT_POOL_SIZE),
+        )
+
+    def is_idempotent(self, methods):
+        """Indica se todos os métodos da chamada podem ser repetidos com segurança."""
+        return all(method in self.IDEMPOTENT_METHODS for method in methods)
+
+    def post(self, url, payload, methods=(), timeout=None, retries=None):
+        """
+        Envia um payload JSON-RPC e retorna a resposta decodificada.
+
+        Args:
+            url: Endpoint JSON-RPC
+            payload: Objeto (ou lista, em lote) a ser enviado
+            methods: Métodos RPC contidos no payload, usados para decidir retentativas
+            timeout: Tupla (conexão, leitura) para sobrescrever o padrão
+            retries: Número de retentativas para sobrescrever o padrão
+
+        Raises:
+            requests.RequestException: quando todas as tentativas falharem
+        """
+        retries = self.retries if retries is None else retries
+        attempts = 1 + (retries if self.is_idempotent(methods) else 0)
+        timeout = timeout or (self.connect_timeout, self.read_timeout)
+
+        started = time.perf_counter()
+        error = True
+        try:
+            for attempt in range(attempts):
+                try:
+                    response = self.session.post(url, json=payload, timeout=timeout)
+                    response.raise_for_status()
+                    result = Profiler.decode(response.content)
+                    error = False
+                    return result
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt + 1 >= attempts:
+                        raise
+                    time.sleep(self.backoff * (2 ** attempt))
+        finally:
+            Metrics.observe_rpc(self.metric_label(payload), time.perf_counter() - started, error)
+
+    @staticmethod
+    def metric_label(payload):
+        """Rótulo da chamada nas métricas: o método, ou "batch" para lotes JSON-RPC."""
+        return payload.get("method", "") if isinstance(payload, dict) else "batch"
+
+    def close(self):
+        """Fecha todas as conexões do pool."""
+        self.session.close()
@@ -0,0 +1,124 @@
+import json
+import threading
+
+from src.ui.utils.log_utils import Logger
+
+
+class Aria2WebSocketClient:
+    """
+    Cliente do canal de notificações WebSocket do Aria2.
+
+    Roda em uma thread própria, repassa as notificações aria2.on* para o
+    callback on_event(método, gid) e reconecta com backoff exponencial.
+    Se a biblioteca websocket-client não estiver instalada ou o endpoint
+    não responder, on_state(False) avisa o chamador para seguir no polling HTTP.
+    """
+
+    EVENTS = (
+        "aria2.onDownloadStart",
+        "aria2.onDownloadPause",
+        "aria2.onDownloadStop",
+        "aria2.onDownloadComplete",
+        "aria2.onDownloadError",
+        "aria2.onBtDownloadComplete",
+    )
+
+    MIN_BACKOFF = 1.0
+    MAX_BACKOFF = 30.0
+
+    def __init__(self, url, on_event, on_state=None, connect_timeout=3.0):
+        self.url = url
+        self.on_event = on_event
+        self.on_state = on_state
+        self.connect_timeout = connect_timeout
+        self.connected = False
+        self._ws = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def ws_url(http_url):
+        """Converte a URL JSON-RPC HTTP na URL WebSocket equivalente."""
+        if http_url.startswith("https://"):
+            return "wss://" + http_url[len("https://"):]
+        if http_url.startswith("http://"):
+            return "ws://" + http_url[len("http://"):]
+        return http_url
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="aria2-ws", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.abort()  # acorda a thread bloqueada em recv()
+            except Exception:
+                pass
+
+    def _set_connected(self, connected):
+        if connected != self.connected:
+            self.connected = connected
+            if self.on_state:
+                self.on_state(connected)
+
+    def _run(self):
+        try:
+            import websocket
+        except ImportError:
+            Logger.log_warning("websocket-client não instalado; usando apenas polling HTTP.")
+            self._set_connected(False)
+            return
+
+        backoff = self.MIN_BACKOFF
+        while not self._stop.is_set():
+            try:
+                self._ws = websocket.create_connection(self.url, timeout=self.connect_timeout)
+                # Após conectar, a leitura bloqueia até chegar notificação
+                self._ws.settimeout(None)
+                self._set_connected(True)
+                Logger.log_info(f"Notificações do Aria2 conectadas em {self.url}")
+                backoff = self.MIN_BACKOFF
+                while not self._stop.is_set():
+                    message = self._ws.recv()
+                    if not self._ws.connected:
+                        raise ConnectionError("conexão encerrada pelo servidor")
+                    self._dispatch(message)
+            except Exception as e:
+                if not self._stop.is_set():
+                    Logger.log_warning(f"Canal WebSocket do Aria2 indisponível ({e}); nova tentativa em {backoff:.0f}s.")
+            finally:
+                if self._ws is not None:
+                    try:
+                        self._ws.close(timeout=1)
+                    except Exception:
+                        pass
+                    self._ws = None
+                self._set_connected(False)
+
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, self.MAX_BACKOFF)
+
+    def _dispatch(self, message):
+        if not message:
+            return
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+        method = data.get("method")
+        if method not in self.EVENTS:
+            return  # respostas de chamadas ou eventos não monitorados
+        for event in data.get("params", []):
+            gid = event.get("gid") if isinstance(event, dict) else None
+            if gid:
+                try:
+                    self.on_event(method, gid)
+                except Exception as e:
+                    Logger.log_error(f"Erro ao tratar notificação {method}: {e}")
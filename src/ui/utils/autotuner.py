@@ -0,0 +1,188 @@
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from src.ui.utils.log_utils import Logger
+from src.ui.utils.placement_policy import PlacementPolicy
+
+
+class AutoTuner:
+    """
+    Escolhe max-connection-per-server/split/min-split-size por host de origem.
+
+    Cada download adicionado com uma configuração (um "braço") tem a vazão
+    média medida no período ativo (bytes / segundos, vinda do RateTracker);
+    a média e a variância por (host, configuração) ficam em SQLite,
+    atualizadas incrementalmente. Para um novo link, a política
+    epsilon-greedy usa a melhor configuração conhecida do host (ou, sem
+    dados, a que mais se aproxima do melhor nos demais hosts) e, com
+    probabilidade decrescente conforme o host acumula amostras, experimenta
+    a configuração menos testada.
+    """
+
+    # (max-connection-per-server, split, min-split-size); sem conexão única, que a
+    # exploração sortearia para downloads comuns
+    ARMS = ((4, 4, "20M"), (8, 8, "10M"), (16, 16, "5M"), (16, 32, "1M"))
+    DEFAULT_ARM = (16, 16, "5M")  # mais próxima do aria2.conf instalado (16/16)
+    MIN_EPSILON = 0.02
+    MIN_SECONDS = 2.0  # downloads mais curtos não dizem nada sobre a vazão
+    MIN_BYTES = 1024 * 1024
+    MAX_PENDING = 10000
+    TUNABLE_SCHEMES = ("http", "https", "ftp", "sftp")
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_path, epsilon=0.1, rng=None):
+        self.db_path = db_path
+        self.epsilon = epsilon
+        self.rng = rng or random.Random()
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # chave do registro -> (host, braço)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS arms ("
+            " host TEXT, connections INTEGER, split INTEGER, min_split TEXT,"
+            " n INTEGER, mean REAL, m2 REAL, updated_at REAL,"
+            " PRIMARY KEY (host, connections, split, min_split))"
+        )
+        # host -> {braço: [n, média, m2]}
+        self._stats = {}
+        for host, connections, split, min_split, n, mean, m2 in self.conn.execute(
+                "SELECT host, connections, split, min_split, n, mean, m2 FROM arms"):
+            self._stats.setdefault(host, {})[(connections, split, min_split)] = [n, mean, m2]
+
+    @classmethod
+    def open(cls, db_path, epsilon=0.1):
+        """Retorna a instância compartilhada para o arquivo."""
+        with cls._instances_lock:
+            tuner = cls._instances.get(db_path)
+            if tuner is None:
+                tuner = cls._instances[db_path] = cls(db_path, epsilon)
+            return tuner
+
+    # --- escolha -------------------------------------------------------------
+
+    @classmethod
+    def host(cls, url):
+        """Host ajustável do link, ou None (magnets, torrents, caminhos locais)."""
+        scheme = url.split(":", 1)[0].lower()
+        if scheme not in cls.TUNABLE_SCHEMES:
+            return None
+        return PlacementPolicy.host(url) or None
+
+    @staticmethod
+    def options(arm):
+        connections, split, min_split = arm
+        return {"max-connection-per-server": str(connections), "split": str(split), "min-split-size": min_split}
+
+    def choose(self, url):
+        """
+        Returns:
+            (host, braço) para o link, ou (None, None) se não for ajustável
+        """
+        host = self.host(url)
+        if host is None:
+            return None, None
+        with self._lock:
+            stats = self._stats.get(host, {})
+            samples = sum(stat[0] for stat in stats.values())
+            # Explora menos conforme o host acumula amostras
+            epsilon = max(self.MIN_EPSILON, self.epsilon * math.sqrt(len(self.ARMS) / (samples + len(self.ARMS))))
+            if self.rng.random() < epsilon:
+                arm = min(self.ARMS, key=lambda arm: (stats[arm][0] if arm in stats else 0, self.rng.random()))
+            elif stats:
+                arm = max(stats, key=lambda arm: stats[arm][1])
+            else:
+                arm = self._prior()
+        return host, arm
+
+    def _prior(self):
+        """Braço com a maior vazão relativa (à melhor do host) na média dos hosts conhecidos."""
+        scores = {}
+        for stats in self._stats.values():
+            best = max(stat[1] for stat in stats.values())
+            if best <= 0:
+                continue
+            for arm, stat in stats.items():
+                scores.setdefault(arm, []).append(stat[1] / best)
+        if not scores:
+            return self.DEFAULT_ARM
+        return max(scores, key=lambda arm: sum(scores[arm]) / len(scores[arm]))
+
+    def assign(self, key, host, arm):
+        """Associa o download adicionado (chave do registro) à configuração usada."""
+        with self._lock:
+            self._pending[key] = (host, arm)
+            while len(self._pending) > self.MAX_PENDING:
+                self._pending.popitem(last=False)
+
+    # --- aprendizado -----------------------------------------------------------
+
+    def record_finished(self, record):
+        """Contabiliza um download que terminou; retorna a vazão registrada (B/s) ou None."""
+        with self._lock:
+            assignment = self._pending.pop(record.key, None)
+        if assignment is None or record.status != "complete":
+            return None
+        if record.active_seconds < self.MIN_SECONDS or record.active_bytes < self.MIN_BYTES:
+            return None
+        throughput = record.active_bytes / record.active_seconds
+        self.record(*assignment, throughput)
+        return throughput
+
+    def record(self, host, arm, throughput):
+        """Atualiza média e variância (Welford) de (host, braço) e grava."""
+        with self._lock:
+            stat = self._stats.setdefault(host, {}).setdefault(arm, [0, 0.0, 0.0])
+            stat[0] += 1
+            delta = throughput - stat[1]
+            stat[1] += delta / stat[0]
+            stat[2] += delta * (throughput - stat[1])
+            try:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO arms (host, connections, split, min_split, n, mean, m2, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (host, *arm, *stat, time.time()))
+            except sqlite3.Error as e:
+                Logger.log_warning(f"Falha ao gravar o ajuste automático: {e}")
+
+    # --- relatório ---------------------------------------------------------------
+
+    def report(self):
+        """Ótimo aprendido por host, dos mais amostrados para os menos."""
+        rows = []
+        with self._lock:
+            for host, stats in self._stats.items():
+                arm = max(stats, key=lambda arm: stats[arm][1])
+                n, mean, m2 = stats[arm]
+                default = stats.get(self.DEFAULT_ARM)
+                rows.append({
+                    "host": host,
+                    "arm": arm,
+                    "throughput": mean,
+                    "stdev": math.sqrt(m2 / (n - 1)) if n > 1 else 0.0,
+                    "samples": sum(stat[0] for stat in stats.values()),
+                    "arms_tried": sum(arm in stats for arm in self.ARMS),
+                    "gain": mean / default[1] - 1 if default and default[1] > 0 and arm != self.DEFAULT_ARM else None,
+                })
+        rows.sort(key=lambda row: -row["samples"])
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+            self.conn.execute("DELETE FROM arms")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,278 @@
+import asyncio
+import time
+
+from src.ui.utils.file_utils import FileUtils
+from src.ui.utils.log_utils import Logger
+
+
+class BandwidthWindow:
+    """Faixa do calendário: dias da semana, horário [início, fim) e orçamento (B/s, 0 = sem limite)."""
+
+    __slots__ = ("name", "days", "start", "end", "download", "upload")
+
+    DAY_NAMES = {
+        "mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6,
+        "seg": 0, "ter": 1, "qua": 2, "qui": 3, "sex": 4, "sab": 5, "sáb": 5, "dom": 6,
+    }
+
+    def __init__(self, name, days, start, end, download, upload):
+        self.name = name
+        self.days = days
+        self.start = start
+        self.end = end
+        self.download = download
+        self.upload = upload
+
+    @classmethod
+    def from_config(cls, entry, index=0):
+        return cls(
+            str(entry.get("name") or f"Faixa {index + 1}"),
+            cls.parse_days(entry.get("days", "*")),
+            cls.parse_time(entry.get("start", "00:00")),
+            cls.parse_time(entry.get("end", "00:00")),
+            FileUtils.parse_file_size(entry.get("download", 0)),
+            FileUtils.parse_file_size(entry.get("upload", 0)),
+        )
+
+    @classmethod
+    def parse_days(cls, value):
+        """"mon-fri", "sat,sun", "*" ou lista de dias (nomes ou 0 = segunda)."""
+        if value in (None, "*", "all", "todos"):
+            return frozenset(range(7))
+        parts = value if isinstance(value, (list, tuple)) else str(value).split(",")
+        days = set()
+        for part in parts:
+            if isinstance(part, int):
+                days.add(part % 7)
+                continue
+            part = part.strip().lower()
+            if "-" in part:
+                first, last = (cls.DAY_NAMES[day.strip()[:3]] for day in part.split("-", 1))
+                day = first
+                while True:
+                    days.add(day)
+                    if day == last:
+                        break
+                    day = (day + 1) % 7
+            elif part:
+                days.add(cls.DAY_NAMES[part[:3]])
+        return frozenset(days)
+
+    @staticmethod
+    def parse_time(value):
+        """"HH:MM" -> minutos desde a meia-noite."""
+        hours, _, minutes = str(value).partition(":")
+        return (int(hours) * 60 + int(minutes or 0)) % (24 * 60)
+
+    def matches(self, weekday, minute):
+        if self.start < self.end:
+            return weekday in self.days and self.start <= minute < self.end
+        if self.start == self.end:
+            return weekday in self.days  # o dia inteiro
+        # Atravessa a meia-noite (ex.: 22:00-06:00): a madrugada pertence ao dia anterior
+        return (weekday in self.days and minute >= self.start) or ((weekday - 1) % 7 in self.days and minute < self.end)
+
+
+class BandwidthScheduler:
+    """
+    Limites de banda por horário e por classe de prioridade.
+
+    O calendário é uma lista de faixas (a primeira que casar vale; fora
+    delas, o orçamento padrão). O orçamento de download e de upload da faixa
+    é dividido entre os downloads ativos em proporção ao peso da classe de
+    cada um: cada download recebe max-download-limit/max-upload-limit
+    (aria2.changeOption) e cada instância do Aria2, a soma das cotas dos
+    seus como max-overall-*-limit (aria2.changeGlobalOption). Com uma única
+    classe ativa não há o que ponderar: os limites por download são
+    removidos e o teto global divide a banda sem desperdiçar a cota de quem
+    está limitado pelo servidor.
+
+    evaluate() roda a cada ciclo de atualização e só calcula algo quando a
+    faixa, o conjunto de ativos ou as classes mudaram; do plano, só vão ao
+    Aria2 os limites diferentes dos já aplicados.
+    """
+
+    DEFAULT_CLASSES = {"alta": 4, "normal": 2, "baixa": 1}
+    MIN_SHARE = 1024  # 0 no Aria2 é "sem limite"; uma cota nunca chega a zero
+
+    def __init__(self, controller, windows, default=(0, 0), classes=None, default_class="normal", store=None):
+        """
+        Args:
+            controller: FleetController com os ativos de cada instância
+            windows: Lista de BandwidthWindow, em ordem de prioridade
+            default: (download, upload) em B/s fora das faixas
+            classes: Mapa classe -> peso
+            default_class: Classe dos downloads sem classe atribuída
+            store: QueueStore com as classes atribuídas (opcional)
+        """
+        self.controller = controller
+        self.windows = windows
+        self.default = default
+        self.classes = dict(classes or self.DEFAULT_CLASSES)
+        self.default_class = default_class if default_class in self.classes else next(iter(self.classes))
+        self.store = store
+        self.current = None  # (nome da faixa, download, upload) em vigor
+        self._signature = None
+        self._applied = {}  # (instância, gid) -> (download, upload)
+        self._applied_global = {}  # instância -> (download, upload)
+
+    @classmethod
+    def from_settings(cls, controller, settings, store=None):
+        windows = []
+        for index, entry in enumerate(settings["schedule"]):
+            try:
+                windows.append(BandwidthWindow.from_config(entry, index))
+            except (AttributeError, KeyError, ValueError) as e:
+                Logger.log_warning(f"Faixa de banda inválida ignorada ({entry!r}): {e}")
+        default = settings["default"]
+        default = tuple(FileUtils.config_size(default, key, 0, f"bandwidth_default.{key}")
+                        for key in ("download", "upload"))
+        return cls(controller, windows, default, settings["classes"], settings["default_class"], store)
+
+    # --- calendário -------------------------------------------------------------
+
+    def window_at(self, now=None):
+        """(nome, download, upload) em vigor no instante (hora local)."""
+        moment = time.localtime(now)
+        minute = moment.tm_hour * 60 + moment.tm_min
+        for window in self.windows:
+            if window.matches(moment.tm_wday, minute):
+                return window.name, window.download, window.upload
+        return "Padrão", self.default[0], self.default[1]
+
+    def class_of(self, key):
+        if self.store is None:
+            return self.default_class
+        cls = self.store.classes().get(key, self.default_class)
+        return cls if cls in self.classes else self.default_class
+
+    # --- plano -------------------------------------------------------------------
+
+    def evaluate(self, now=None):
+        """
+        Recalcula os limites se algo mudou desde a última chamada.
+
+        Returns:
+            {instância: [(método, params)]} com as mudanças a enviar, ou None
+        """
+        window = self.window_at(now)
+        members = self.controller.members
+        active = []
+        for member in members:
+            if member.online:
+                active.append((member.name, frozenset(
+                    (gid, self.class_of(self.controller.key(gid, member.name))) for gid in member.active_gids)))
+            else:
+                active.append((member.name, None))
+        signature = (window, tuple(active))
+        if signature == self._signature:
+            return None
+        self._signature = signature
+        if window != self.current:
+            Logger.log_info(f"Banda: faixa \"{window[0]}\" (download {self.format_limit(window[1])}, "
+                            f"upload {self.format_limit(window[2])})")
+            self.current = window
+        return self._diff(self.plan(window, active))
+
+    def plan(self, window, active):
+        """
+        Limites desejados para a faixa e os ativos de cada instância.
+
+        Returns:
+            ({instância: (download, upload)}, {(instância, gid): (download, upload)})
+        """
+        _name, download, upload = window
+        online = [(name, gids) for name, gids in active if gids is not None]
+        weights = {name: sum(self.classes[cls] for _gid, cls in gids) for name, gids in online}
+        total = sum(weights.values())
+        weighted = len({cls for _name, gids in online for _gid, cls in gids}) > 1
+
+        overall = {}
+        per_download = {}
+        for name, gids in online:
+            if total > 0:
+                share = weights[name] / total
+            else:
+                share = 1 / len(online)  # sem ativos: divisão igual, pronta para o próximo que começar
+            overall[name] = (self._share(download, share), self._share(upload, share))
+            for gid, cls in gids:
+                if weighted:
+                    fraction = self.classes[cls] / total
+                    per_download[(name, gid)] = (self._share(download, fraction), self._share(upload, fraction))
+                else:
+                    per_download[(name, gid)] = (0, 0)
+        return overall, per_download
+
+    def _share(self, budget, fraction):
+        if budget <= 0:
+            return 0
+        return max(self.MIN_SHARE, int(budget * fraction))
+
+    def _diff(self, plan):
+        """Só os limites diferentes dos já aplicados, agrupados por instância."""
+        overall, per_download = plan
+        changes = {}
+        for name, limits in overall.items():
+            if self._applied_global.get(name) != limits:
+                changes.setdefault(name, []).append(("aria2.changeGlobalOption", [{
+                    "max-overall-download-limit": str(limits[0]),
+                    "max-overall-upload-limit": str(limits[1]),
+                }]))
+                self._applied_global[name] = limits
+        for (name, gid), limits in per_download.items():
+            # Desconhecido (None) é enviado mesmo sem limite: pode haver um de uma sessão anterior
+            if self._applied.get((name, gid)) != limits:
+                changes.setdefault(name, []).append(("aria2.changeOption", [gid, {
+                    "max-download-limit": str(limits[0]),
+                    "max-upload-limit": str(limits[1]),
+                }]))
+        # Instâncias fora do ar perdem as opções ao reiniciar: reenviar tudo quando voltarem
+        for name in [name for name in self._applied_global if name not in overall]:
+            del self._applied_global[name]
+        self._applied = per_download
+        return changes or None
+
+    async def apply(self, changes):
+        """Envia as mudanças de cada instância em um único multicall, em paralelo."""
+        members = {member.name: member for member in self.controller.members}
+        names = [name for name in changes if name in members]
+        outcomes = await asyncio.gather(*(members[name].async_rpc.multicall(changes[name]) for name in names),
+                                        return_exceptions=True)
+        return dict(zip(names, outcomes))
+
+    def on_applied(self, changes, outcomes):
+        """Resultado de apply() (na thread do Tk): falhas nos limites globais são refeitas no próximo ciclo."""
+        for name, calls in changes.items():
+            outcome = (outcomes or {}).get(name)
+            if isinstance(outcome, BaseException) or outcome is None:
+                outcome = [{"error": str(outcome)}] * len(calls)
+            for (method, params), result in zip(calls, outcome):
+                if "error" not in result:
+                    continue
+                if method == "aria2.changeGlobalOption":
+                    Logger.log_warning(f"Falha ao aplicar o limite de banda{f' em {name}' if name else ''}: "
+                                       f"{result['error']}")
+                    self._applied_global.pop(name, None)
+                    self._signature = None
+                # changeOption falha em downloads que acabaram de terminar: nada a refazer
+
+    def reset(self):
+        """Esquece o que foi aplicado (ex.: após mudar classes ou reiniciar o Aria2)."""
+        self._signature = None
+
+    def status(self):
+        """Faixa em vigor e quantos ativos há em cada classe."""
+        counts = {cls: 0 for cls in self.classes}
+        for _name, gids in (self._signature[1] if self._signature else ()):
+            for _gid, cls in gids or ():
+                counts[cls] += 1
+        name, download, upload = self.current or self.window_at()
+        return {"window": name, "download": download, "upload": upload, "classes": counts}
+
+    @staticmethod
+    def format_limit(value):
+        if value <= 0:
+            return "sem limite"
+        if value >= 1024 ** 2:
+            return f"{value / 1024 ** 2:.1f} MB/s"
+        return f"{value / 1024:.0f} KB/s"
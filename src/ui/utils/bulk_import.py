@@ -0,0 +1,309 @@
+import asyncio
+import base64
+import csv
+import os
+from itertools import islice
+from urllib.parse import parse_qs, urlparse
+
+from src.ui.utils.file_utils import FileUtils
+from src.ui.utils.log_utils import Logger
+
+
+class ImportEntry:
+    """Um item da lista de importação: URIs (espelhos) ou arquivo .torrent/.metalink, com opções próprias."""
+
+    __slots__ = ("kind", "uris", "options", "line")
+
+    def __init__(self, kind, uris, options=None, line=0):
+        self.kind = kind  # "uri", "torrent" ou "metalink"
+        self.uris = uris
+        self.options = options or {}
+        self.line = line
+
+    @property
+    def key(self):
+        """Chave de deduplicação: info-hash para magnets, caminho para arquivos, senão a URI."""
+        first = self.uris[0]
+        if first.startswith("magnet:"):
+            for xt in parse_qs(urlparse(first).query).get("xt", []):
+                if xt.lower().startswith("urn:btih:"):
+                    return "btih:" + xt[9:].lower()
+        if self.kind != "uri":
+            return "file:" + os.path.abspath(first)
+        return first
+
+    def call(self, defaults=None):
+        """Chamada RPC (método, parâmetros) que adiciona este item."""
+        options = {**(defaults or {}), **self.options}
+        if self.kind == "uri":
+            return "aria2.addUri", [self.uris, options]
+        with open(self.uris[0], "rb") as f:
+            content = base64.b64encode(f.read()).decode("ascii")
+        if self.kind == "torrent":
+            return "aria2.addTorrent", [content, [], options]
+        return "aria2.addMetalink", [content, options]
+
+
+class ImportParser:
+    """
+    Leitura em fluxo de listas de downloads, sem carregar o arquivo inteiro.
+
+    Formatos aceitos:
+        - Texto / arquivo de entrada do aria2 (-i): uma entrada por linha, espelhos
+          separados por TAB; linhas seguintes iniciadas por espaço são opções
+          "chave=valor" da entrada anterior; "#" inicia comentário
+        - CSV: coluna url/uri/link (ou a primeira coluna) e demais colunas como opções
+        - O próprio .torrent / .metalink / .meta4
+    """
+
+    TORRENT_EXTENSIONS = (".torrent",)
+    METALINK_EXTENSIONS = (".metalink", ".meta4")
+    URL_COLUMNS = ("url", "uri", "link", "urls", "uris")
+
+    def __init__(self, path):
+        self.path = path
+        self.total_bytes = os.path.getsize(path)
+        self.bytes_read = 0
+        self.invalid = 0
+
+    def entries(self):
+        """Gera os ImportEntry do arquivo, um por vez."""
+        lower = self.path.lower()
+        if lower.endswith(self.TORRENT_EXTENSIONS + self.METALINK_EXTENSIONS):
+            self.bytes_read = self.total_bytes
+            yield self.make_entry([self.path], {}, 0)
+        elif lower.endswith(".csv"):
+            yield from self._parse_csv(self._lines())
+        else:
+            yield from self._parse_input_file(self._lines())
+
+    def _lines(self):
+        with open(self.path, "rb") as f:
+            for number, raw in enumerate(f, 1):
+                self.bytes_read += len(raw)
+                line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                if number == 1:
+                    line = line.lstrip("﻿")
+                yield line
+
+    def _parse_input_file(self, lines):
+        entry = None
+        for number, line in enumerate(lines, 1):
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            if line[0] in " \t":
+                # Opção da entrada anterior (formato do --input-file do aria2)
+                if entry is not None and "=" in stripped:
+                    key, value = stripped.split("=", 1)
+                    entry.options[key.strip()] = value.strip()
+                continue
+            if entry is not None:
+                yield entry
+            entry = self.make_entry([uri for uri in stripped.split("\t") if uri], {}, number)
+        if entry is not None:
+            yield entry
+
+    def _parse_csv(self, lines):
+        reader = csv.reader(lines)
+        header = next(reader, None)
+        if header is None:
+            return
+        names = [name.strip().lower() for name in header]
+        url_index = next((i for i, name in enumerate(names) if name in self.URL_COLUMNS), None)
+        if url_index is None:
+            # Sem cabeçalho: a primeira linha já é um dado e só a primeira coluna conta
+            url_index, names = 0, []
+            rows = [header]
+        else:
+            rows = []
+
+        for number, row in enumerate(self._chain(rows, reader), 1):
+            if len(row) <= url_index or not row[url_index].strip():
+                continue
+            options = {names[i]: value.strip() for i, value in enumerate(row)
+                       if i != url_index and i < len(names) and names[i] and value.strip()}
+            entry = self.make_entry(row[url_index].split(), options, number)
+            if entry is not None:
+                yield entry
+
+    @staticmethod
+    def _chain(first, rest):
+        yield from first
+        yield from rest
+
+    def make_entry(self, uris, options, line):
+        """Classifica o item (URI, .torrent ou .metalink); None se inválido."""
+        if not uris:
+            return None
+        first = uris[0]
+        lower = first.lower()
+        if "://" not in first and not lower.startswith("magnet:"):
+            path = os.path.expanduser(first)
+            if not os.path.isabs(path):
+                path = os.path.join(os.path.dirname(self.path), path)
+            if lower.endswith(self.TORRENT_EXTENSIONS) and os.path.isfile(path):
+                return ImportEntry("torrent", [path], options, line)
+            if lower.endswith(self.METALINK_EXTENSIONS) and os.path.isfile(path):
+                return ImportEntry("metalink", [path], options, line)
+            self.invalid += 1
+            Logger.log_warning(f"Importação: item inválido na linha {line}: {first}")
+            return None
+        return ImportEntry("uri", uris, options, line)
+
+
+class BulkImporter:
+    """
+    Importa milhares de downloads em lote.
+
+    O arquivo é lido em blocos de CHUNK_SIZE itens (fora do event loop);
+    cada bloco é deduplicado contra o próprio arquivo, a fila atual do Aria2
+    e o histórico, e enviado em um único system.multicall. No máximo
+    MAX_IN_FLIGHT blocos ficam pendentes ao mesmo tempo, o que também limita
+    quanto do arquivo está em memória.
+    """
+
+    CHUNK_SIZE = 500
+    MAX_IN_FLIGHT = 4
+    QUEUE_PAGE = 1000
+    MAX_ERRORS = 20  # erros guardados no resultado (os demais só contam)
+
+    def __init__(self, rpc, chunk_size=CHUNK_SIZE, max_in_flight=MAX_IN_FLIGHT):
+        """
+        Args:
+            rpc: AsyncAria2RPC usado para consultar a fila e enviar os lotes
+        """
+        self.rpc = rpc
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+
+    async def run(self, path, defaults=None, progress=None):
+        """
+        Executa a importação (corrotina para o loop do AsyncAria2RPC).
+
+        Args:
+            path: Arquivo de lista (.txt, .csv, entrada do aria2, .torrent, .metalink)
+            defaults: Opções aplicadas a todos os itens (as do item têm prioridade)
+            progress: Chamado com uma cópia das estatísticas a cada bloco (na thread do loop)
+
+        Returns:
+            Dicionário com added, duplicates, invalid, failed, bytes_read, total_bytes e errors
+        """
+        loop = asyncio.get_running_loop()
+        parser = ImportParser(path)
+        entries = parser.entries()
+        history = FileUtils.history_store()
+        stats = {"added": 0, "duplicates": 0, "invalid": 0, "failed": 0,
+                 "bytes_read": 0, "total_bytes": parser.total_bytes, "errors": []}
+
+        seen = await self.queue_keys()
+        Logger.log_info(f"Importação de {path}: {len(seen)} itens já na fila.")
+
+        tasks = set()
+        while True:
+            chunk = await loop.run_in_executor(None, lambda: list(islice(entries, self.chunk_size)))
+            stats["invalid"] = parser.invalid
+            stats["bytes_read"] = parser.bytes_read
+            if not chunk:
+                break
+
+            fresh = []
+            for entry in chunk:
+                key = entry.key
+                if key in seen:
+                    stats["duplicates"] += 1
+                else:
+                    seen.add(key)
+                    fresh.append(entry)
+
+            known = await loop.run_in_executor(None, self._known_in_history, history, fresh)
+            stats["duplicates"] += len(known)
+            fresh = [entry for entry in fresh if entry.key not in known]
+
+            if fresh:
+                calls = await loop.run_in_executor(None, self._build_calls, fresh, defaults, stats)
+                tasks.add(loop.create_task(self._submit(calls, fresh, stats, progress)))
+            elif progress:
+                progress(dict(stats))
+
+            if len(tasks) >= self.max_in_flight:
+                _done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        stats["bytes_read"] = parser.total_bytes
+        if progress:
+            progress(dict(stats))
+        Logger.log_info(f"Importação concluída: {stats['added']} adicionados, {stats['duplicates']} duplicados, "
+                        f"{stats['invalid']} inválidos, {stats['failed']} com erro.")
+        return stats
+
+    async def queue_keys(self):
+        """URIs e info-hashes de tudo que já está na fila do Aria2 (consulta paginada)."""
+        keys = ["infoHash", "files"]
+        stat = (await self.rpc.get_global_stat()).get("result") or {}
+        num_waiting = int(stat.get("numWaiting", 0))
+        num_stopped = int(stat.get("numStopped", 0))
+
+        found = set()
+        offset = 0
+        first = True
+        while first or offset < max(num_waiting, num_stopped):
+            calls = [("aria2.tellActive", [keys])] if first else []
+            if offset < num_waiting:
+                calls.append(("aria2.tellWaiting", [offset, self.QUEUE_PAGE, keys]))
+            if offset < num_stopped:
+                calls.append(("aria2.tellStopped", [offset, self.QUEUE_PAGE, keys]))
+            if calls:
+                for result in await self.rpc.multicall(calls):
+                    for status in result.get("result") or []:
+                        self._add_status_keys(found, status)
+            first = False
+            offset += self.QUEUE_PAGE
+        return found
+
+    @staticmethod
+    def _add_status_keys(found, status):
+        if status.get("infoHash"):
+            found.add("btih:" + status["infoHash"].lower())
+        for file in status.get("files") or []:
+            for uri in file.get("uris") or []:
+                found.add(uri.get("uri"))
+
+    @staticmethod
+    def _known_in_history(history, entries):
+        """Chaves do bloco já presentes no histórico (URL) ou nas conclusões (info-hash)."""
+        urls = [entry.key for entry in entries if not entry.key.startswith(("btih:", "file:"))]
+        hashes = [entry.key for entry in entries if entry.key.startswith("btih:")]
+        return history.known_urls(urls) | history.known_fingerprints(hashes)
+
+    def _build_calls(self, entries, defaults, stats):
+        """Monta as chamadas do bloco (lê os .torrent/.metalink aqui, fora do loop)."""
+        calls = []
+        for entry in entries:
+            try:
+                calls.append(entry.call(defaults))
+            except OSError as e:
+                calls.append(None)
+                self._record_error(stats, entry, str(e))
+        return calls
+
+    async def _submit(self, calls, entries, stats, progress):
+        pending = [(call, entry) for call, entry in zip(calls, entries) if call is not None]
+        stats["failed"] += len(calls) - len(pending)
+        results = await self.rpc.multicall([call for call, _entry in pending])
+        for (_call, entry), result in zip(pending, results):
+            if "error" in result:
+                stats["failed"] += 1
+                self._record_error(stats, entry, result["error"])
+            else:
+                stats["added"] += 1
+        if progress:
+            progress(dict(stats))
+
+    def _record_error(self, stats, entry, error):
+        if isinstance(error, dict):
+            error = error.get("message", error)
+        if len(stats["errors"]) < self.MAX_ERRORS:
+            stats["errors"].append(f"linha {entry.line}: {entry.uris[0]} ({error})")
+        Logger.log_warning(f"Importação: falha ao adicionar {entry.uris[0]}: {error}")
@@ -0,0 +1,88 @@
+import queue
+import threading
+
+from src.ui.utils.file_utils import FileUtils
+from src.ui.utils.log_utils import Logger
+
+
+class CompletionTracker:
+    """
+    Garante que cada download concluído seja processado uma única vez.
+
+    Cada conclusão é identificada por impressões digitais (GID, info-hash e
+    URL + caminho); as já processadas ficam gravadas no banco do histórico,
+    então também são reconhecidas após reiniciar o aplicativo ou o Aria2.
+    Os efeitos colaterais (histórico, notificação, som) rodam em uma thread
+    de trabalho, fora do loop do Tk.
+    """
+
+    def __init__(self, handler):
+        """
+        Args:
+            handler: Função chamada na thread de trabalho com (registro, impressões digitais)
+        """
+        self.handler = handler
+        self._seen = set()  # impressões digitais já aceitas nesta sessão
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="completion-worker", daemon=True)
+        self._worker.start()
+
+    @staticmethod
+    def fingerprints(record):
+        """Impressões digitais de um download concluído."""
+        fps = [f"gid:{record.key}"]  # o GID só é único dentro de uma instância
+        if record.info_hash:
+            fps.append(f"btih:{record.info_hash.lower()}")
+        if record.url:
+            fps.append(f"url:{record.url}|{record.path}|{record.total_length}")
+        return fps
+
+    def submit(self, record):
+        """
+        Enfileira a conclusão se ela ainda não foi processada.
+
+        Returns:
+            False se já havia sido vista nesta sessão; conclusões de sessões
+            anteriores são descartadas na thread de trabalho
+        """
+        fps = self.fingerprints(record)
+        with self._lock:
+            if self._seen.intersection(fps):
+                return False
+            self._seen.update(fps)
+        self._queue.put((self._process, (record, fps)))
+        return True
+
+    def defer(self, func, *args):
+        """Roda func(*args) na thread de trabalho (ex.: o fim de uma conclusão cuja verificação terminou)."""
+        self._queue.put((func, args))
+
+    def forget_url(self, url):
+        """
+        Esquece as conclusões já processadas da URL, para que um novo
+        download dela (ex.: baixar de novo um arquivo corrompido, no mesmo
+        caminho) volte a ser processado.
+        """
+        prefix = f"url:{url}|"
+        with self._lock:
+            self._seen = {fp for fp in self._seen if not fp.startswith(prefix)}
+        FileUtils.history_store().forget_completions(prefix)
+
+    def _process(self, record, fps):
+        try:
+            # A consulta ao banco também fica fora da thread da UI
+            if not FileUtils.history_store().has_completion(fps):
+                self.handler(record, fps)
+        except Exception as e:
+            Logger.log_error(f"Erro ao processar download concluído {record.gid}: {e}")
+
+    def _run(self):
+        while True:
+            func, args = self._queue.get()
+            try:
+                func(*args)
+            except Exception as e:
+                Logger.log_error(f"Erro na thread de conclusões: {e}")
+            finally:
+                self._queue.task_done()
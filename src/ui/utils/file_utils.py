@@ -10,6 +10,8 @@ import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+from src.ui.utils.log_utils import Logger
+
 class FileUtils:
     """
     Classe utilitária para operações com arquivos
@@ -18,12 +20,21 @@ class FileUtils:
     # Caminho do arquivo de configuração (salvo na pasta do usuário)
     CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".aria2_control_config.json")
 
+    # Histórico antigo (JSON), migrado automaticamente para o banco abaixo
     HISTORY_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "download_history.json")
 
+    HISTORY_DB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "download_history.db")
+
+    METRICS_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "metrics.tsdb")
+
+    AUTOTUNE_DB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "autotune.db")
+
+    QUEUE_DB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "queue.db")
+
     @staticmethod
     def save_config(data):
         """Salva as configurações do usuário em um arquivo JSON"""
-        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
+        with open(FileUtils.CONFIG_PATH, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=4)
 
     @staticmethod
@@ -331,6 +342,34 @@ class FileUtils:
         
         # Formatar com 2 casas decimais
         return f"{size_bytes:.2f} {units[unit_index]}"
+
+
+    @staticmethod
+    def parse_file_size(value) -> int:
+        """
+        Converte um tamanho na notação do Aria2 ("1G", "512M", "100K" ou bytes) para bytes
+
+        Args:
+            value: Texto ou número
+
+        Returns:
+            Tamanho em bytes
+        """
+        units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+        text = str(value).strip().upper().rstrip("B")
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(float(text or 0))
+
+
+    @staticmethod
+    def config_size(config, key, default, label=None) -> int:
+        """Tamanho salvo na configuração, em bytes; um valor inválido cai no padrão (com aviso)"""
+        try:
+            return FileUtils.parse_file_size(config.get(key, default))
+        except ValueError:
+            Logger.log_warning(f"Tamanho inválido em {label or key} ({config.get(key)!r}); usando {default}.")
+            return FileUtils.parse_file_size(default)
     
 
     @staticmethod
@@ -472,33 +511,139 @@ class FileUtils:
     
 
     @staticmethod
-    def save_download_history(entry: dict):
-        """Salva uma entrada no histórico de downloads"""
-        if not os.path.exists(FileUtils.HISTORY_PATH):
-            with open(FileUtils.HISTORY_PATH, "w", encoding="utf-8") as f:
-                json.dump([], f, indent=2)
-
-        with open(FileUtils.HISTORY_PATH, "r", encoding="utf-8") as f:
-            history = json.load(f)
+    def history_store():
+        """Retorna o armazenamento do histórico (SQLite), migrando o JSON antigo na primeira abertura"""
+        from src.ui.utils.history_store import HistoryStore
+        return HistoryStore.open(FileUtils.HISTORY_DB_PATH, FileUtils.HISTORY_PATH)
 
-        history.append(entry)
 
-        with open(FileUtils.HISTORY_PATH, "w", encoding="utf-8") as f:
-            json.dump(history, f, indent=2, ensure_ascii=False)
+    @staticmethod
+    def save_download_history(entry: dict, fingerprints=()):
+        """Salva uma entrada no histórico de downloads (inserção O(1), gravada em lote)"""
+        FileUtils.history_store().append(entry, fingerprints)
 
 
     @staticmethod
     def load_download_history():
         """Carrega o histórico de downloads (lista de dicionários)"""
-        if os.path.exists(FileUtils.HISTORY_PATH):
-            with open(FileUtils.HISTORY_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return []
+        return FileUtils.history_store().load_all()
+
+
+    @staticmethod
+    def query_download_history(search: str = "", field: str = "filename", mode: str = "prefix",
+                               sort: str = "finished_at", descending: bool = True,
+                               offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """
+        Consulta paginada e indexada do histórico de downloads
+
+        Args:
+            search: Texto buscado (vazio = tudo)
+            field: Campo da busca (filename, url ou url_host)
+            mode: "prefix" ou "contains"
+            sort: Coluna de ordenação
+            descending: Ordem decrescente
+            offset: Início da página
+            limit: Tamanho da página
+
+        Returns:
+            Dicionário com as entradas da página e o total que atende à busca
+        """
+        store = FileUtils.history_store()
+        return {
+            'items': store.query(search, field, mode, sort, descending, offset, limit),
+            'total': store.query_count(search, field, mode)
+        }
+
+
+    @staticmethod
+    def clear_download_history():
+        """Remove todas as entradas do histórico de downloads"""
+        FileUtils.history_store().clear()
+
+
+    @staticmethod
+    def get_metrics_settings():
+        """Retorna se as métricas estão ativas (desligadas por padrão) e a porta do endpoint local"""
+        config = FileUtils.load_config()
+        return {
+            "enabled": bool(config.get("metrics_enabled", False)),
+            "port": int(config.get("metrics_port", 9464)),
+            "path": config.get("metrics_path", FileUtils.METRICS_PATH)
+        }
+
+
+    @staticmethod
+    def get_autotune_settings():
+        """
+        Retorna se o ajuste automático por host está ativo, a taxa de exploração e o banco.
+
+        Desligado por padrão: ligado, cada download leva conexões/segmentos
+        próprios, que substituem os escolhidos nas Configurações.
+        """
+        config = FileUtils.load_config()
+        return {
+            "enabled": bool(config.get("autotune_enabled", False)),
+            "epsilon": float(config.get("autotune_epsilon", 0.1)),
+            "path": config.get("autotune_path", FileUtils.AUTOTUNE_DB_PATH)
+        }
+
+
+    @staticmethod
+    def get_bandwidth_settings():
+        """
+        Retorna o calendário de banda e as classes de prioridade.
+
+        "bandwidth_schedule" é uma lista de {"name", "days", "start", "end",
+        "download", "upload"} (ex.: "mon-fri", "09:00", "18:00", "2M", "256K");
+        sem faixas, o agendador fica desligado e os limites do Aria2 não são tocados.
+        """
+        config = FileUtils.load_config()
+        schedule = [entry for entry in config.get("bandwidth_schedule") or [] if isinstance(entry, dict)]
+        return {
+            "enabled": bool(config.get("bandwidth_enabled", True)) and bool(schedule),
+            "schedule": schedule,
+            "default": config.get("bandwidth_default") or {"download": "0", "upload": "0"},
+            "classes": config.get("bandwidth_classes") or {"alta": 4, "normal": 2, "baixa": 1},
+            "default_class": config.get("bandwidth_default_class", "normal"),
+            "path": config.get("queue_path", FileUtils.QUEUE_DB_PATH)
+        }
+
+
+    @staticmethod
+    def get_queue_settings():
+        """Retorna a política da fila de espera e o ajuste de max-concurrent-downloads"""
+        config = FileUtils.load_config()
+        return {
+            "enabled": bool(config.get("queue_enabled", True)),
+            "policy": config.get("queue_policy", "fifo"),
+            "large_size": FileUtils.config_size(config, "queue_large_size", "1G"),
+            "extra_slots": int(config.get("queue_extra_slots", 2)),
+            "path": config.get("queue_path", FileUtils.QUEUE_DB_PATH)
+        }
+
+
+    @staticmethod
+    def get_integrity_settings():
+        """Retorna se a verificação pós-download está ligada, os processos do pool e o bloco de leitura"""
+        config = FileUtils.load_config()
+        return {
+            "enabled": bool(config.get("integrity_check", False)),
+            "workers": int(config.get("integrity_workers", 0)) or None,
+            "chunk_size": FileUtils.parse_file_size(config.get("integrity_chunk_size", "8M"))
+        }
+
+
+    @staticmethod
+    def set_integrity_check(enabled: bool):
+        """Grava o estado da opção de verificação de integridade após o download"""
+        config = FileUtils.load_config()
+        config["integrity_check"] = bool(enabled)
+        FileUtils.save_config(config)
 
 
     @staticmethod
     def get_rpc_settings():
-        """Retorna host, porta e token salvos, ou valores padrão"""
+        """Retorna host, porta, token e parâmetros de transporte salvos, ou valores padrão"""
         config = FileUtils.load_config()
 
         host = config.get("rpc_url", "http://localhost")
@@ -507,7 +652,36 @@ class FileUtils:
 
         return {
             "url": f"{host}:{port}/jsonrpc",
-            "token": secret
+            "token": secret,
+            "connect_timeout": float(config.get("rpc_connect_timeout", 3.05)),
+            "read_timeout": float(config.get("rpc_read_timeout", 10)),
+            "retries": int(config.get("rpc_retries", 2)),
+            "pool_size": int(config.get("rpc_pool_size", 4))
         }
 
 
+    @staticmethod
+    def get_fleet_settings():
+        """
+        Retorna as instâncias do Aria2 controladas e a política de distribuição.
+
+        "aria2_instances" é uma lista de {"name", "url", "token"}; sem ela,
+        há uma única instância, a de get_rpc_settings (com nome vazio).
+        """
+        config = FileUtils.load_config()
+        rpc = FileUtils.get_rpc_settings()
+        instances = []
+        for index, entry in enumerate(config.get("aria2_instances") or []):
+            if not isinstance(entry, dict) or not entry.get("url"):
+                continue
+            instances.append({
+                "name": str(entry.get("name") or f"aria2-{index + 1}").replace("@", "_"),
+                "url": entry["url"],
+                "token": entry.get("token", rpc["token"]),
+            })
+        if not instances:
+            instances = [{"name": "", "url": rpc["url"], "token": rpc["token"]}]
+        return {
+            "instances": instances,
+            "policy": config.get("placement_policy", "least_loaded"),
+        }
@@ -0,0 +1,332 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from urllib.parse import urlparse
+
+from src.ui.utils.log_utils import Logger
+
+
+class HistoryStore:
+    """
+    Histórico de downloads em SQLite (modo WAL), só com inserções.
+
+    Cada conclusão vira um INSERT O(1) em vez de reescrever o arquivo inteiro.
+    As entradas ficam num buffer e são gravadas em lote (uma transação a cada
+    FLUSH_SIZE entradas ou FLUSH_INTERVAL segundos); com WAL e
+    synchronous=NORMAL o fsync acontece nos checkpoints. Se o aplicativo
+    cair, perde-se no máximo o lote ainda em memória; numa queda de energia
+    ou do sistema, as transações confirmadas desde o último checkpoint
+    também podem ser desfeitas. Em nenhum caso o banco fica corrompido.
+    """
+
+    FLUSH_SIZE = 50
+    FLUSH_INTERVAL = 2.0
+    COMPACT_EVERY = 1000  # linhas gravadas entre compactações periódicas
+    # Campos com coluna própria; os demais vão para "extra" (JSON)
+    COLUMNS = ("filename", "url", "path", "status", "finished_at")
+    INSERT_SQL = ("INSERT INTO history (filename, url, path, status, finished_at, extra, url_host)"
+                  " VALUES (?, ?, ?, ?, ?, ?, ?)")
+    SELECT_SQL = "SELECT filename, url, path, status, finished_at, extra, id FROM history"
+
+    # Colunas aceitas para ordenação e busca na consulta paginada
+    SORTABLE = ("finished_at", "filename", "status", "path", "url_host")
+    SEARCHABLE = ("filename", "url", "url_host")
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_path, legacy_json_path=None):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.RLock()
+        self._pending = []
+        self._timer = None
+        self._since_compact = 0
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " filename TEXT, url TEXT, path TEXT, status TEXT, finished_at TEXT,"
+            " extra TEXT)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._ensure_indexes()
+        # Impressões digitais (gid, info-hash, url) de conclusões já processadas
+        self.conn.execute("CREATE TABLE IF NOT EXISTS completions (fingerprint TEXT PRIMARY KEY)")
+
+        if legacy_json_path:
+            self.migrate_json(legacy_json_path)
+        self.compact()
+
+    @classmethod
+    def open(cls, db_path, legacy_json_path=None):
+        """Retorna a instância compartilhada para o arquivo (uma conexão por banco)."""
+        with cls._instances_lock:
+            store = cls._instances.get(db_path)
+            if store is None:
+                store = cls(db_path, legacy_json_path)
+                cls._instances[db_path] = store
+                atexit.register(store.close)
+            return store
+
+    # --- escrita -----------------------------------------------------------
+
+    def append(self, entry, fingerprints=()):
+        """
+        Enfileira uma entrada; é gravada no próximo lote.
+
+        As impressões digitais informadas são gravadas na mesma transação,
+        marcando a conclusão como processada junto com a entrada.
+        """
+        with self._lock:
+            self._pending.append((self._to_row(entry), tuple(fingerprints)))
+            if len(self._pending) >= self.FLUSH_SIZE:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.FLUSH_INTERVAL, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Grava o buffer pendente em uma única transação."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            rows = [row for row, _fingerprints in pending]
+            fingerprints = [(fp,) for _row, fps in pending for fp in fps]
+            try:
+                self.conn.execute("BEGIN")
+                self.conn.executemany(
+                    self.INSERT_SQL,
+                    rows
+                )
+                self.conn.executemany("INSERT OR IGNORE INTO completions (fingerprint) VALUES (?)", fingerprints)
+                self.conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                self.conn.execute("ROLLBACK")
+                self._pending = pending + self._pending
+                Logger.log_error(f"Erro ao gravar histórico: {e}")
+                return
+
+            self._since_compact += len(rows)
+            if self._since_compact >= self.COMPACT_EVERY:
+                self.compact()
+
+    def clear(self):
+        """
+        Remove todas as entradas e compacta o arquivo. As conclusões já
+        processadas continuam marcadas, para não voltarem ao histórico.
+        """
+        with self._lock:
+            self.flush()
+            self.conn.execute("DELETE FROM history")
+            self.compact(force=True)
+
+    # --- leitura -----------------------------------------------------------
+
+    def load_all(self):
+        """Retorna todas as entradas (lista de dicionários), da mais antiga à mais nova."""
+        with self._lock:
+            self.flush()
+            cursor = self.conn.execute(self.SELECT_SQL + " ORDER BY id")
+            return [self._from_row(row) for row in cursor]
+
+    def query(self, search="", field="filename", mode="prefix", sort="finished_at",
+              descending=True, offset=0, limit=100):
+        """
+        Consulta paginada do histórico.
+
+        Args:
+            search: Texto buscado (vazio = tudo)
+            field: Campo da busca (filename, url ou url_host)
+            mode: "prefix" (usa índice) ou "contains" (substring)
+            sort: Coluna de ordenação (ver SORTABLE)
+            descending: Ordem decrescente
+            offset: Quantas entradas pular
+            limit: Tamanho da página
+
+        Returns:
+            Lista de dicionários (com "id") da página pedida
+        """
+        if sort not in self.SORTABLE:
+            raise ValueError(f"Coluna de ordenação inválida: {sort}")
+        where, params = self._where(search, field, mode)
+        direction = "DESC" if descending else "ASC"
+        collate = " COLLATE NOCASE" if sort in ("filename", "url_host") else ""
+        sql = (f"{self.SELECT_SQL}{where} ORDER BY {sort}{collate} {direction}, id {direction}"
+               " LIMIT ? OFFSET ?")
+        with self._lock:
+            self.flush()
+            cursor = self.conn.execute(sql, params + [int(limit), int(offset)])
+            return [self._from_row(row) for row in cursor]
+
+    def query_count(self, search="", field="filename", mode="prefix"):
+        """Total de entradas que atendem à busca (para a paginação)."""
+        where, params = self._where(search, field, mode)
+        with self._lock:
+            self.flush()
+            return self.conn.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+    def _where(self, search, field, mode):
+        search = (search or "").strip()
+        if not search:
+            return "", []
+        if field not in self.SEARCHABLE:
+            raise ValueError(f"Campo de busca inválido: {field}")
+        if mode == "prefix":
+            # Faixa [prefixo, prefixo + maior caractere) aproveita o índice NOCASE
+            return (f" WHERE {field} >= ? COLLATE NOCASE AND {field} < ? COLLATE NOCASE",
+                    [search, search + "\U0010ffff"])
+        return f" WHERE instr(lower({field}), ?) > 0", [search.lower()]
+
+    def has_completion(self, fingerprints):
+        """Indica se alguma das impressões digitais já foi registrada (inclui o lote pendente)."""
+        fingerprints = list(fingerprints)
+        if not fingerprints:
+            return False
+        with self._lock:
+            pending = {fp for _row, fps in self._pending for fp in fps}
+            if pending.intersection(fingerprints):
+                return True
+            placeholders = ", ".join("?" * len(fingerprints))
+            row = self.conn.execute(
+                f"SELECT 1 FROM completions WHERE fingerprint IN ({placeholders}) LIMIT 1", fingerprints
+            ).fetchone()
+            return row is not None
+
+    def forget_completions(self, prefix):
+        """Remove as impressões digitais que começam com o prefixo (inclui o lote pendente)."""
+        with self._lock:
+            self.flush()
+            try:
+                self.conn.execute("DELETE FROM completions WHERE substr(fingerprint, 1, ?) = ?",
+                                  (len(prefix), prefix))
+            except sqlite3.Error as e:
+                Logger.log_warning(f"Falha ao descartar conclusões processadas: {e}")
+
+    def known_urls(self, urls):
+        """Subconjunto das URLs que já constam no histórico (consulta em blocos)."""
+        return self._existing("SELECT url FROM history WHERE url IN ({})", urls)
+
+    def known_fingerprints(self, fingerprints):
+        """Subconjunto das impressões digitais já registradas como concluídas."""
+        return self._existing("SELECT fingerprint FROM completions WHERE fingerprint IN ({})", fingerprints)
+
+    def _existing(self, sql, values, chunk=500):
+        values = list(values)
+        found = set()
+        with self._lock:
+            self.flush()
+            for start in range(0, len(values), chunk):
+                part = values[start:start + chunk]
+                cursor = self.conn.execute(sql.format(", ".join("?" * len(part))), part)
+                found.update(row[0] for row in cursor)
+        return found
+
+    def count(self):
+        with self._lock:
+            self.flush()
+            return self.conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    # --- manutenção --------------------------------------------------------
+
+    def compact(self, force=False):
+        """
+        Checkpoint do WAL para o banco principal e VACUUM quando há muito
+        espaço livre (após limpezas). Chamado ao abrir, ao limpar, a cada
+        COMPACT_EVERY linhas gravadas e ao fechar.
+        """
+        with self._lock:
+            self._since_compact = 0
+            try:
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                free = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+                total = self.conn.execute("PRAGMA page_count").fetchone()[0]
+                if force or (total and free / total > 0.25):
+                    self.conn.execute("VACUUM")
+            except sqlite3.Error as e:
+                Logger.log_warning(f"Falha ao compactar histórico: {e}")
+
+    def migrate_json(self, json_path):
+        """Importa o histórico antigo (download_history.json) uma única vez."""
+        if not os.path.isfile(json_path):
+            return
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            Logger.log_warning(f"Histórico JSON antigo ilegível, não migrado: {e}")
+            return
+
+        rows = [self._to_row(entry) for entry in entries if isinstance(entry, dict)]
+        with self._lock:
+            # A marca de migração vai na mesma transação: uma queda antes do
+            # rename não duplica as entradas na próxima abertura
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone() is None:
+                self.conn.execute("BEGIN")
+                self.conn.executemany(
+                    self.INSERT_SQL,
+                    rows
+                )
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_json', ?)", (json_path,))
+                self.conn.execute("COMMIT")
+        os.replace(json_path, json_path + ".migrated")
+        Logger.log_info(f"Histórico migrado para SQLite: {len(rows)} entradas.")
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            try:
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self.conn.close()
+            except sqlite3.Error:
+                pass
+
+    # --- conversão ---------------------------------------------------------
+
+    def _ensure_indexes(self):
+        """Cria a coluna url_host (bancos antigos) e os índices de consulta."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(history)")}
+        if "url_host" not in columns:
+            self.conn.execute("ALTER TABLE history ADD COLUMN url_host TEXT")
+            rows = self.conn.execute("SELECT id, url FROM history").fetchall()
+            self.conn.execute("BEGIN")
+            self.conn.executemany("UPDATE history SET url_host = ? WHERE id = ?",
+                                  [(self._host(url), row_id) for row_id, url in rows])
+            self.conn.execute("COMMIT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_history_finished_at ON history (finished_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_history_filename ON history (filename COLLATE NOCASE)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_history_url_host ON history (url_host COLLATE NOCASE)")
+
+    @staticmethod
+    def _host(url):
+        try:
+            return (urlparse(url or "").hostname or "").lower()
+        except ValueError:
+            return ""
+
+    @classmethod
+    def _to_row(cls, entry):
+        extra = {k: v for k, v in entry.items() if k not in cls.COLUMNS}
+        return tuple(entry.get(column, "") for column in cls.COLUMNS) + \
+            (json.dumps(extra, ensure_ascii=False) if extra else None, cls._host(entry.get("url")))
+
+    @classmethod
+    def _from_row(cls, row):
+        entry = dict(zip(cls.COLUMNS, row[:5]))
+        if row[5]:
+            entry.update(json.loads(row[5]))
+        entry["id"] = row[6]
+        return entry
@@ -0,0 +1,348 @@
+import hashlib
+import mmap
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.ui.utils.log_utils import Logger
+
+
+def hash_file(path, algorithms=("sha-256",), chunk_size=8 * 1024 * 1024):
+    """
+    Resumos do arquivo em uma única leitura sequencial por mmap, em blocos.
+
+    Função de módulo para poder rodar nos processos do pool.
+
+    Returns:
+        {algoritmo: resumo hexadecimal}
+    """
+    hashers = [(algorithm, hashlib.new(IntegrityChecker.ALGORITHMS[algorithm])) for algorithm in algorithms]
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:  # mmap não aceita arquivos vazios
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                with memoryview(mapped) as view:
+                    for start in range(0, size, chunk_size):
+                        # Fatias do mapeamento, sem cópia; update() solta o GIL
+                        with view[start:start + chunk_size] as block:
+                            for _algorithm, hasher in hashers:
+                                hasher.update(block)
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers}
+
+
+class IntegrityChecker:
+    """
+    Verificação de integridade dos downloads concluídos.
+
+    O checksum esperado vem, nesta ordem, do valor informado ao adicionar o
+    download, da opção "checksum" do próprio download no Aria2
+    (aria2.getOption) ou do hash do arquivo em um .metalink/.meta4
+    importado. Sem nenhum deles, o SHA-256 calculado é só registrado.
+
+    Os resumos são calculados em um pool de processos, com leituras
+    sequenciais por mmap: cada arquivo ocupa um núcleo (SHA-256, SHA-1 e
+    MD5 são sequenciais por definição), e os arquivos de um download com
+    vários e os de downloads terminando juntos são verificados em
+    paralelo. verify() só dispara os cálculos; o resultado chega por
+    callback, sem prender a thread de conclusões.
+    """
+
+    # Nome usado pelo Aria2/Metalink -> nome no hashlib
+    ALGORITHMS = {"sha-256": "sha256", "sha-1": "sha1", "md5": "md5"}
+    ALIASES = {"sha256": "sha-256", "sha-256": "sha-256", "sha1": "sha-1", "sha-1": "sha-1", "md5": "md5"}
+    DIGEST_LENGTHS = {64: "sha-256", 40: "sha-1", 32: "md5"}
+    DEFAULT_ALGORITHM = "sha-256"
+    METALINK_EXTENSIONS = (".metalink", ".meta4")
+
+    def __init__(self, controller, store=None, workers=None, chunk_size=8 * 1024 * 1024):
+        """
+        Args:
+            controller: FleetController (consulta da opção checksum no Aria2)
+            store: QueueStore com os checksums informados e os dos Metalinks (opcional)
+            workers: Processos do pool (padrão: um por núcleo)
+            chunk_size: Tamanho dos blocos lidos do mapeamento
+        """
+        self.controller = controller
+        self.store = store
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor = None
+        self._lock = threading.Lock()
+        self._expected = {}  # chave -> checksum informado, entregue quando o download sai da lista
+
+    # --- checksums -----------------------------------------------------------------
+
+    @classmethod
+    def parse_checksum(cls, text):
+        """
+        "sha-256=<hex>" (formato do Aria2), "sha256:<hex>" ou só o resumo
+        (algoritmo pelo tamanho).
+
+        Returns:
+            (algoritmo, resumo em minúsculas)
+        """
+        text = str(text).strip()
+        for sep in ("=", ":"):
+            if sep in text:
+                name, _sep, digest = text.partition(sep)
+                algorithm = cls.ALIASES.get(name.strip().lower())
+                if algorithm is None:
+                    raise ValueError(f"Algoritmo não suportado: {name.strip()}")
+                break
+        else:
+            digest = text
+            algorithm = cls.DIGEST_LENGTHS.get(len(digest))
+            if algorithm is None:
+                raise ValueError("Resumo com tamanho inesperado (use sha-256=, sha-1= ou md5=)")
+        digest = digest.strip().lower()
+        expected = hashlib.new(cls.ALGORITHMS[algorithm]).digest_size * 2
+        if len(digest) != expected or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Resumo {algorithm} inválido")
+        return algorithm, digest
+
+    @classmethod
+    def format_checksum(cls, algorithm, digest):
+        return f"{algorithm}={digest}"
+
+    @classmethod
+    def metalink_checksums(cls, path):
+        """
+        Checksums dos arquivos de um .metalink (v3) ou .meta4, o mais forte de cada um.
+
+        Returns:
+            [(nome, tamanho ou -1, "algoritmo=resumo")]
+        """
+        items = []
+        for _event, element in ET.iterparse(path):
+            if element.tag.rsplit("}", 1)[-1] != "file":
+                continue
+            size = -1
+            hashes = {}
+            for child in element.iter():
+                tag = child.tag.rsplit("}", 1)[-1]
+                if tag == "size" and (child.text or "").strip().isdigit():
+                    size = int(child.text)
+                elif tag == "hash" and child.get("type") and child.text:
+                    # Hashes de pedaços não têm "type" (fica no elemento pieces)
+                    algorithm = cls.ALIASES.get(child.get("type").lower())
+                    if algorithm:
+                        hashes[algorithm] = child.text.strip().lower()
+            for algorithm in cls.ALGORITHMS:
+                if algorithm in hashes:
+                    items.append((os.path.basename(element.get("name", "")), size,
+                                  cls.format_checksum(algorithm, hashes[algorithm])))
+                    break
+            element.clear()
+        return items
+
+    def register_metalink(self, path):
+        """Guarda os checksums de um Metalink para conferir os arquivos quando terminarem."""
+        if self.store is None:
+            return 0
+        try:
+            items = self.metalink_checksums(path)
+        except (OSError, ET.ParseError) as e:
+            Logger.log_warning(f"Checksums do Metalink não lidos ({path}): {e}")
+            return 0
+        self.store.set_file_checksums(items)
+        return len(items)
+
+    def expect(self, key, checksum):
+        """Checksum informado para o download (chamado quando ele sai da lista)."""
+        with self._lock:
+            self._expected[key] = checksum
+
+    def wants(self, key):
+        """Indica se o download tem checksum informado (verificado mesmo com a opção desligada)."""
+        with self._lock:
+            return key in self._expected
+
+    def lookup(self, record):
+        """
+        Arquivos do download e a opção checksum dele no Aria2, em um único multicall.
+
+        Returns:
+            (caminhos dos arquivos selecionados, checksum do Aria2 ou None)
+        """
+        try:
+            member, gid = self.controller.member(record.key)
+            files, option = member.rpc.multicall([("aria2.tellStatus", [gid, ["files"]]),
+                                                  ("aria2.getOption", [gid])])
+        except (KeyError, AttributeError, ValueError) as e:
+            Logger.log_warning(f"Arquivos e opções de {record.gid} indisponíveis: {e}")
+            return [record.path], None
+        paths = [file["path"] for file in (files.get("result") or {}).get("files") or []
+                 if file.get("path") and file.get("selected", "true") == "true"]
+        return paths or [record.path], (option.get("result") or {}).get("checksum") or None
+
+    def expected_for(self, record, aria2_checksum=None):
+        """
+        Checksum esperado do download (de um único arquivo) e a origem dele.
+
+        Returns:
+            ("algoritmo=resumo", origem) ou (None, None)
+        """
+        with self._lock:
+            checksum = self._expected.pop(record.key, None)
+        if checksum:
+            return checksum, "informado"
+        if aria2_checksum:
+            return aria2_checksum, "aria2"
+        if self.store is not None and record.path:
+            checksum = self.store.take_file_checksum(os.path.basename(record.path), record.total_length)
+            if checksum:
+                return checksum, "metalink"
+        return None, None
+
+    # --- verificação -------------------------------------------------------------
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def submit(self, jobs, callback):
+        """
+        Calcula resumos no pool sem bloquear: callback(resultados) é chamado
+        (na thread do pool) quando todos os arquivos terminarem.
+
+        Args:
+            jobs: Lista de (caminho, algoritmos)
+            callback: Recebe a lista, na ordem de jobs, de {algoritmo: resumo} ou da exceção do arquivo
+        """
+        results = [None] * len(jobs)
+        remaining = [len(jobs)]
+        lock = threading.Lock()
+
+        def done(index, future):
+            try:
+                outcome = future.result()
+            except BrokenProcessPool as e:
+                self._reset_executor()
+                outcome = e
+            except Exception as e:  # erros de leitura chegam do processo filho como exceções comuns
+                outcome = e
+            with lock:
+                results[index] = outcome
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                callback(results)
+
+        if not jobs:
+            callback(results)
+        for index, (path, algorithms) in enumerate(jobs):
+            try:
+                future = self.executor.submit(hash_file, path, tuple(algorithms), self.chunk_size)
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._reset_executor()
+                future = Future()
+                future.set_exception(e)
+            future.add_done_callback(lambda future, index=index: done(index, future))
+
+    def hash_many(self, jobs):
+        """Como submit(), mas espera os resultados."""
+        finished = threading.Event()
+        outcome = []
+        self.submit(jobs, lambda results: (outcome.extend(results), finished.set()))
+        finished.wait()
+        return outcome
+
+    def verify(self, record, callback):
+        """
+        Dispara a verificação de todos os arquivos do download; não espera os resumos.
+
+        Um checksum esperado (informado, do Aria2 ou de Metalink) vale para
+        downloads de um único arquivo; nos de vários (torrents, cujos
+        pedaços o próprio Aria2 já confere), o SHA-256 de cada arquivo é
+        só registrado.
+
+        Args:
+            callback: Recebe, na thread do pool, os campos para a entrada do
+                histórico: integrity ("ok", "falhou", "sem checksum" ou
+                "erro"), checksum calculado, expected e a origem
+        """
+        paths, aria2_checksum = self.lookup(record)
+        checksum, source = self.expected_for(record, aria2_checksum)
+        if checksum and len(paths) > 1:
+            Logger.log_warning(f"Checksum {source} ignorado: {record.name} tem {len(paths)} arquivos")
+            checksum, source = None, None
+        try:
+            algorithm, expected = self.parse_checksum(checksum) if checksum else (self.DEFAULT_ALGORITHM, None)
+        except ValueError as e:
+            Logger.log_warning(f"Checksum {source} inválido para {record.name}: {e}")
+            algorithm, expected = self.DEFAULT_ALGORITHM, None
+        started = time.perf_counter()
+
+        def finished(outcomes):
+            try:
+                callback(self._result(record, paths, algorithm, expected, source, outcomes,
+                                      time.perf_counter() - started))
+            except Exception as e:
+                Logger.log_error(f"Erro ao concluir a verificação de {record.name}: {e}")
+
+        self.submit([(path, (algorithm,)) for path in paths], finished)
+
+    def _result(self, record, paths, algorithm, expected, source, outcomes, elapsed):
+        errors = [(path, outcome) for path, outcome in zip(paths, outcomes) if isinstance(outcome, Exception)]
+        for path, error in errors:
+            Logger.log_error(f"Falha ao verificar {path}: {error}")
+        digests = [outcome[algorithm] for outcome in outcomes if not isinstance(outcome, Exception)]
+        if expected is not None and digests and digests[0] != expected:
+            integrity = "falhou"
+        elif errors:
+            integrity = "erro"
+        elif expected is not None:
+            integrity = "ok"
+        else:
+            integrity = "sem checksum"
+
+        result = {"integrity": integrity, "verify_seconds": round(elapsed, 3)}
+        if errors:
+            result["integrity_error"] = str(errors[0][1])
+        if len(paths) == 1:
+            if digests:
+                result["checksum"] = self.format_checksum(algorithm, digests[0])
+        else:
+            result["files"] = [{"path": path, "checksum": None if isinstance(outcome, Exception)
+                                else self.format_checksum(algorithm, outcome[algorithm])}
+                               for path, outcome in zip(paths, outcomes)]
+        if expected is not None:
+            result["expected"] = self.format_checksum(algorithm, expected)
+            result["checksum_source"] = source
+
+        size = record.total_length or 0
+        rate = f", {size / elapsed / 1024 ** 2:.0f} MB/s" if size and elapsed > 0 and not errors else ""
+        count = f", {len(paths)} arquivos" if len(paths) > 1 else ""
+        log = Logger.log_error if integrity in ("falhou", "erro") else Logger.log_info
+        log(f"Integridade de {record.name}: {integrity} ({algorithm}{f', {source}' if source else ''}{count}{rate})")
+        return result
+
+    @staticmethod
+    def requeue_options(entry):
+        """Opções para baixar de novo o arquivo de uma entrada do histórico, sobrescrevendo-o."""
+        options = {"allow-overwrite": "true"}
+        if entry.get("path"):
+            options["dir"] = entry["path"]
+        if entry.get("filename"):
+            options["out"] = entry["filename"]
+        return options
+
+    def _reset_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
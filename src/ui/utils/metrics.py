@@ -0,0 +1,220 @@
+import bisect
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.ui.utils.log_utils import Logger
+
+
+class Histogram:
+    """Histograma de latências com buckets fixos (formato do Prometheus)."""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # o último é +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Quantil aproximado pelo limite superior do bucket."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """
+    Registro de métricas do aplicativo (vazão, fila, latência RPC e da UI).
+
+    As observações são O(1) e protegidas por um lock; a cada
+    SAMPLE_INTERVAL segundos uma amostra vai para a série temporal em disco
+    (TimeSeriesStore). O MetricsServer expõe tudo no formato texto do
+    Prometheus e em CSV.
+    """
+
+    SAMPLE_INTERVAL = 5.0
+
+    _lock = threading.Lock()
+    rpc_latency = {}  # método -> Histogram (segundos)
+    rpc_errors = {}  # método -> contador
+    tick_latency = Histogram()
+    gauges = {"download_speed": 0.0, "upload_speed": 0.0, "num_active": 0, "num_waiting": 0, "num_stopped": 0}
+    started_at = time.time()
+    store = None
+    _last_sample = 0.0
+    _last_tick_ms = 0.0
+
+    @classmethod
+    def setup(cls, store):
+        """Associa a série temporal em disco (TimeSeriesStore)."""
+        cls.store = store
+
+    @classmethod
+    def observe_rpc(cls, method, seconds, error=False):
+        with cls._lock:
+            histogram = cls.rpc_latency.get(method)
+            if histogram is None:
+                histogram = cls.rpc_latency[method] = Histogram()
+            histogram.observe(seconds)
+            if error:
+                cls.rpc_errors[method] = cls.rpc_errors.get(method, 0) + 1
+
+    @classmethod
+    def observe_tick(cls, seconds):
+        with cls._lock:
+            cls.tick_latency.observe(seconds)
+            cls._last_tick_ms = seconds * 1000
+
+    @classmethod
+    def sample_global(cls, stat):
+        """Atualiza os medidores a partir do getGlobalStat e grava na série a cada SAMPLE_INTERVAL."""
+        now = time.time()
+        with cls._lock:
+            gauges = cls.gauges
+            gauges["download_speed"] = int(stat.get("downloadSpeed", 0))
+            gauges["upload_speed"] = int(stat.get("uploadSpeed", 0))
+            gauges["num_active"] = int(stat.get("numActive", 0))
+            gauges["num_waiting"] = int(stat.get("numWaiting", 0))
+            gauges["num_stopped"] = int(stat.get("numStopped", 0))
+            if cls.store is None or now - cls._last_sample < cls.SAMPLE_INTERVAL:
+                return
+            cls._last_sample = now
+            sample = (now, gauges["download_speed"], gauges["upload_speed"], gauges["num_active"],
+                      gauges["num_waiting"], gauges["num_stopped"], cls._last_tick_ms)
+        try:
+            cls.store.append(*sample)
+        except OSError as e:
+            Logger.log_warning(f"Falha ao gravar métricas: {e}")
+
+    # --- exportação -------------------------------------------------------
+
+    @classmethod
+    def prometheus_text(cls):
+        """Métricas no formato de exposição texto do Prometheus."""
+        lines = []
+        with cls._lock:
+            gauges = dict(cls.gauges)
+            rpc = {method: cls._copy(histogram) for method, histogram in cls.rpc_latency.items()}
+            errors = dict(cls.rpc_errors)
+            tick = cls._copy(cls.tick_latency)
+
+        def gauge(name, help_text, value):
+            lines.extend((f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"))
+
+        gauge("aria2_download_speed_bytes", "Velocidade global de download (B/s).", gauges["download_speed"])
+        gauge("aria2_upload_speed_bytes", "Velocidade global de upload (B/s).", gauges["upload_speed"])
+        gauge("aria2_active_downloads", "Downloads ativos.", gauges["num_active"])
+        gauge("aria2_waiting_downloads", "Downloads em espera.", gauges["num_waiting"])
+        gauge("aria2_stopped_downloads", "Downloads parados.", gauges["num_stopped"])
+        gauge("aria2control_uptime_seconds", "Tempo desde o início do aplicativo.", round(time.time() - cls.started_at, 1))
+
+        lines.extend(("# HELP aria2_rpc_latency_seconds Latência das chamadas JSON-RPC por método.",
+                      "# TYPE aria2_rpc_latency_seconds histogram"))
+        for method, histogram in sorted(rpc.items()):
+            lines.extend(cls._histogram_lines("aria2_rpc_latency_seconds", histogram, f'method="{method}"'))
+
+        lines.extend(("# HELP aria2_rpc_errors_total Chamadas JSON-RPC com erro de transporte.",
+                      "# TYPE aria2_rpc_errors_total counter"))
+        for method, count in sorted(errors.items()):
+            lines.append(f'aria2_rpc_errors_total{{method="{method}"}} {count}')
+
+        lines.extend(("# HELP aria2control_ui_tick_seconds Duração da atualização da lista na UI.",
+                      "# TYPE aria2control_ui_tick_seconds histogram"))
+        lines.extend(cls._histogram_lines("aria2control_ui_tick_seconds", tick, ""))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _copy(histogram):
+        copy = Histogram(histogram.buckets)
+        copy.counts = list(histogram.counts)
+        copy.sum = histogram.sum
+        copy.count = histogram.count
+        return copy
+
+    @staticmethod
+    def _histogram_lines(name, histogram, labels):
+        prefix = labels + "," if labels else ""
+        cumulative = 0
+        lines = []
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {histogram.count}")
+        return lines
+
+    @classmethod
+    def csv_text(cls, since=None):
+        """Série temporal em CSV (vazia se não houver arquivo configurado)."""
+        out = io.StringIO()
+        if cls.store is not None:
+            cls.store.dump_csv(out, since)
+        return out.getvalue()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = Metrics.prometheus_text(), "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path == "/metrics.csv":
+            body, content_type = Metrics.csv_text(), "text/csv; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """Endpoint HTTP local (/metrics no formato Prometheus e /metrics.csv)."""
+
+    DEFAULT_PORT = 9464
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        """Sobe o servidor em thread própria; retorna False se a porta estiver ocupada."""
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+        except OSError as e:
+            Logger.log_warning(f"Servidor de métricas não iniciado em {self.host}:{self.port}: {e}")
+            return False
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        Logger.log_info(f"Métricas disponíveis em http://{self.host}:{self._server.server_port}/metrics")
+        return True
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
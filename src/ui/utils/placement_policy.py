@@ -0,0 +1,61 @@
+import hashlib
+from urllib.parse import urlparse
+
+
+class PlacementPolicy:
+    """
+    Escolhe a instância do Aria2 que recebe cada novo download.
+
+    "least_loaded": a instância online com menos downloads (ativos + em
+    espera, mais os já enviados desde o último getGlobalStat, para que uma
+    rajada de adições não caia toda na mesma); empate pela menor velocidade.
+    "host": o mesmo servidor de origem vai sempre para a mesma instância
+    (hash de rendezvous sobre as online), concentrando os limites de
+    conexões por servidor num único processo; se ela cair, só os hosts
+    dela mudam de lugar.
+    """
+
+    POLICIES = ("least_loaded", "host")
+
+    def __init__(self, policy="least_loaded"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política de distribuição desconhecida: {policy}")
+        self.policy = policy
+        self._pending = {}  # instância -> adições desde o último getGlobalStat
+
+    def choose(self, url, candidates):
+        """
+        Args:
+            url: Link do download (usado pela política "host")
+            candidates: Lista de (nome, global_stat) das instâncias online
+
+        Returns:
+            Nome da instância escolhida, ou None se não houver candidatas
+        """
+        if not candidates:
+            return None
+        if self.policy == "host":
+            host = self.host(url)
+            name = max(candidates, key=lambda candidate: self._weight(host, candidate[0]))[0]
+        else:
+            name = min(candidates, key=lambda candidate: self._load(*candidate))[0]
+        self._pending[name] = self._pending.get(name, 0) + 1
+        return name
+
+    def observed(self, name):
+        """O getGlobalStat da instância já conta as adições feitas até aqui."""
+        self._pending.pop(name, None)
+
+    def _load(self, name, stat):
+        queued = int(stat.get("numActive", 0)) + int(stat.get("numWaiting", 0)) + self._pending.get(name, 0)
+        return queued, int(stat.get("downloadSpeed", 0)), name
+
+    @staticmethod
+    def _weight(host, name):
+        return hashlib.blake2b(f"{host}|{name}".encode("utf-8"), digest_size=8).digest()
+
+    @staticmethod
+    def host(url):
+        """Host de origem do link (magnets e caminhos locais agrupam pelo esquema)."""
+        parsed = urlparse(url)
+        return (parsed.hostname or parsed.scheme or "").lower()
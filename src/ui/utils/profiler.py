@@ -0,0 +1,297 @@
+import asyncio
+import atexit
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+from src.ui.utils.log_utils import Logger
+
+
+class Profiler:
+    """
+    Modo de perfilamento opcional dos caminhos quentes (RPC, JSON e Tk).
+
+    Desligado, o custo é uma verificação de atributo: os cronômetros só são
+    instalados por install() quando o modo é ativado (variável de ambiente
+    ARIA2CONTROL_PROFILE ou --profile na linha de comando). Ligado, acumula
+    tempo por trecho, bytes recebidos e linhas da Treeview tocadas e, numa
+    janela de ciclos de atualização, roda o cProfile na thread do Tk e um
+    amostrador de pilhas em todas as threads. Ao fechar a janela grava em
+    logs/profile um .pstats, um .folded (pilhas colapsadas, para
+    flamegraph.pl/speedscope) e um resumo em texto.
+    """
+
+    ENV_VAR = "ARIA2CONTROL_PROFILE"
+    ENV_SKIP = "ARIA2CONTROL_PROFILE_SKIP"
+    DEFAULT_TICKS = 50
+    DEFAULT_SKIP = 5  # ciclos de aquecimento antes da janela
+    SAMPLE_INTERVAL = 0.005  # segundos entre amostras de pilha
+    OUTPUT_DIR = os.path.join(Logger.LOG_DIR, "profile")
+
+    enabled = False
+    _lock = threading.Lock()
+    spans = {}  # nome -> [chamadas, total (s), máximo (s)]
+    counters = {"bytes_received": 0, "rows_touched": 0, "tk_calls": 0, "ticks": 0}
+    window_ticks = DEFAULT_TICKS
+    skip_ticks = DEFAULT_SKIP
+    output_dir = OUTPUT_DIR
+    _profile = None
+    _sampler = None
+    _stacks = Counter()
+    _window_state = "pending"  # pending -> running -> done
+    _window_start = 0
+
+    # --- ativação -------------------------------------------------------------
+
+    @staticmethod
+    def parse_args(argv, environ=None):
+        """
+        Lê --profile[=ciclos] e --profile-skip=N (ou as variáveis de ambiente).
+
+        Returns:
+            (ciclos, aquecimento), ou None se o modo não foi pedido
+        """
+        environ = os.environ if environ is None else environ
+        ticks = skip = None
+        for arg in argv:
+            if arg == "--profile":
+                ticks = Profiler.DEFAULT_TICKS
+            elif arg.startswith("--profile="):
+                ticks = arg.split("=", 1)[1]
+            elif arg.startswith("--profile-skip="):
+                skip = arg.split("=", 1)[1]
+        if ticks is None and environ.get(Profiler.ENV_VAR):
+            ticks = environ[Profiler.ENV_VAR]
+        if ticks is None:
+            return None
+        if skip is None:
+            skip = environ.get(Profiler.ENV_SKIP, Profiler.DEFAULT_SKIP)
+        try:
+            return max(1, int(ticks)), max(0, int(skip))
+        except ValueError:
+            Logger.log_warning(f"Valor inválido para o perfilamento: {ticks!r}/{skip!r}; usando o padrão")
+            return Profiler.DEFAULT_TICKS, Profiler.DEFAULT_SKIP
+
+    @classmethod
+    def enable(cls, ticks=DEFAULT_TICKS, skip=DEFAULT_SKIP, output_dir=None):
+        """Liga o modo e instala os cronômetros nos caminhos quentes."""
+        if cls.enabled:
+            return
+        cls.enabled = True
+        cls.window_ticks = ticks
+        cls.skip_ticks = skip
+        cls.output_dir = output_dir or cls.OUTPUT_DIR
+        cls.install()
+        atexit.register(cls.finish)
+        Logger.log_info(f"Perfilamento ativo: {ticks} ciclos após {skip} de aquecimento; saída em {cls.output_dir}")
+
+    @classmethod
+    def install(cls):
+        """Envolve Aria2RPC.request, a listagem do controlador e MainWindow.update_treeview."""
+        # Importados aqui para não criar dependência circular quando desligado
+        from src.ui.utils.aria2_rpc import Aria2RPC
+        from src.ui.controllers.download_controller import DownloadController
+        from src.ui.controllers.fleet_controller import FleetController
+        from src.ui.main_window import MainWindow
+
+        cls.wrap(Aria2RPC, "request", "rpc.request")
+        cls.wrap(Aria2RPC, "multicall", "rpc.multicall")
+        cls.wrap(DownloadController, "listar_downloads", "controller.listar_downloads")
+        cls.wrap(DownloadController, "listar_downloads_async", "controller.listar_downloads_async")
+        cls.wrap(FleetController, "listar_downloads_async", "fleet.listar_downloads_async")
+        cls.wrap(MainWindow, "update_treeview", "ui.update_treeview", after=cls._after_render)
+
+    @classmethod
+    def wrap(cls, owner, attr, name, after=None):
+        """Substitui owner.attr por uma versão cronometrada (funções e corrotinas)."""
+        original = getattr(owner, attr)
+        if getattr(original, "_profiled", False):
+            return
+
+        if asyncio.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    cls.record(name, time.perf_counter() - started)
+        else:
+            @functools.wraps(original)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    cls.record(name, time.perf_counter() - started)
+                    if after is not None:
+                        after(*args)
+
+        wrapper._profiled = True
+        setattr(owner, attr, wrapper)
+
+    # --- coleta -------------------------------------------------------------
+
+    @classmethod
+    def record(cls, name, seconds):
+        with cls._lock:
+            span = cls.spans.get(name)
+            if span is None:
+                cls.spans[name] = [1, seconds, seconds]
+            else:
+                span[0] += 1
+                span[1] += seconds
+                if seconds > span[2]:
+                    span[2] = seconds
+
+    @classmethod
+    def count(cls, name, value):
+        with cls._lock:
+            cls.counters[name] = cls.counters.get(name, 0) + value
+
+    @classmethod
+    def decode(cls, body):
+        """json.loads da resposta RPC; com o modo ligado, mede a decodificação e conta os bytes."""
+        if not cls.enabled:
+            return json.loads(body)
+        started = time.perf_counter()
+        result = json.loads(body)
+        cls.record("rpc.json_decode", time.perf_counter() - started)
+        cls.count("bytes_received", len(body))
+        return result
+
+    @classmethod
+    def _after_render(cls, window, *args):
+        """Após update_treeview: conta as linhas tocadas e avança a janela de ciclos."""
+        reconciler = window.download_list.reconciler
+        stats = reconciler.last_stats
+        # reconcile() cria um dicionário novo a cada chamada; o mesmo objeto = nada renderizado
+        if stats is not getattr(window, "_profiled_stats", None):
+            window._profiled_stats = stats
+            cls.count("rows_touched", stats["inserted"] + stats["deleted"] + stats["updated"] + stats["moved"])
+            cls.count("tk_calls", stats["tk_calls"])
+        cls.tick()
+
+    @classmethod
+    def tick(cls):
+        """Um ciclo de atualização concluído (chamado na thread do Tk)."""
+        cls.count("ticks", 1)
+        ticks = cls.counters["ticks"]
+        if cls._window_state == "pending" and ticks > cls.skip_ticks:
+            cls._start_window(ticks)
+        elif cls._window_state == "running" and ticks - cls._window_start >= cls.window_ticks:
+            cls._stop_window()
+
+    # --- janela de perfilamento --------------------------------------------
+
+    @classmethod
+    def _start_window(cls, ticks):
+        cls._window_state = "running"
+        cls._window_start = ticks
+        cls._stacks = Counter()
+        cls._sampler = _StackSampler(cls._stacks, cls.SAMPLE_INTERVAL)
+        cls._sampler.start()
+        cls._profile = cProfile.Profile()
+        cls._profile.enable()
+        Logger.log_info(f"Perfilamento: janela iniciada no ciclo {ticks}")
+
+    @classmethod
+    def _stop_window(cls):
+        cls._window_state = "done"
+        cls._profile.disable()
+        cls._sampler.stop()
+        try:
+            paths = cls.dump()
+        except OSError as e:
+            Logger.log_error(f"Falha ao gravar o perfilamento: {e}")
+            return
+        Logger.log_info(f"Perfilamento gravado: {', '.join(paths)}")
+
+    @classmethod
+    def finish(cls):
+        """Ao sair: fecha a janela em andamento (parcial) ou grava só o resumo."""
+        if not cls.enabled:
+            return
+        if cls._window_state == "running":
+            cls._stop_window()
+        elif cls._window_state == "pending":
+            cls._window_state = "done"
+            try:
+                cls.dump()
+            except OSError as e:
+                Logger.log_error(f"Falha ao gravar o perfilamento: {e}")
+
+    @classmethod
+    def dump(cls):
+        """Grava .pstats, .folded e o resumo; retorna os caminhos gravados."""
+        os.makedirs(cls.output_dir, exist_ok=True)
+        base = os.path.join(cls.output_dir, time.strftime("profile-%Y%m%d-%H%M%S"))
+        paths = []
+        if cls._profile is not None:
+            cls._profile.dump_stats(base + ".pstats")
+            paths.append(base + ".pstats")
+        if cls._stacks:
+            with open(base + ".folded", "w", encoding="utf-8") as f:
+                for stack, samples in cls._stacks.most_common():
+                    f.write(f"{stack} {samples}\n")
+            paths.append(base + ".folded")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(cls.summary())
+        paths.append(base + ".txt")
+        return paths
+
+    @classmethod
+    def summary(cls):
+        """Tabela dos trechos cronometrados, contadores e as funções mais caras da janela."""
+        with cls._lock:
+            spans = {name: list(span) for name, span in cls.spans.items()}
+            counters = dict(cls.counters)
+        out = io.StringIO()
+        out.write(f"{'trecho':36} {'chamadas':>9} {'total ms':>10} {'média ms':>9} {'máx ms':>9}\n")
+        for name, (calls, total, peak) in sorted(spans.items(), key=lambda item: -item[1][1]):
+            out.write(f"{name:36} {calls:>9} {total * 1000:>10.1f} {total / calls * 1000:>9.3f} {peak * 1000:>9.3f}\n")
+        out.write("\n")
+        ticks = counters.get("ticks", 0) or 1
+        for name, value in sorted(counters.items()):
+            out.write(f"{name:20} {value:>12} ({value / ticks:.1f} por ciclo)\n")
+        if cls._profile is not None:
+            out.write("\n")
+            stats = pstats.Stats(cls._profile, stream=out)
+            stats.sort_stats("cumulative").print_stats(30)
+        return out.getvalue()
+
+
+class _StackSampler(threading.Thread):
+    """Amostra as pilhas de todas as threads e acumula no formato colapsado (a;b;c contagem)."""
+
+    def __init__(self, stacks, interval):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.stacks = stacks
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                parts.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(parts))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=1)
@@ -0,0 +1,438 @@
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+
+from src.ui.models.download_record import DownloadRecord
+from src.ui.utils.log_utils import Logger
+
+
+class _MemberQueue:
+    """Ordem desejada da fila de espera de uma instância, mantida incrementalmente."""
+
+    __slots__ = ("entries", "sorted", "order", "changed", "applied", "seq", "virtual", "tag_finish", "starts",
+                 "concurrency_base", "concurrency_applied", "seen", "synced_at")
+
+    def __init__(self):
+        self.entries = {}  # gid -> (-prioridade, tamanho/tempo virtual, sequência, gid)
+        self.sorted = []  # entradas em ordem (bisect/insort)
+        self.order = []  # gids de sorted, na mesma posição
+        self.changed = set()  # gids com chave nova desde o último plano
+        self.applied = None  # ordem deixada no Aria2 pelo último plano (None = desconhecida)
+        self.seq = 0
+        # Divisão justa por etiqueta (start-time fair queueing)
+        self.virtual = 0
+        self.tag_finish = {}
+        self.starts = {}  # gid -> (início virtual, etiqueta)
+        self.concurrency_base = None
+        self.concurrency_applied = None
+        self.seen = None  # (ativos, em espera) da última sincronização
+        self.synced_at = 0.0
+
+    def insert(self, entry):
+        self.entries[entry[3]] = entry
+        index = bisect_left(self.sorted, entry)
+        self.sorted.insert(index, entry)
+        self.order.insert(index, entry[3])
+        self.changed.add(entry[3])
+
+    def remove(self, gid):
+        entry = self.entries.pop(gid)
+        index = bisect_left(self.sorted, entry)
+        del self.sorted[index]
+        del self.order[index]
+        self.changed.discard(gid)
+        return entry
+
+    def rebuild(self, entries):
+        self.sorted = sorted(entries)
+        self.entries = {entry[3]: entry for entry in self.sorted}
+        self.order = [entry[3] for entry in self.sorted]
+        self.changed = set()
+
+
+class QueueManager:
+    """
+    Prioridades e política de ordenação sobre a fila de espera do Aria2.
+
+    O Aria2 inicia os downloads em ordem (FIFO) até max-concurrent-downloads.
+    Aqui cada download em espera tem uma chave de ordenação (prioridade
+    local, depois o critério da política, depois a ordem de chegada):
+
+    - "fifo": só a prioridade; empates mantêm a ordem do Aria2;
+    - "srf": menor restante primeiro (tamanho desconhecido conta como
+      UNKNOWN_SIZE, para não ficar nem na frente nem no fim);
+    - "fair": divisão justa por etiqueta, por bytes (start-time fair
+      queueing): cada etiqueta avança um relógio virtual com o tamanho dos
+      seus downloads, e a fila intercala as etiquetas por esse relógio.
+
+    A chave é calculada uma vez, quando o GID entra na fila (ou muda de
+    prioridade), e a ordem desejada é uma lista mantida com bisect; cada
+    sincronização só compara a ordem do Aria2 com ela e, se diferirem,
+    escolhe poucos GIDs a mover (os que quebram a maior sequência já em
+    ordem) e envia os aria2.changePosition num único multicall.
+
+    max-concurrent-downloads é ajustado conforme os ativos: downloads
+    grandes (acima de large_size) não ocupam vaga, até extra_slots vagas a
+    mais, para que arquivos pequenos não esperem atrás de uma imagem de
+    200 GB.
+    """
+
+    POLICIES = ("fifo", "srf", "fair")
+    STATUS_KEYS = ["gid", "totalLength", "completedLength"]
+    UNKNOWN_SIZE = 64 * 1024 * 1024
+    RESYNC_INTERVAL = 30.0  # segundos; a fila também muda sem evento (adições de outros clientes)
+    FETCH_SLACK = 100
+    MAX_MOVES = 256  # acima disso, só a cabeça da fila é arrumada por vez
+
+    def __init__(self, controller, store=None, policy="fifo", large_size=0, extra_slots=0):
+        """
+        Args:
+            controller: FleetController com as instâncias do Aria2
+            store: QueueStore com prioridades e etiquetas persistidas
+            policy: "fifo", "srf" ou "fair"
+            large_size: Restante (bytes) a partir do qual um ativo não ocupa vaga (0 desliga)
+            extra_slots: Máximo de vagas somadas a max-concurrent-downloads
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Política de fila desconhecida: {policy}")
+        self.controller = controller
+        self.store = store
+        self.policy = policy
+        self.large_size = large_size
+        self.extra_slots = extra_slots
+        self._queues = {member.name: _MemberQueue() for member in controller.members}
+        if store is not None:
+            # Com o Aria2 ainda rodando, o valor atual já tem as vagas somadas: a base vem do banco
+            for name, queue in self._queues.items():
+                queue.concurrency_base, queue.concurrency_applied = store.concurrency(name) or (None, None)
+        self._rekey = set()  # chaves com prioridade/etiqueta alterada, aplicadas na próxima sincronização
+        self._rekey_lock = threading.Lock()
+        self._running = False
+        self.last_stats = {"moves": 0, "plan_ms": 0.0, "waiting": 0}
+
+    # --- prioridades -------------------------------------------------------------
+
+    def priority_of(self, key):
+        return self.store.priorities().get(key, 0) if self.store is not None else 0
+
+    def tag_of(self, key):
+        return self.store.tags().get(key, "") if self.store is not None else ""
+
+    def set_priority(self, keys, priority):
+        """Grava a prioridade (thread do Tk); a fila é reordenada na próxima sincronização."""
+        if self.store is not None:
+            self.store.set_priority(keys, priority)
+        self._mark(keys)
+
+    def set_tag(self, keys, tag):
+        if self.store is not None:
+            self.store.set_tag(keys, tag)
+        self._mark(keys)
+
+    def _mark(self, keys):
+        with self._rekey_lock:
+            self._rekey.update(keys)
+
+    # --- ciclo -----------------------------------------------------------------------
+
+    def due(self, now=None):
+        """Se vale sincronizar: contadores mudaram, há prioridades novas ou passou RESYNC_INTERVAL."""
+        if self._running:
+            return False
+        now = time.monotonic() if now is None else now
+        if self._rekey:
+            return True
+        for member in self.controller.members:
+            if not member.online:
+                continue
+            queue = self._queues[member.name]
+            counts = (member.global_stat.get("numActive"), member.global_stat.get("numWaiting"))
+            if counts != queue.seen or now - queue.synced_at >= self.RESYNC_INTERVAL:
+                return True
+        return False
+
+    def sync(self, now=None):
+        """
+        Chamado a cada ciclo de atualização (thread do Tk).
+
+        Returns:
+            Corrotina run() a agendar, ou None se não há o que fazer
+        """
+        if not self.due(now):
+            return None
+        self._running = True
+        return self.run()
+
+    async def run(self):
+        """Sincroniza e reordena a fila de cada instância online, em paralelo."""
+        self._running = True
+        try:
+            with self._rekey_lock:
+                rekey, self._rekey = self._rekey, set()
+            members = [member for member in self.controller.members if member.online]
+            results = await asyncio.gather(*(self._run_member(member, rekey) for member in members),
+                                           return_exceptions=True)
+            moves = 0
+            for member, result in zip(members, results):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                if isinstance(result, BaseException):
+                    Logger.log_warning(f"Falha ao reordenar a fila{f' de {member.name}' if member.name else ''}: "
+                                       f"{result}")
+                    continue
+                moves += result
+            return moves
+        finally:
+            self._running = False
+
+    async def _run_member(self, member, rekey):
+        queue = self._queues[member.name]
+        stat = member.global_stat
+        # Folga para o que entrou na fila desde o último getGlobalStat
+        num_waiting = int(stat.get("numWaiting", 0)) + self.FETCH_SLACK
+        fetch = await member.async_rpc.multicall([
+            ("aria2.tellActive", [self.STATUS_KEYS]),
+            ("aria2.tellWaiting", [0, num_waiting, self.STATUS_KEYS]),
+            ("aria2.getGlobalOption", []),
+        ])
+        for result in fetch:
+            if "error" in result:
+                raise RuntimeError(result["error"])
+        active, waiting, options = (result["result"] or [] for result in fetch)
+        queue.seen = (stat.get("numActive"), stat.get("numWaiting"))
+        queue.synced_at = time.monotonic()
+
+        started = time.perf_counter()
+        self.rekey(queue, member.name, {gid for gid, instance in map(DownloadRecord.split_key, rekey)
+                                        if instance == member.name})
+        calls = self.plan(queue, member.name, [status["gid"] for status in waiting], waiting)
+        self.last_stats = {"moves": len(calls), "plan_ms": (time.perf_counter() - started) * 1000,
+                           "waiting": len(waiting)}
+        concurrency = self._concurrency(queue, member.name, active, options)
+        if concurrency is not None:
+            calls.append(("aria2.changeGlobalOption", [{"max-concurrent-downloads": str(concurrency)}]))
+        if not calls:
+            return 0
+        results = await member.async_rpc.multicall(calls)
+        if concurrency is not None:
+            if "error" in results[-1]:
+                Logger.log_warning(f"Falha ao ajustar max-concurrent-downloads: {results[-1]['error']}")
+            else:
+                queue.concurrency_applied = concurrency
+                self._save_concurrency(queue, member.name)
+        member.invalidate()
+        # Ativos recusam changePosition (iniciaram entre a leitura e a escrita): corrigido na próxima
+        return sum(1 for (method, _params), result in zip(calls, results)
+                   if method == "aria2.changePosition" and "error" not in result)
+
+    # --- ordenação ---------------------------------------------------------------------
+
+    def _entry(self, queue, name, status, priority=None, seq=None):
+        """Chave de ordenação de um GID que entrou na fila."""
+        gid = status["gid"] if isinstance(status, dict) else status
+        key = self.controller.key(gid, name)
+        if priority is None:
+            priority = self.priority_of(key)
+        if seq is None:
+            queue.seq += 1
+            seq = queue.seq
+        if self.policy == "fifo":
+            return (-priority, 0, seq, gid)
+        total = int(status.get("totalLength", 0))
+        remaining = total - int(status.get("completedLength", 0)) if total > 0 else self.UNKNOWN_SIZE
+        if self.policy == "srf":
+            return (-priority, remaining, seq, gid)
+        tag = self.tag_of(key)
+        start = max(queue.virtual, queue.tag_finish.get(tag, 0))
+        finish = start + max(remaining, 1)
+        queue.tag_finish[tag] = finish
+        queue.starts[gid] = (start, tag)
+        return (-priority, finish, seq, gid)
+
+    def rekey(self, queue, name, gids):
+        """Recalcula prioridade (e, na divisão justa, a etiqueta) de GIDs já na fila, mantendo a chegada."""
+        for gid in gids:
+            entry = queue.entries.get(gid)
+            if entry is None:
+                continue
+            key = self.controller.key(gid, name)
+            queue.remove(gid)
+            criterion = entry[1]
+            tag = self.tag_of(key)
+            if gid in queue.starts and queue.starts[gid][1] != tag:
+                # Mudou de etiqueta: vai para o fim do relógio da nova, com o mesmo tamanho
+                start = max(queue.virtual, queue.tag_finish.get(tag, 0))
+                criterion = start + entry[1] - queue.starts[gid][0]
+                queue.tag_finish[tag] = criterion
+                queue.starts[gid] = (start, tag)
+            queue.insert((-self.priority_of(key), criterion, entry[2], gid))
+
+    def plan(self, queue, name, current, waiting):
+        """
+        Atualiza a ordem desejada com a fila atual e calcula os changePosition.
+
+        No caso comum (a fila do Aria2 é a última ordem aplicada, menos os
+        que iniciaram na frente e mais os que chegaram no fim) a fila inteira
+        só é percorrida por comparações de lista em C; o trabalho em Python é
+        proporcional ao que mudou.
+
+        Args:
+            current: GIDs em espera, na ordem do Aria2
+            waiting: tellWaiting completo correspondente (tamanhos dos que chegaram)
+
+        Returns:
+            Lista de ("aria2.changePosition", [gid, posição, "POS_SET"])
+        """
+        if current == queue.order and not queue.changed:
+            queue.applied = current
+            return []
+
+        shifted = self._shifted(queue.applied, current)
+        if shifted is not None:
+            gone, arrivals = shifted
+        else:
+            present = set(current)
+            gone = queue.entries.keys() - present
+            arrivals = [index for index, gid in enumerate(current) if gid not in queue.entries]
+        for gid in gone:
+            queue.remove(gid)
+            start = queue.starts.pop(gid, None)
+            if start is not None and start[0] > queue.virtual:
+                queue.virtual = start[0]
+        for index in arrivals:
+            queue.insert(self._entry(queue, name, waiting[index]))
+
+        desired = queue.order
+        changed, queue.changed = queue.changed, set()
+        if current == desired:
+            queue.applied = current
+            return []
+        if shifted is not None and len(changed) <= self.MAX_MOVES:
+            # Os que não mudaram de chave já estão, no Aria2, na ordem aplicada antes
+            arrived = {current[index]: index for index in arrivals}
+            calls = self.moves(queue, [(gid, arrived[gid] if gid in arrived else current.index(gid))
+                                       for gid in changed])
+            queue.applied = list(desired)
+            return calls
+        return self._reorder(queue, current)
+
+    @staticmethod
+    def _shifted(applied, current):
+        """
+        Se current é applied sem os primeiros e com novos no fim, (saídas, índices das chegadas).
+
+        Returns:
+            None se a fila mudou de outra forma
+        """
+        if applied is None:
+            return None
+        if not current:
+            return applied, ()
+        try:
+            skip = applied.index(current[0])
+        except ValueError:
+            return None
+        kept = len(applied) - skip
+        if current[:kept] != applied[skip:]:
+            return None
+        return applied[:skip], range(kept, len(current))
+
+    def _reorder(self, queue, current):
+        """Caminho geral: reordenada por fora (ex.: "Mover para o topo") ou movimentos que falharam."""
+        queue.applied = None
+        if self.policy == "fifo":
+            # Na FIFO, vale a ordem do Aria2 entre downloads de mesma prioridade
+            queue.rebuild((queue.entries[gid][0], 0, seq, gid) for seq, gid in enumerate(current))
+            queue.seq = len(current)
+            if current == queue.order:
+                queue.applied = current
+                return []
+        desired = queue.order
+        keep = self._increasing([queue.entries[gid] for gid in current])
+        if len(current) - len(keep) > self.MAX_MOVES:
+            # Muita coisa fora do lugar: arruma um trecho por vez, a partir da primeira
+            # posição errada (a cabeça é o que o Aria2 inicia primeiro)
+            first = next(index for index, (gid, target) in enumerate(zip(current, desired)) if gid != target)
+            return [("aria2.changePosition", [gid, index, "POS_SET"])
+                    for index, gid in enumerate(desired[first:first + self.MAX_MOVES], first)]
+        calls = self.moves(queue, [(gid, index) for index, gid in enumerate(current) if gid not in keep])
+        queue.applied = list(desired)
+        return calls
+
+    @staticmethod
+    def moves(queue, moved):
+        """
+        changePosition (POS_SET) que levam a fila do Aria2 à ordem desejada movendo só os GIDs de moved.
+
+        Os demais já estão na ordem relativa desejada. Os movidos vão, na
+        ordem desejada, cada um para logo após o seu antecessor; a posição
+        absoluta de cada um é a desejada mais os movidos ainda não
+        processados que estão antes dele, contados sem percorrer a fila.
+
+        Args:
+            moved: Lista de (gid, posição atual no Aria2)
+        """
+        items = [[bisect_left(queue.sorted, queue.entries[gid]), position, gid] for gid, position in moved]
+        # Quantos que ficam no lugar estão antes de cada movido
+        for count, item in enumerate(sorted(items, key=lambda item: item[1])):
+            item.append(item[1] - count)
+        items.sort()
+        calls = []
+        for index, (target, _position, gid, _kept_before) in enumerate(items):
+            anchor = target - index  # que ficam no lugar e vêm antes na ordem desejada
+            offset = sum(1 for later in items[index + 1:] if later[3] < anchor)
+            calls.append(("aria2.changePosition", [gid, target + offset, "POS_SET"]))
+        return calls
+
+    @staticmethod
+    def _increasing(keys):
+        """
+        GIDs que ficam no lugar: a maior de duas sequências crescentes gulosas
+        (da frente e de trás), que acertam os casos comuns (um item
+        promovido ou rebaixado) em O(n).
+        """
+        forward = []
+        last = None
+        for key in keys:
+            if last is None or key > last:
+                forward.append(key[3])
+                last = key
+        backward = []
+        last = None
+        for key in reversed(keys):
+            if last is None or key < last:
+                backward.append(key[3])
+                last = key
+        return set(forward if len(forward) >= len(backward) else backward)
+
+    # --- concorrência ----------------------------------------------------------------
+
+    def _save_concurrency(self, queue, name):
+        if self.store is not None:
+            self.store.set_concurrency(name, queue.concurrency_base, queue.concurrency_applied)
+
+    def _concurrency(self, queue, name, active, options):
+        """
+        Novo max-concurrent-downloads, ou None se não mudou.
+
+        A base é o valor que o Aria2 tinha antes das vagas somadas; ela só é
+        trocada quando o valor atual difere do último aplicado (alterado por
+        fora ou Aria2 reiniciado com a configuração original).
+        """
+        if not self.extra_slots or not self.large_size:
+            return None
+        current = int(options.get("max-concurrent-downloads", 0) or 0)
+        if current <= 0:
+            return None
+        if queue.concurrency_base is None or current != queue.concurrency_applied:
+            queue.concurrency_base = current  # alterado por fora (ou primeira leitura): nova base
+        large = sum(1 for status in active
+                    if int(status.get("totalLength", 0)) - int(status.get("completedLength", 0)) >= self.large_size)
+        target = queue.concurrency_base + min(large, self.extra_slots)
+        if target == current:
+            queue.concurrency_applied = current
+            self._save_concurrency(queue, name)
+            return None
+        Logger.log_info(f"max-concurrent-downloads: {current} -> {target} ({large} downloads grandes ativos)")
+        return target
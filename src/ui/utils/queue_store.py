@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import threading
+import time
+
+from src.ui.utils.log_utils import Logger
+
+
+class QueueStore:
+    """
+    Atributos locais dos downloads (classe de banda, prioridade, etiqueta e
+    checksum esperado), por chave de registro.
+
+    O Aria2 não guarda metadados arbitrários por GID; o que o aplicativo
+    atribui a cada download fica aqui, em SQLite, e é mantido também em
+    memória para consultas O(1) a cada ciclo de atualização. Os checksums
+    lidos de Metalinks importados ficam à parte, por nome de arquivo, até
+    o arquivo terminar.
+    """
+
+    COLUMNS = {"bandwidth_class": "TEXT", "priority": "INTEGER", "tag": "TEXT", "checksum": "TEXT"}
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS downloads (key TEXT PRIMARY KEY, updated_at REAL)")
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(downloads)")}
+        for column, kind in self.COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE downloads ADD COLUMN {column} {kind}")
+        # max-concurrent-downloads original e o aplicado por instância, para não somar vagas a cada reinício
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS concurrency (instance TEXT PRIMARY KEY, base INTEGER, applied INTEGER)")
+        self._concurrency = {instance: (base, applied) for instance, base, applied in self.conn.execute(
+            "SELECT instance, base, applied FROM concurrency")}
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_checksums ("
+            " name TEXT, size INTEGER, checksum TEXT, added_at REAL, PRIMARY KEY (name, size))"
+        )
+        # coluna -> {chave: valor}, só com os valores atribuídos
+        self._values = {column: dict(self.conn.execute(
+            f"SELECT key, {column} FROM downloads WHERE {column} IS NOT NULL")) for column in self.COLUMNS}
+
+    @classmethod
+    def open(cls, db_path):
+        """Retorna a instância compartilhada para o arquivo."""
+        with cls._instances_lock:
+            store = cls._instances.get(db_path)
+            if store is None:
+                store = cls._instances[db_path] = cls(db_path)
+            return store
+
+    # Mapas chave -> valor (não copiar a cada ciclo: só leitura)
+
+    def classes(self):
+        return self._values["bandwidth_class"]
+
+    def priorities(self):
+        return self._values["priority"]
+
+    def tags(self):
+        return self._values["tag"]
+
+    def checksums(self):
+        return self._values["checksum"]
+
+    def set_class(self, keys, bandwidth_class):
+        """Atribui a classe de banda aos downloads; None volta à classe padrão."""
+        self._set("bandwidth_class", keys, bandwidth_class)
+
+    def set_priority(self, keys, priority):
+        """Atribui a prioridade na fila (maior = antes); None volta a 0."""
+        self._set("priority", keys, None if priority is None else int(priority))
+
+    def set_tag(self, keys, tag):
+        """Atribui a etiqueta usada na divisão justa da fila; None remove."""
+        self._set("tag", keys, tag or None)
+
+    def set_checksum(self, keys, checksum):
+        """Atribui o checksum esperado ("sha-256=<hex>"); None remove."""
+        self._set("checksum", keys, checksum or None)
+
+    def concurrency(self, instance):
+        """(base, aplicado) de max-concurrent-downloads gravados para a instância, ou None."""
+        return self._concurrency.get(instance)
+
+    def set_concurrency(self, instance, base, applied):
+        with self._lock:
+            if self._concurrency.get(instance) == (base, applied):
+                return
+            self._concurrency[instance] = (base, applied)
+            try:
+                self.conn.execute("INSERT OR REPLACE INTO concurrency (instance, base, applied) VALUES (?, ?, ?)",
+                                  (instance, base, applied))
+            except sqlite3.Error as e:
+                Logger.log_warning(f"Falha ao gravar max-concurrent-downloads de {instance or 'aria2'}: {e}")
+
+    def set_file_checksums(self, items):
+        """Checksums de arquivos de um Metalink: [(nome, tamanho ou -1, checksum)]."""
+        with self._lock:
+            try:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO file_checksums (name, size, checksum, added_at) VALUES (?, ?, ?, ?)",
+                    [(name, size, checksum, time.time()) for name, size, checksum in items])
+            except sqlite3.Error as e:
+                Logger.log_warning(f"Falha ao gravar checksums do Metalink: {e}")
+
+    def take_file_checksum(self, name, size):
+        """Retira o checksum de Metalink do arquivo (tamanho exato ou desconhecido), ou None."""
+        with self._lock:
+            try:
+                row = self.conn.execute(
+                    "SELECT size, checksum FROM file_checksums WHERE name = ? AND size IN (?, -1)"
+                    " ORDER BY size DESC LIMIT 1", (name, size)).fetchone()
+                if row is None:
+                    return None
+                self.conn.execute("DELETE FROM file_checksums WHERE name = ? AND size = ?", (name, row[0]))
+                return row[1]
+            except sqlite3.Error as e:
+                Logger.log_warning(f"Falha ao consultar checksums do Metalink: {e}")
+                return None
+
+    def _set(self, column, keys, value):
+        values = self._values[column]
+        with self._lock:
+            for key in keys:
+                if value is None:
+                    values.pop(key, None)
+                else:
+                    values[key] = value
+            try:
+                self.conn.executemany(
+                    f"INSERT INTO downloads (key, {column}, updated_at) VALUES (?, ?, ?)"
+                    f" ON CONFLICT(key) DO UPDATE SET {column} = excluded.{column}, updated_at = excluded.updated_at",
+                    [(key, value, time.time()) for key in keys])
+            except sqlite3.Error as e:
+                Logger.log_warning(f"Falha ao gravar atributos de downloads ({column}): {e}")
+
+    def forget(self, keys):
+        """Descarta os atributos de downloads que terminaram."""
+        with self._lock:
+            known = [key for key in keys if any(key in values for values in self._values.values())]
+            if not known:
+                return
+            for values in self._values.values():
+                for key in known:
+                    values.pop(key, None)
+            try:
+                self.conn.executemany("DELETE FROM downloads WHERE key = ?", [(key,) for key in known])
+            except sqlite3.Error as e:
+                Logger.log_warning(f"Falha ao descartar atributos de downloads: {e}")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
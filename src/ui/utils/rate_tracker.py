@@ -0,0 +1,171 @@
+import math
+
+
+class RingBuffer:
+    """Buffer circular de tamanho fixo; inserção O(1) e soma mantida incrementalmente."""
+
+    __slots__ = ("size", "_data", "_start", "_count", "total")
+
+    def __init__(self, size):
+        self.size = size
+        self._data = [0.0] * size
+        self._start = 0
+        self._count = 0
+        self.total = 0.0
+
+    def append(self, value):
+        if self._count < self.size:
+            self._data[(self._start + self._count) % self.size] = value
+            self._count += 1
+        else:
+            self.total -= self._data[self._start]
+            self._data[self._start] = value
+            self._start = (self._start + 1) % self.size
+        self.total += value
+
+    @property
+    def mean(self):
+        return self.total / self._count if self._count else 0.0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._data[(self._start + i) % self.size]
+
+
+class _GidRate:
+    __slots__ = ("speed", "completed", "total", "updated_at", "started_at", "started_completed")
+
+    def __init__(self, speed, completed, total, updated_at):
+        self.speed = speed
+        self.completed = completed
+        self.total = total
+        self.updated_at = updated_at
+        # Início do período ativo, para a vazão média (bytes / segundos ativo)
+        self.started_at = updated_at
+        self.started_completed = completed
+
+    @property
+    def run(self):
+        """(segundos ativo, bytes baixados) desde a primeira amostra."""
+        return self.updated_at - self.started_at, self.completed - self.started_completed
+
+
+class RateTracker:
+    """
+    Velocidades suavizadas (EWMA) por GID e globais, e ETA pelos bytes restantes.
+
+    A suavização considera o tempo entre amostras (alpha = 1 - e^(-dt/TAU)),
+    então o resultado não depende do intervalo de polling. Cada atualização
+    é O(1): os totais dos downloads ativos (para o progresso geral) são
+    ajustados pela diferença, e o histórico global para o gráfico fica em
+    RingBuffer de HISTORY amostras.
+    """
+
+    TAU = 5.0  # segundos; maior = mais suave
+    HISTORY = 120
+
+    def __init__(self, tau=TAU, history=HISTORY):
+        self.tau = tau
+        self._rates = {}
+        self.completed_sum = 0
+        self.total_sum = 0
+        self.download_speed = 0.0
+        self.upload_speed = 0.0
+        self.download_history = RingBuffer(history)
+        self.upload_history = RingBuffer(history)
+        self._global_at = None
+
+    def _smooth(self, previous, sample, dt):
+        if dt <= 0:
+            return previous
+        alpha = 1.0 - math.exp(-dt / self.tau)
+        return previous + alpha * (sample - previous)
+
+    # --- por GID ------------------------------------------------------------
+
+    def update(self, gid, speed, completed, total, now):
+        """Registra uma amostra de um download ativo; retorna a velocidade suavizada."""
+        rate = self._rates.get(gid)
+        if rate is None:
+            # Primeira amostra: parte da velocidade instantânea informada pelo Aria2
+            self._rates[gid] = _GidRate(float(speed), completed, total, now)
+            self.completed_sum += completed
+            self.total_sum += total
+            return float(speed)
+
+        rate.speed = self._smooth(rate.speed, speed, now - rate.updated_at)
+        rate.updated_at = now
+        self.completed_sum += completed - rate.completed
+        self.total_sum += total - rate.total
+        rate.completed = completed
+        rate.total = total
+        return rate.speed
+
+    def forget(self, gid):
+        """Descarta um GID que deixou de estar ativo; retorna o estado descartado (ou None)."""
+        rate = self._rates.pop(gid, None)
+        if rate is not None:
+            self.completed_sum -= rate.completed
+            self.total_sum -= rate.total
+        return rate
+
+    def speed(self, gid):
+        rate = self._rates.get(gid)
+        return rate.speed if rate is not None else 0.0
+
+    def eta(self, gid):
+        """Segundos restantes estimados, ou None se desconhecido (sem velocidade ou tamanho)."""
+        rate = self._rates.get(gid)
+        if rate is None or rate.total <= 0 or rate.speed < 1:
+            return None
+        return max(rate.total - rate.completed, 0) / rate.speed
+
+    # --- global -------------------------------------------------------------
+
+    def update_global(self, download_speed, upload_speed, now):
+        """Registra uma amostra do getGlobalStat."""
+        if self._global_at is None:
+            self.download_speed = float(download_speed)
+            self.upload_speed = float(upload_speed)
+        else:
+            dt = now - self._global_at
+            self.download_speed = self._smooth(self.download_speed, download_speed, dt)
+            self.upload_speed = self._smooth(self.upload_speed, upload_speed, dt)
+        self._global_at = now
+        self.download_history.append(self.download_speed)
+        self.upload_history.append(self.upload_speed)
+
+    @property
+    def progress(self):
+        """Progresso geral dos downloads ativos (0 a 100)."""
+        return self.completed_sum / self.total_sum * 100 if self.total_sum > 0 else 0.0
+
+    @property
+    def global_eta(self):
+        if self.total_sum <= 0 or self.download_speed < 1:
+            return None
+        return max(self.total_sum - self.completed_sum, 0) / self.download_speed
+
+    # --- formatação ---------------------------------------------------------
+
+    @staticmethod
+    def format_speed(value):
+        for unit in ("B/s", "KB/s", "MB/s"):
+            if value < 1024:
+                return f"{value:.1f} {unit}"
+            value /= 1024
+        return f"{value:.1f} GB/s"
+
+    @staticmethod
+    def format_eta(seconds):
+        if seconds is None:
+            return "Calculando..."
+        seconds = int(seconds)
+        if seconds >= 86400:
+            return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
+        if seconds >= 3600:
+            return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+        return f"{seconds // 60}m {seconds % 60:02d}s"
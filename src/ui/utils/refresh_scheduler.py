@@ -0,0 +1,175 @@
+import time
+from collections import deque
+
+
+class RefreshScheduler:
+    """
+    Agenda as atualizações da lista de downloads conforme a atividade.
+
+    Com downloads ativos e a janela visível, atualiza a cada FAST_MS; ocioso
+    ou minimizado, o intervalo dobra a cada ciclo até o teto (IDLE_MAX_MS
+    com notificações WebSocket, BASE_MS sem elas, HIDDEN_MAX_MS minimizado).
+    Pedidos avulsos (cliques, eventos, rolagem) são agrupados: há no máximo
+    uma busca em andamento, e pedidos durante ela viram uma única busca
+    seguinte. As decisões e a latência de cada ciclo ficam em stats e
+    decisions, para ajuste fino.
+    """
+
+    FAST_MS = 500
+    BASE_MS = 5000
+    IDLE_MAX_MS = 60000
+    HIDDEN_MAX_MS = 30000
+    COALESCE_MS = 50
+    HISTORY = 200  # decisões guardadas em decisions
+
+    def __init__(self, widget, fetch, is_active, push_connected=None, **intervals):
+        """
+        Args:
+            widget: Widget Tk usado para after()/after_cancel()
+            fetch: fetch(done) inicia uma busca e chama done() ao terminar;
+                   pode retornar um objeto com cancel() (ex.: Future)
+            is_active: Indica se há downloads ativos
+            push_connected: Indica se as notificações WebSocket estão ativas
+            intervals: Sobrescreve FAST_MS, BASE_MS, IDLE_MAX_MS, HIDDEN_MAX_MS ou COALESCE_MS
+        """
+        self.widget = widget
+        self.fetch = fetch
+        self.is_active = is_active
+        self.push_connected = push_connected or (lambda: False)
+        for name, value in intervals.items():
+            if not hasattr(self, name):
+                raise ValueError(f"Intervalo desconhecido: {name}")
+            setattr(self, name, int(value))
+
+        self.visible = True
+        self.interval = self.FAST_MS
+        self._job = None
+        self._due = None
+        self._in_flight = None  # (geração, início, motivo, cancelável) da busca em andamento
+        self._generation = 0
+        self._pending = None  # motivo do pedido recebido durante a busca
+        self.stats = {
+            "ticks": 0,
+            "coalesced": 0,
+            "superseded": 0,
+            "interval_ms": self.interval,
+            "last_reason": "",
+            "latency_ms": 0.0,
+            "latency_avg_ms": 0.0,
+            "latency_max_ms": 0.0,
+        }
+        self.decisions = deque(maxlen=self.HISTORY)
+
+    # --- API pública --------------------------------------------------------
+
+    def start(self):
+        self.request("start", 0)
+
+    def stop(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+            self._due = None
+
+    def request(self, reason="manual", delay_ms=None, supersede=False):
+        """
+        Pede uma atualização logo (agrupada com outras pendentes).
+
+        Args:
+            reason: Motivo, registrado nas decisões
+            delay_ms: Espera antes de buscar (padrão: COALESCE_MS)
+            supersede: Cancela a busca em andamento (ex.: rolagem para outra janela)
+        """
+        # Alguma coisa mudou: volta ao ritmo rápido
+        self.interval = self.FAST_MS
+        if self._in_flight is not None:
+            if supersede and self._cancel_in_flight():
+                self.stats["superseded"] += 1
+            else:
+                self._pending = reason
+                self.stats["coalesced"] += 1
+                return
+        self._schedule(self.COALESCE_MS if delay_ms is None else delay_ms, reason)
+
+    def set_visible(self, visible):
+        """Informa se a janela está visível; ao reaparecer, atualiza na hora."""
+        if visible == self.visible:
+            return
+        self.visible = visible
+        if visible:
+            self.request("visible", 0)
+
+    def next_interval(self):
+        """Intervalo até o próximo ciclo, pela atividade e visibilidade atuais."""
+        active = self.is_active()
+        if active and self.visible:
+            return self.FAST_MS
+        if self.push_connected() and not active:
+            ceiling = self.IDLE_MAX_MS  # mudanças de estado chegam por evento
+        elif not self.visible:
+            ceiling = self.HIDDEN_MAX_MS
+        else:
+            ceiling = self.BASE_MS
+        return min(max(self.interval, self.FAST_MS) * 2, ceiling)
+
+    # --- ciclo --------------------------------------------------------------
+
+    def _schedule(self, delay_ms, reason):
+        due = time.monotonic() + delay_ms / 1000
+        if self._job is not None:
+            if self._due <= due:
+                self.stats["coalesced"] += 1
+                return  # já há um ciclo marcado para antes
+            self.widget.after_cancel(self._job)
+        self._due = due
+        self._job = self.widget.after(int(delay_ms), self._tick, reason)
+
+    def _tick(self, reason):
+        self._job = None
+        self._due = None
+        self._generation += 1
+        generation = self._generation
+        self.stats["ticks"] += 1
+        self.stats["last_reason"] = reason
+        started = time.perf_counter()
+        self._in_flight = (generation, started, reason, None)
+        handle = self.fetch(lambda: self._done(generation))
+        if self._in_flight is not None and self._in_flight[0] == generation:
+            self._in_flight = (generation, started, reason, handle)
+
+    def _done(self, generation):
+        if self._in_flight is None or self._in_flight[0] != generation:
+            return  # busca cancelada e já substituída
+        _generation, started, reason, _handle = self._in_flight
+        self._in_flight = None
+
+        latency = (time.perf_counter() - started) * 1000
+        stats = self.stats
+        stats["latency_ms"] = latency
+        stats["latency_avg_ms"] = latency if stats["ticks"] == 1 else 0.8 * stats["latency_avg_ms"] + 0.2 * latency
+        stats["latency_max_ms"] = max(stats["latency_max_ms"], latency)
+
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            self._schedule(0, pending)
+            return
+
+        self.interval = self.next_interval()
+        stats["interval_ms"] = self.interval
+        self.decisions.append({
+            "at": time.time(),
+            "reason": reason,
+            "latency_ms": round(latency, 1),
+            "interval_ms": self.interval,
+            "active": bool(self.is_active()),
+            "visible": self.visible,
+            "push": bool(self.push_connected()),
+        })
+        self._schedule(self.interval, "poll")
+
+    def _cancel_in_flight(self):
+        handle = self._in_flight[3]
+        if handle is None or not handle.cancel():
+            return False
+        self._in_flight = None
+        return True
@@ -0,0 +1,110 @@
+import csv
+import os
+import struct
+import threading
+
+from src.ui.utils.log_utils import Logger
+
+
+class TimeSeriesStore:
+    """
+    Série temporal em arquivo de tamanho fixo (buffer circular em disco).
+
+    O arquivo tem um cabeçalho e CAPACITY registros binários de tamanho fixo;
+    ao encher, os mais antigos são sobrescritos. Cada amostra é um único
+    write de RECORD.size bytes mais a atualização do cabeçalho, sem nunca
+    reescrever o arquivo.
+    """
+
+    MAGIC = b"A2TS"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHHII")  # magic, versão, tamanho do registro, capacidade, próximo índice
+    COUNT = struct.Struct("<I")  # quantidade de registros válidos, logo após o cabeçalho
+    # timestamp, download B/s, upload B/s, ativos, em espera, parados, duração do ciclo da UI (ms)
+    RECORD = struct.Struct("<dddIIIf")
+    FIELDS = ("timestamp", "download_speed", "upload_speed", "num_active", "num_waiting", "num_stopped", "tick_ms")
+    CAPACITY = 17280  # 24 h com uma amostra a cada 5 s
+
+    def __init__(self, path, capacity=CAPACITY):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._file = None
+        if os.path.exists(path):
+            self._file = open(path, "r+b")
+            if not self._read_header():
+                Logger.log_warning(f"Arquivo de métricas incompatível, recriando: {path}")
+                self._file.close()
+                self._file = None
+        if self._file is None:
+            self.capacity = capacity
+            self.next_index = 0
+            self.count = 0
+            self._file = open(path, "w+b")
+            self._file.truncate(self._offset(capacity))
+            self._write_header()
+
+    def _read_header(self):
+        data = self._file.read(self.HEADER.size + self.COUNT.size)
+        if len(data) < self.HEADER.size + self.COUNT.size:
+            return False
+        magic, version, record_size, capacity, next_index = self.HEADER.unpack_from(data)
+        if magic != self.MAGIC or version != self.VERSION or record_size != self.RECORD.size:
+            return False
+        self.capacity = capacity
+        self.next_index = next_index
+        (self.count,) = self.COUNT.unpack_from(data, self.HEADER.size)
+        return True
+
+    def _write_header(self):
+        self._file.seek(0)
+        self._file.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.RECORD.size, self.capacity, self.next_index))
+        self._file.write(self.COUNT.pack(self.count))
+
+    def _offset(self, index):
+        return self.HEADER.size + self.COUNT.size + index * self.RECORD.size
+
+    def append(self, timestamp, download_speed, upload_speed, num_active, num_waiting, num_stopped, tick_ms):
+        """Grava uma amostra (O(1), sobrescreve a mais antiga quando cheio)."""
+        record = self.RECORD.pack(float(timestamp), float(download_speed), float(upload_speed),
+                                  int(num_active), int(num_waiting), int(num_stopped), float(tick_ms))
+        with self._lock:
+            self._file.seek(self._offset(self.next_index))
+            self._file.write(record)
+            self.next_index = (self.next_index + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+            self._write_header()
+            self._file.flush()
+
+    def read(self, since=None):
+        """Amostras (dicionários) em ordem cronológica, opcionalmente a partir de um timestamp."""
+        with self._lock:
+            start = (self.next_index - self.count) % self.capacity
+            self._file.seek(self._offset(0))
+            data = self._file.read(self.capacity * self.RECORD.size)
+            count = self.count
+        for i in range(count):
+            values = self.RECORD.unpack_from(data, ((start + i) % self.capacity) * self.RECORD.size)
+            if since is None or values[0] >= since:
+                yield dict(zip(self.FIELDS, values))
+
+    def dump_csv(self, out, since=None):
+        """Escreve as amostras em CSV (out: caminho ou arquivo texto aberto)."""
+        if isinstance(out, str):
+            with open(out, "w", newline="", encoding="utf-8") as f:
+                return self.dump_csv(f, since)
+        writer = csv.DictWriter(out, fieldnames=self.FIELDS)
+        writer.writeheader()
+        rows = 0
+        for sample in self.read(since):
+            writer.writerow(sample)
+            rows += 1
+        return rows
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
@@ -0,0 +1,107 @@
+class TreeReconciler:
+    """
+    Reconcilia as linhas de um ttk.Treeview com a lista desejada, por iid (GID).
+
+    Em vez de apagar e reinserir tudo a cada atualização, insere apenas as
+    linhas novas, remove as que sumiram, reposiciona as que mudaram de ordem
+    e atualiza somente as células cujo texto formatado mudou. Seleção e
+    posição de rolagem são preservadas porque as linhas existentes não são recriadas.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.columns = tuple(tree["columns"])
+        self._rows = {}   # iid -> valores atualmente exibidos
+        self._order = []  # iids na ordem atualmente exibida
+        self.last_stats = {"inserted": 0, "deleted": 0, "updated": 0, "moved": 0, "tk_calls": 0}
+
+    def __contains__(self, iid):
+        return iid in self._rows
+
+    def values(self, iid):
+        """Valores atualmente exibidos para a linha (ou None)."""
+        return self._rows.get(iid)
+
+    def reconcile(self, rows):
+        """
+        Aplica a lista desejada de linhas ao Treeview.
+
+        Args:
+            rows: Sequência de tuplas (iid, valores), na ordem de exibição
+
+        Returns:
+            Dicionário com contagem de inserções, remoções, atualizações,
+            movimentações e chamadas ao Tk feitas neste ciclo
+        """
+        tree = self.tree
+        stats = {"inserted": 0, "deleted": 0, "updated": 0, "moved": 0, "tk_calls": 0}
+
+        new_rows = {}
+        for iid, values in rows:
+            new_rows[iid] = tuple(values)
+
+        # Remove de uma vez as linhas que saíram
+        deleted = [iid for iid in self._order if iid not in new_rows]
+        if deleted:
+            tree.delete(*deleted)
+            stats["deleted"] = len(deleted)
+            stats["tk_calls"] += 1
+            gone = set(deleted)
+            current = [iid for iid in self._order if iid not in gone]
+        else:
+            current = self._order
+
+        rows_shown = self._rows
+        position = {iid: index for index, iid in enumerate(current)}
+        shifted = False  # após uma inserção/movimentação os índices em position ficam defasados
+
+        for index, (iid, values) in enumerate(new_rows.items()):
+            old = rows_shown.get(iid)
+            if old is None:
+                tree.insert("", index, iid=iid, values=values)
+                current.insert(index, iid)
+                shifted = True
+                stats["inserted"] += 1
+                stats["tk_calls"] += 1
+                continue
+
+            in_place = current[index] == iid if shifted else position[iid] == index
+            if not in_place:
+                tree.move(iid, "", index)
+                current.remove(iid)
+                current.insert(index, iid)
+                shifted = True
+                stats["moved"] += 1
+                stats["tk_calls"] += 1
+
+            if old != values:
+                changed = [col for col, (a, b) in enumerate(zip(old, values)) if a != b]
+                if len(changed) == 1 and len(old) == len(values):
+                    col = changed[0]
+                    tree.set(iid, self.columns[col], values[col])
+                else:
+                    tree.item(iid, values=values)
+                stats["updated"] += 1
+                stats["tk_calls"] += 1
+
+        self._rows = new_rows
+        self._order = current
+        self.last_stats = stats
+        return stats
+
+    def patch(self, iid, values):
+        """Atualiza uma única linha já exibida (ex.: atualização otimista após uma ação)."""
+        old = self._rows.get(iid)
+        if old is None:
+            return False
+        values = tuple(values)
+        if old != values:
+            self.tree.item(iid, values=values)
+            self._rows[iid] = values
+        return True
+
+    def clear(self):
+        if self._order:
+            self.tree.delete(*self._order)
+        self._rows = {}
+        self._order = []
@@ -0,0 +1,114 @@
+from tkinter import ttk
+
+from src.ui.utils.tree_reconciler import TreeReconciler
+
+
+class VirtualTreeview(ttk.Frame):
+    """
+    Treeview virtualizado: só materializa as linhas visíveis.
+
+    A barra de rolagem representa a lista inteira (total), mas o Treeview
+    contém apenas a janela visível. As linhas vêm de um buffer com a janela
+    mais uma margem (OVERSCAN) acima e abaixo; quando a rolagem sai do buffer,
+    on_range_change(offset, limit) pede ao chamador a nova faixa, que deve
+    responder com set_rows().
+    """
+
+    OVERSCAN = 30
+    DEFAULT_ROW_HEIGHT = 20
+    HEADER_HEIGHT = 25
+
+    def __init__(self, master, columns, on_range_change=None, **tree_kwargs):
+        super().__init__(master)
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", **tree_kwargs)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.reconciler = TreeReconciler(self.tree)
+        self.on_range_change = on_range_change
+        self.total = 0
+        self.first = 0     # índice (na lista inteira) da primeira linha visível
+        self.visible = 1   # quantas linhas cabem na área visível
+        self._buffer_offset = 0
+        self._buffer = []  # (iid, valores) a partir de _buffer_offset
+        self._row_height = int(ttk.Style().lookup("Treeview", "rowheight") or self.DEFAULT_ROW_HEIGHT)
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Prior>", lambda event: self.scroll(-self.visible))
+        self.tree.bind("<Next>", lambda event: self.scroll(self.visible))
+
+    def requested_range(self):
+        """Faixa (offset, limit) a buscar: janela visível mais a margem de overscan."""
+        offset = max(self.first - self.OVERSCAN, 0)
+        return offset, self.visible + self.OVERSCAN * 2 + (self.first - offset)
+
+    def set_rows(self, offset, total, rows):
+        """Recebe a faixa buscada (linhas a partir de offset) e o total da lista."""
+        self.total = total
+        self._buffer_offset = offset
+        self._buffer = list(rows)
+        if self.first > max(total - self.visible, 0):
+            self.first = max(total - self.visible, 0)
+        # Não pede nova faixa aqui: diferenças pontuais se resolvem no próximo ciclo
+        self._render(request_more=False)
+
+    def patch_row(self, iid, values):
+        """Atualiza uma linha do buffer e, se visível, do Treeview."""
+        for index, (row_iid, _values) in enumerate(self._buffer):
+            if row_iid == iid:
+                self._buffer[index] = (iid, tuple(values))
+                break
+        return self.reconciler.patch(iid, values)
+
+    def scroll(self, delta):
+        self.scroll_to(self.first + delta)
+        return "break"
+
+    def scroll_to(self, first):
+        first = max(0, min(int(first), max(self.total - self.visible, 0)))
+        if first == self.first:
+            return
+        self.first = first
+        self._render()
+
+    def _render(self, request_more=True):
+        start = self.first - self._buffer_offset
+        end = start + self.visible
+        if start >= 0:
+            self.reconciler.reconcile(self._buffer[start:end])
+        self._update_scrollbar()
+
+        # Pede mais dados quando a janela visível encosta na borda do buffer
+        buffer_end = self._buffer_offset + len(self._buffer)
+        needs_above = self.first < self._buffer_offset
+        needs_below = self.first + self.visible > buffer_end and buffer_end < self.total
+        if request_more and (needs_above or needs_below) and self.on_range_change:
+            self.on_range_change(*self.requested_range())
+
+    def _update_scrollbar(self):
+        if self.total <= 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        top = self.first / self.total
+        bottom = min((self.first + self.visible) / self.total, 1.0)
+        self.scrollbar.set(top, bottom)
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(float(args[0]) * self.total)
+        elif action == "scroll":
+            amount, unit = int(args[0]), args[1]
+            self.scroll(amount * self.visible if unit == "pages" else amount)
+
+    def _on_mousewheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_configure(self, event):
+        visible = max(1, (event.height - self.HEADER_HEIGHT) // self._row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self._render()
@@ -0,0 +1,115 @@
+"""Agendador de banda: calendário (inclusive faixas que atravessam a meia-noite) e divisão ponderada do orçamento."""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from src.ui.utils.bandwidth_scheduler import BandwidthScheduler, BandwidthWindow
+
+MON, THU, FRI, SAT, SUN = 0, 3, 4, 5, 6
+
+
+def at(weekday, hhmm):
+    hours, minutes = map(int, hhmm.split(":"))
+    return weekday, hours * 60 + minutes
+
+
+def local(year, month, day, hhmm):
+    hours, minutes = map(int, hhmm.split(":"))
+    return time.mktime(datetime(year, month, day, hours, minutes).timetuple())
+
+
+def test_parse_days_and_time():
+    assert BandwidthWindow.parse_days("mon-fri") == {0, 1, 2, 3, 4}
+    assert BandwidthWindow.parse_days("fri-mon") == {FRI, SAT, SUN, MON}
+    assert BandwidthWindow.parse_days("sáb,dom") == {SAT, SUN}
+    assert BandwidthWindow.parse_days("*") == set(range(7))
+    assert BandwidthWindow.parse_time("09:30") == 570
+    assert BandwidthWindow.parse_time("24:00") == 0
+    with pytest.raises(KeyError):
+        BandwidthWindow.parse_days("xyz")
+
+
+def test_window_across_midnight_belongs_to_the_previous_day():
+    night = BandwidthWindow.from_config({"days": "fri", "start": "22:00", "end": "06:00"})
+    assert night.matches(*at(FRI, "22:00"))
+    assert night.matches(*at(FRI, "23:59"))
+    assert night.matches(*at(SAT, "00:00"))
+    assert night.matches(*at(SAT, "05:59"))
+    assert not night.matches(*at(SAT, "06:00"))
+    assert not night.matches(*at(SAT, "22:30"))  # sábado à noite não está na faixa
+    assert not night.matches(*at(FRI, "05:00"))  # madrugada de sexta é da quinta
+    assert not night.matches(*at(THU, "23:00"))
+
+
+def test_same_start_and_end_is_the_whole_day():
+    weekend = BandwidthWindow.from_config({"days": "sat,sun", "start": "00:00", "end": "00:00"})
+    assert weekend.matches(*at(SAT, "00:00")) and weekend.matches(*at(SUN, "23:59"))
+    assert not weekend.matches(*at(MON, "12:00"))
+
+
+def test_first_matching_window_wins_and_default_outside():
+    scheduler = BandwidthScheduler.from_settings(None, {
+        "schedule": [
+            {"name": "Expediente", "days": "mon-fri", "start": "09:00", "end": "18:00", "download": "1M"},
+            {"name": "Noite", "days": "*", "start": "22:00", "end": "06:00", "download": "0"},
+            {"name": "Quebrada", "days": "mon", "start": "25h"},
+        ],
+        "default": {"download": "4M", "upload": "256K"},
+        "classes": {"normal": 1},
+        "default_class": "normal",
+    })
+    assert [window.name for window in scheduler.windows] == ["Expediente", "Noite"]  # a inválida é ignorada
+    # 16/10/2026 é uma sexta-feira
+    assert scheduler.window_at(local(2026, 10, 16, "10:00")) == ("Expediente", 1024 ** 2, 0)
+    assert scheduler.window_at(local(2026, 10, 17, "01:00"))[0] == "Noite"
+    assert scheduler.window_at(local(2026, 10, 17, "10:00")) == ("Padrão", 4 * 1024 ** 2, 256 * 1024)
+
+
+def make_scheduler():
+    return BandwidthScheduler(None, [], classes={"alta": 4, "normal": 2, "baixa": 1})
+
+
+def test_plan_splits_the_budget_by_class_weight():
+    scheduler = make_scheduler()
+    active = [
+        ("a", frozenset({("g1", "alta"), ("g2", "baixa")})),
+        ("b", frozenset({("g3", "normal")})),
+        ("c", None),  # fora do ar: sem limites
+    ]
+    overall, per_download = scheduler.plan(("Faixa", 700_000, 0), active)
+    assert overall == {"a": (500_000, 0), "b": (200_000, 0)}
+    assert per_download == {("a", "g1"): (400_000, 0), ("a", "g2"): (100_000, 0), ("b", "g3"): (200_000, 0)}
+
+
+def test_plan_with_a_single_class_only_sets_the_global_caps():
+    scheduler = make_scheduler()
+    active = [("a", frozenset({("g1", "normal"), ("g2", "normal")})), ("b", frozenset())]
+    overall, per_download = scheduler.plan(("Faixa", 900_000, 300_000), active)
+    assert overall == {"a": (900_000, 300_000), "b": (scheduler.MIN_SHARE, scheduler.MIN_SHARE)}
+    assert per_download == {("a", "g1"): (0, 0), ("a", "g2"): (0, 0)}
+
+    # Sem ativos, a banda fica dividida igualmente, pronta para o próximo
+    overall, _per_download = scheduler.plan(("Faixa", 900_000, 0), [("a", frozenset()), ("b", frozenset())])
+    assert overall == {"a": (450_000, 0), "b": (450_000, 0)}
+
+
+def test_shares_never_reach_zero():
+    scheduler = make_scheduler()
+    active = [("a", frozenset({("g1", "alta"), ("g2", "baixa")}))]
+    _overall, per_download = scheduler.plan(("Faixa", 2048, 0), active)
+    assert per_download[("a", "g2")] == (scheduler.MIN_SHARE, 0)  # 2048 / 5 seria menos que o mínimo
+
+
+def test_only_changed_limits_are_sent():
+    scheduler = make_scheduler()
+    active = [("a", frozenset({("g1", "alta"), ("g2", "baixa")}))]
+    changes = scheduler._diff(scheduler.plan(("Faixa", 500_000, 0), active))
+    assert [method for method, _params in changes["a"]] == [
+        "aria2.changeGlobalOption", "aria2.changeOption", "aria2.changeOption"]
+    assert scheduler._diff(scheduler.plan(("Faixa", 500_000, 0), active)) is None
+
+    active = [("a", frozenset({("g1", "alta")}))]  # g2 terminou: g1 passa a ser a única classe
+    changes = scheduler._diff(scheduler.plan(("Faixa", 500_000, 0), active))
+    assert changes["a"] == [("aria2.changeOption", ["g1", {"max-download-limit": "0", "max-upload-limit": "0"}])]
@@ -0,0 +1,117 @@
+"""Conclusões processadas uma única vez: impressões digitais, persistência entre sessões e novo download da URL."""
+
+import threading
+
+import pytest
+
+from src.ui.models.download_record import DownloadRecord
+from src.ui.utils.completion_tracker import CompletionTracker
+from src.ui.utils.file_utils import FileUtils
+from src.ui.utils.history_store import HistoryStore
+
+URL = "http://mirror.example.com/pub/file.iso"
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    """Banco de histórico temporário; restart() simula fechar e reabrir o aplicativo."""
+    monkeypatch.setattr(FileUtils, "HISTORY_DB_PATH", str(tmp_path / "history.db"))
+    monkeypatch.setattr(FileUtils, "HISTORY_PATH", str(tmp_path / "history.json"))
+
+    def restart():
+        store = HistoryStore._instances.pop(FileUtils.HISTORY_DB_PATH, None)
+        if store is not None:
+            store.close()
+
+    yield restart
+    restart()
+
+
+class Handler:
+    """Grava no histórico como o MainWindow, marcando as impressões digitais na mesma gravação."""
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record, fingerprints):
+        self.records.append(record)
+        FileUtils.save_download_history({"filename": record.name, "url": record.url, "path": record.path,
+                                         "status": "Concluído"}, fingerprints)
+
+
+def make_record(gid="2000000000000001", url=URL, info_hash="", instance=""):
+    return DownloadRecord(gid, "complete", 4096, 4096, info_hash=info_hash, name="file.iso",
+                          path="/downloads/file.iso", url=url, instance=instance)
+
+
+def drain(tracker):
+    tracker._queue.join()
+
+
+def test_fingerprints():
+    record = make_record(info_hash="ABCDEF", instance="nas")
+    assert CompletionTracker.fingerprints(record) == [
+        "gid:2000000000000001@nas",
+        "btih:abcdef",
+        f"url:{URL}|/downloads/file.iso|4096",
+    ]
+    assert CompletionTracker.fingerprints(make_record(url="")) == ["gid:2000000000000001"]
+
+
+def test_duplicate_in_session_is_dropped(history):
+    handler = Handler()
+    tracker = CompletionTracker(handler)
+    assert tracker.submit(make_record())
+    assert not tracker.submit(make_record())
+    # Outro GID (ex.: o Aria2 reiniciou) com a mesma URL, caminho e tamanho é a mesma conclusão
+    assert not tracker.submit(make_record(gid="2000000000000099"))
+    drain(tracker)
+    assert len(handler.records) == 1
+
+
+def test_dedupe_survives_restart(history):
+    handler = Handler()
+    tracker = CompletionTracker(handler)
+    tracker.submit(make_record(info_hash="ABCDEF"))
+    drain(tracker)
+    history()
+
+    handler = Handler()
+    tracker = CompletionTracker(handler)
+    # Sessão nova: aceita na memória, mas descartada pelo banco
+    assert tracker.submit(make_record(gid="2000000000000042"))
+    assert tracker.submit(make_record(gid="2000000000000043", url="", info_hash="abcdef"))
+    drain(tracker)
+    assert handler.records == []
+    assert FileUtils.history_store().count() == 1
+
+
+def test_forget_url_lets_a_new_download_through(history):
+    handler = Handler()
+    tracker = CompletionTracker(handler)
+    tracker.submit(make_record())
+    drain(tracker)
+
+    tracker.forget_url(URL)
+    assert tracker.submit(make_record(gid="2000000000000002"))
+    drain(tracker)
+    assert len(handler.records) == 2
+
+    history()
+    handler = Handler()
+    tracker = CompletionTracker(handler)
+    tracker.forget_url(URL)
+    tracker.submit(make_record(gid="2000000000000003"))
+    drain(tracker)
+    assert len(handler.records) == 1
+
+
+def test_defer_runs_on_the_worker_in_order(history):
+    tracker = CompletionTracker(Handler())
+    seen = []
+    tracker.defer(lambda: seen.append(("first", threading.current_thread().name)))
+    tracker.defer(seen.append, ("second", None))
+    tracker.defer(lambda: 1 / 0)  # um erro não derruba a thread
+    tracker.defer(seen.append, ("third", None))
+    drain(tracker)
+    assert seen == [("first", "completion-worker"), ("second", None), ("third", None)]
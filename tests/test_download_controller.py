@@ -0,0 +1,34 @@
+"""Conferência de downloads terminados: ativos que sumiram e parados que nunca foram vistos ativos."""
+
+from benchmarks.fake_aria2 import FakeAria2
+from src.ui.controllers.download_controller import DownloadController
+
+
+def finished_gids(page):
+    return sorted(record.gid for record in page.finished)
+
+
+def test_finished_while_not_observed_active_is_reported():
+    """Um arquivo pequeno que vai de em espera a concluído entre dois ciclos, sem WebSocket."""
+    with FakeAria2(num_active=0, num_waiting=1, num_stopped=0) as server:
+        controller = DownloadController(server.url, "")
+        assert controller.listar_downloads(0, 10).finished == []
+
+        server.state.num_waiting, server.state.num_stopped = 0, 1
+        page = controller.listar_downloads(0, 10)
+        assert finished_gids(page) == [server.state.gid_for("s", 0)]
+        record = page.finished[0]
+        assert record.status == "complete"
+        assert record.path and record.url  # metadados completos para o histórico e as impressões digitais
+
+        assert controller.listar_downloads(0, 10).finished == []
+        controller.invalidate()  # ressincroniza a camada lenta, que não deve repetir o aviso
+        assert controller.listar_downloads(0, 10).finished == []
+
+
+def test_finished_while_closed_is_reported_on_start():
+    """O que terminou com o aplicativo fechado aparece no primeiro ciclo; o CompletionTracker descarta os já processados."""
+    with FakeAria2(num_active=1, num_waiting=2, num_stopped=3) as server:
+        page = DownloadController(server.url, "").listar_downloads(0, 10)
+        assert finished_gids(page) == sorted(server.state.gid_for("s", index) for index in range(3))
+
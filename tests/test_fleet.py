@@ -0,0 +1,104 @@
+"""Frota de instâncias do Aria2: lista unificada particionada entre as instâncias e distribuição de novos downloads."""
+
+import pytest
+
+from benchmarks.fake_aria2 import FakeAria2
+from src.ui.controllers.fleet_controller import FleetController
+from src.ui.models.download_record import DownloadRecord
+from src.ui.utils.metrics import Metrics
+from src.ui.utils.placement_policy import PlacementPolicy
+
+# (ativos, em espera, parados) de cada instância simulada
+SIZES = {"a": (2, 5, 3), "b": (1, 0, 4), "c": (3, 7, 0)}
+TOTAL = sum(sum(size) for size in SIZES.values())
+
+
+@pytest.fixture
+def servers():
+    started = {name: FakeAria2(num_active=active, num_waiting=waiting, num_stopped=stopped, seed=index).start()
+               for index, (name, (active, waiting, stopped)) in enumerate(SIZES.items())}
+    yield started
+    for server in started.values():
+        server.stop()
+
+
+def make_fleet(servers, policy="least_loaded"):
+    return FleetController([{"name": name, "url": server.url, "token": ""} for name, server in servers.items()],
+                           policy)
+
+
+def test_pages_cover_the_merged_list_once(servers):
+    fleet = make_fleet(servers)
+    everything = fleet.listar_downloads(0, None)
+    assert everything.total == TOTAL
+    expected = [record.key for record in everything.records]
+    assert len(set(expected)) == TOTAL  # GIDs repetidos entre instâncias têm chaves distintas
+
+    keys = []
+    for offset in range(0, TOTAL, 7):
+        page = fleet.listar_downloads(offset, 7)
+        assert page.total == TOTAL
+        keys.extend(record.key for record in page.records)
+    assert keys == expected
+
+
+def test_window_crossing_instances_is_split_in_order(servers):
+    fleet = make_fleet(servers)
+    page = fleet.listar_downloads(8, 6)  # "a" tem 10: dois dela e quatro de "b"
+    assert [record.instance for record in page.records] == ["a", "a", "b", "b", "b", "b"]
+    for record in page.records:
+        assert record.key == f"{record.gid}@{record.instance}"
+        assert DownloadRecord.split_key(record.key) == (record.gid, record.instance)
+
+
+def test_global_stat_is_aggregated(servers):
+    fleet = make_fleet(servers)
+    fleet.listar_downloads(0, 10)
+    stat = fleet.global_stat
+    assert int(stat["numActive"]) == sum(active for active, _waiting, _stopped in SIZES.values())
+    assert int(stat["numWaiting"]) == sum(waiting for _active, waiting, _stopped in SIZES.values())
+    assert [info["name"] for info in fleet.instances()] == list(SIZES)
+    # Os medidores exportados refletem a frota inteira, não a última instância consultada
+    assert Metrics.gauges["num_active"] == int(stat["numActive"])
+    assert Metrics.gauges["num_waiting"] == int(stat["numWaiting"])
+
+
+def test_offline_instance_is_left_out(servers):
+    fleet = make_fleet(servers)
+    fleet.listar_downloads(0, None)
+    servers["b"]._server.error_rate = 1.0  # toda requisição falha com HTTP 500
+    page = fleet.listar_downloads(0, None)
+    assert page.total == TOTAL - sum(SIZES["b"])
+    assert {record.instance for record in page.records} == {"a", "c"}
+
+
+def test_least_loaded_placement_spreads_a_burst(servers):
+    fleet = make_fleet(servers)
+    fleet.listar_downloads(0, 10)  # getGlobalStat de todas as instâncias
+    placed = [fleet.adicionar_download(f"http://example.com/file{i}.bin")["instance"] for i in range(8)]
+    # "b" tem 1 na fila, "a" tem 7 e "c" tem 10: as seis primeiras vão para "b", depois ela empata com "a"
+    assert placed[:6] == ["b"] * 6
+    assert set(placed[6:]) <= {"a", "b"}
+    assert servers["b"].state.num_waiting == SIZES["b"][1] + placed.count("b")
+
+
+def test_host_placement_is_sticky_and_moves_only_the_lost_hosts(servers):
+    fleet = make_fleet(servers, "host")
+    fleet.listar_downloads(0, 10)
+    hosts = [f"mirror{i}.example.com" for i in range(60)]
+    placement = {host: fleet.choose(f"https://{host}/a.iso").name for host in hosts}
+    assert placement == {host: fleet.choose(f"https://{host}/b.iso").name for host in hosts}
+    assert set(placement.values()) == set(SIZES)
+
+    fleet._by_name["c"].online = False
+    moved = {host: fleet.choose(f"https://{host}/a.iso").name for host in hosts}
+    for host, name in placement.items():
+        if name != "c":
+            assert moved[host] == name
+        else:
+            assert moved[host] in ("a", "b")
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        PlacementPolicy("round_robin")
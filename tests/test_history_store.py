@@ -0,0 +1,79 @@
+"""Histórico em SQLite: migração única do JSON antigo e gravação em lote com as conclusões processadas."""
+
+import json
+import os
+import shutil
+
+import pytest
+
+from src.ui.utils.history_store import HistoryStore
+
+ENTRIES = [
+    {"filename": "a.iso", "url": "http://Mirror.example.com/a.iso", "path": "/downloads", "status": "Concluído",
+     "finished_at": "2024-01-01 10:00:00"},
+    {"filename": "b.zip", "url": "https://cdn.example.org/b.zip", "path": "/downloads", "status": "Concluído",
+     "finished_at": "2024-01-02 10:00:00", "integrity": "ok", "sha-256": "00ff"},
+    "entrada corrompida",
+]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    legacy = tmp_path / "download_history.json"
+    legacy.write_text(json.dumps(ENTRIES), encoding="utf-8")
+    stores = []
+
+    def open_store():
+        store = HistoryStore(str(tmp_path / "history.db"), str(legacy))
+        stores.append(store)
+        return store
+
+    yield legacy, open_store
+    for store in stores:
+        store.close()
+
+
+def test_migrates_legacy_json_once(paths):
+    legacy, open_store = paths
+    store = open_store()
+    entries = store.load_all()
+    assert [entry["filename"] for entry in entries] == ["a.iso", "b.zip"]
+    assert entries[1]["integrity"] == "ok" and entries[1]["sha-256"] == "00ff"  # campos extras preservados
+    assert store.query(search="mirror.example", field="url_host") != []
+    assert not legacy.exists() and os.path.exists(f"{legacy}.migrated")
+
+    store.close()
+    assert open_store().count() == 2
+
+
+def test_migration_is_idempotent_after_a_crash_before_rename(paths):
+    legacy, open_store = paths
+    open_store().close()
+    # Queda entre o COMMIT e o rename: o JSON continua lá na próxima abertura
+    shutil.copy(f"{legacy}.migrated", legacy)
+    store = open_store()
+    assert store.count() == 2
+    assert not legacy.exists()
+
+
+def test_unreadable_legacy_json_is_left_alone(paths):
+    legacy, open_store = paths
+    legacy.write_text("{ quebrado", encoding="utf-8")
+    assert open_store().count() == 0
+    assert legacy.exists()
+
+
+def test_batched_append_records_fingerprints_with_the_entry(paths):
+    _legacy, open_store = paths
+    store = open_store()
+    store.append({"filename": "c.bin", "url": "http://example.com/c.bin"}, ["gid:1", "url:http://example.com/c.bin|/d|1"])
+    # Ainda no lote em memória: já conta como processada
+    assert store.has_completion(["gid:1"])
+    store.flush()
+    store.close()
+
+    store = open_store()
+    assert store.count() == 3
+    assert store.has_completion(["gid:9", "gid:1"])
+    store.forget_completions("url:http://example.com/c.bin|")
+    assert store.known_fingerprints(["gid:1", "url:http://example.com/c.bin|/d|1"]) == {"gid:1"}
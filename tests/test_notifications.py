@@ -0,0 +1,128 @@
+"""Canal WebSocket de notificações: entrega de eventos, reconexão e fallback para polling HTTP."""
+
+import threading
+import time
+
+from benchmarks.fake_aria2 import FakeAria2
+from src.ui.controllers.download_controller import DownloadController
+from src.ui.utils.aria2_rpc import Aria2RPC
+from src.ui.utils.aria2_websocket import Aria2WebSocketClient
+from src.ui.utils.refresh_scheduler import RefreshScheduler
+
+GID = "2000000000000001"
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class Recorder:
+    """Guarda os eventos e as mudanças de estado recebidas do cliente."""
+
+    def __init__(self):
+        self.events = []
+        self.states = []
+        self.received = threading.Event()
+
+    def on_event(self, method, gid):
+        self.events.append((method, gid))
+        self.received.set()
+
+    def on_state(self, connected):
+        self.states.append(connected)
+
+
+class ManualWidget:
+    """after()/after_cancel() sem Tk: os ciclos ficam guardados para o teste disparar."""
+
+    def __init__(self):
+        self.jobs = {}
+        self._next = 0
+
+    def after(self, delay_ms, func, *args):
+        self._next += 1
+        self.jobs[self._next] = (delay_ms, func, args)
+        return self._next
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run_next(self):
+        job = min(self.jobs)
+        delay_ms, func, args = self.jobs.pop(job)
+        func(*args)
+        return delay_ms
+
+
+def test_notifications_are_dispatched():
+    recorder = Recorder()
+    with FakeAria2() as server:
+        client = Aria2RPC(url=server.url, token="").subscribe(recorder.on_event, recorder.on_state)
+        try:
+            assert wait_for(lambda: server.ws_clients == 1)
+            server.notify("aria2.onDownloadFoo", GID)  # evento não monitorado: ignorado
+            server.notify("aria2.onDownloadComplete", GID)
+            assert recorder.received.wait(5)
+            assert recorder.events == [("aria2.onDownloadComplete", GID)]
+            assert client.connected
+        finally:
+            client.stop()
+
+
+def test_reconnects_after_connection_drops():
+    recorder = Recorder()
+    with FakeAria2() as server:
+        client = Aria2WebSocketClient(Aria2WebSocketClient.ws_url(server.url), recorder.on_event, recorder.on_state)
+        client.MIN_BACKOFF = 0.05
+        client.start()
+        try:
+            assert wait_for(lambda: client.connected)
+            assert server.drop_ws_clients() == 1
+            assert wait_for(lambda: recorder.states[-2:] == [False, True] and server.ws_clients == 1)
+
+            server.notify("aria2.onDownloadStart", GID)
+            assert recorder.received.wait(5)
+            assert recorder.events == [("aria2.onDownloadStart", GID)]
+        finally:
+            client.stop()
+
+
+def test_falls_back_to_http_polling_without_websocket():
+    with FakeAria2(num_active=0, num_waiting=3, num_stopped=0, websocket=False) as server:
+        controller = DownloadController(server.url, "")
+        controller.start_notifications()
+        try:
+            time.sleep(0.3)  # primeira tentativa de conexão recusada
+            assert not controller.notifications_connected
+
+            # Sem eventos, o agendador continua consultando o Aria2 a cada BASE_MS, mesmo ocioso
+            widget = ManualWidget()
+            fetches = []
+
+            def fetch(done):
+                fetches.append(controller.listar_downloads(0, 10))
+                done()
+
+            scheduler = RefreshScheduler(widget, fetch, is_active=lambda: False,
+                                         push_connected=lambda: controller.notifications_connected)
+            scheduler.start()
+            delays = [widget.run_next() for _ in range(8)]
+            assert delays[-1] == RefreshScheduler.BASE_MS
+            assert widget.jobs  # o próximo ciclo segue agendado
+            assert fetches[-1].total == 3
+        finally:
+            controller.stop_notifications()
+
+
+def test_idle_polling_backs_off_further_with_notifications():
+    widget = ManualWidget()
+    scheduler = RefreshScheduler(widget, lambda done: done(), is_active=lambda: False,
+                                 push_connected=lambda: True)
+    scheduler.start()
+    delays = [widget.run_next() for _ in range(12)]
+    assert delays[-1] == RefreshScheduler.IDLE_MAX_MS